@@ -0,0 +1,70 @@
+"""
+Benchmark the columnar daily frame builder against the former from_dict + clean_daily path.
+
+Run from the project root:
+    python -m benchmarks.bench_format_daily [n_symbols] [n_days]
+"""
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from utils.cleaning.data_cleaners import build_daily_frame
+
+
+def synthetic_time_series(n_days: int, seed: int = 0) -> dict:
+    """Generates an Alpha Vantage style 'Time Series (Daily)' mapping, newest first."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2025-03-28', periods=n_days)[::-1].strftime('%Y-%m-%d')
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_days)))
+    volumes = rng.integers(1_000_000, 100_000_000, n_days)
+
+    return {
+        date: {
+            '1. open': f'{price:.4f}',
+            '2. high': f'{price * 1.01:.4f}',
+            '3. low': f'{price * 0.99:.4f}',
+            '4. close': f'{price * 1.002:.4f}',
+            '5. volume': str(volume)
+        }
+        for date, price, volume in zip(dates, prices, volumes)
+    }
+
+
+def legacy_format_daily(time_series: dict) -> pd.DataFrame:
+    """The former implementation: object-dtype frame, then drop, reset_index, rename and coerce."""
+    df = pd.DataFrame.from_dict(time_series, orient='index')
+    df.drop(columns=['2. high', '3. low'], inplace=True, errors='ignore')
+    df.index.name = 'date'
+    df.reset_index(inplace=True)
+    df['date'] = pd.to_datetime(df['date'], errors="coerce")
+    df.rename(columns={"1. open": "open", "4. close": "close", "5. volume": "volume"}, inplace=True)
+    df[['open', 'close', 'volume']] = df[['open', 'close', 'volume']].apply(pd.to_numeric, errors="coerce")
+    return df
+
+
+def measure(func, payloads):
+    """Returns (seconds, peak traced bytes) for running func over every payload."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    for payload in payloads:
+        func(payload)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(n_symbols: int = 20, n_days: int = 6300):
+    payloads = [synthetic_time_series(n_days, seed) for seed in range(n_symbols)]
+
+    pd.testing.assert_frame_equal(legacy_format_daily(payloads[0]), build_daily_frame(payloads[0]))
+
+    print(f'{n_symbols} symbols x {n_days} days')
+    for name, func in [('legacy from_dict', legacy_format_daily), ('columnar builder', build_daily_frame)]:
+        elapsed, peak = measure(func, payloads)
+        print(f'{name:<18} {elapsed:8.3f} s   peak {peak / 2**20:8.1f} MiB')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,70 @@
+"""
+Benchmark block numeric coercion of statement values against the per-column pd.to_numeric paths.
+
+Run from the project root:
+    python -m benchmarks.bench_numeric_coercion [n_reports] [missing_share]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from utils.cleaning.data_cleaners import (BALANCE_COLUMN_MAP, BALANCE_NUMERIC_COLUMNS, clean_balance,
+                                          coerce_numeric_block)
+
+RAW_NAMES = {new: old for old, new in BALANCE_COLUMN_MAP.items()}
+
+
+def synthetic_reports(n_reports: int, missing_share: float = 0.15, seed: int = 0) -> pd.DataFrame:
+    """Generates raw balance sheet reports as Alpha Vantage sends them: numbers as strings, gaps as "None"."""
+    rng = np.random.default_rng(seed)
+    columns = {'fiscalDateEnding': pd.date_range(end='2024-12-31', periods=n_reports, freq='D').strftime('%Y-%m-%d')}
+    for col in BALANCE_NUMERIC_COLUMNS:
+        values = rng.integers(-10**11, 10**11, n_reports).astype(str).astype(object)
+        values[rng.random(n_reports) < missing_share] = 'None'
+        columns[RAW_NAMES[col]] = values
+    return pd.DataFrame(columns)
+
+
+def apply_to_numeric(df: pd.DataFrame) -> np.ndarray:
+    """The original cleaners: DataFrame.apply over the renamed columns."""
+    return df[[RAW_NAMES[col] for col in BALANCE_NUMERIC_COLUMNS]].apply(pd.to_numeric, errors="coerce").to_numpy()
+
+
+def per_column_to_numeric(df: pd.DataFrame) -> np.ndarray:
+    """One pd.to_numeric call per column."""
+    return np.column_stack([pd.to_numeric(df[RAW_NAMES[col]], errors="coerce").to_numpy()
+                            for col in BALANCE_NUMERIC_COLUMNS])
+
+
+def block_coercion(df: pd.DataFrame) -> np.ndarray:
+    """All columns at once with coerce_numeric_block."""
+    return coerce_numeric_block(df[[RAW_NAMES[col] for col in BALANCE_NUMERIC_COLUMNS]].to_numpy(dtype=object))
+
+
+def measure(func, df, repeat: int = 5) -> float:
+    """Returns the best of `repeat` runs in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(n_reports: int = 5000, missing_share: float = 0.15):
+    df = synthetic_reports(int(n_reports), float(missing_share))
+
+    expected = apply_to_numeric(df)
+    for func in [per_column_to_numeric, block_coercion]:
+        np.testing.assert_array_equal(func(df), expected)
+
+    print(f'{int(n_reports)} reports x {len(BALANCE_NUMERIC_COLUMNS)} columns, {float(missing_share):.0%} "None"')
+    baseline = measure(apply_to_numeric, df)
+    for name, func in [('DataFrame.apply', apply_to_numeric), ('per-column', per_column_to_numeric),
+                       ('block', block_coercion), ('clean_balance', clean_balance)]:
+        elapsed = measure(func, df)
+        print(f'{name:<16} {elapsed * 1000:9.1f} ms   {baseline / elapsed:5.1f}x')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
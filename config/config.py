@@ -13,4 +13,19 @@ DB_CONFIG = {
 }
 
 RAW_DATA_DIR = os.getenv('RAW_DATA_DIR')
-PROCESSED_DATA_DIR = os.getenv('PROCESSED_DATA_DIR')
\ No newline at end of file
+PROCESSED_DATA_DIR = os.getenv('PROCESSED_DATA_DIR')
+PANEL_DATA_DIR = os.getenv('PANEL_DATA_DIR')
+CACHE_DIR = os.getenv('CACHE_DIR')
+CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', 512 * 1024 * 1024))
+PIPELINE_BACKEND = os.getenv('PIPELINE_BACKEND', 'pandas')
+DB_LOAD_METHOD = os.getenv('DB_LOAD_METHOD', 'orm')
+DB_ON_CONFLICT = os.getenv('DB_ON_CONFLICT', 'error')
+DB_LOAD_WORKERS = int(os.getenv('DB_LOAD_WORKERS', 1))
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+DB_CHUNK_ROWS = int(os.getenv('DB_CHUNK_ROWS', 0)) or None
+DB_CHUNKS_PER_COMMIT = int(os.getenv('DB_CHUNKS_PER_COMMIT', 1))
+DB_LOAD_RESUME = os.getenv('DB_LOAD_RESUME', 'false').lower() == 'true'
+DB_REBUILD_INDEXES = os.getenv('DB_REBUILD_INDEXES', 'false').lower() == 'true'
+DB_PARTITION_STOCKS = os.getenv('DB_PARTITION_STOCKS', 'false').lower() == 'true'
+DB_DELTA_ONLY = os.getenv('DB_DELTA_ONLY', 'false').lower() == 'true'
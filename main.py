@@ -1,8 +1,13 @@
 from scripts.data_ingestion import StockFetcher
 from scripts.data_transformation import DataCleaner
 from scripts.data_saving import DataStorage
+from scripts.data_analytics import IndicatorEngine, RatioEngine
 from utils.logging.logger import log_info
 from utils.exceptions.exception_handling import handle_exceptions
+from utils.caching.result_cache import ResultCache
+from config.config import (CACHE_DIR, CACHE_MAX_BYTES, PANEL_DATA_DIR, PIPELINE_BACKEND, DB_LOAD_METHOD, DB_ON_CONFLICT,
+                           DB_LOAD_WORKERS, DB_CHUNK_ROWS, DB_CHUNKS_PER_COMMIT, DB_LOAD_RESUME,
+                           DB_REBUILD_INDEXES, DB_PARTITION_STOCKS, DB_DELTA_ONLY)
 
 
 def main():
@@ -10,11 +15,22 @@ def main():
     fetch.get_data()
     save = DataStorage()
     save.save_raw_data(fetch.data)
-    clean = DataCleaner(fetch.data)
+    cache = ResultCache(CACHE_DIR, CACHE_MAX_BYTES) if CACHE_DIR else None
+    clean = DataCleaner(fetch.data, watermarks=save.load_watermarks(), cache=cache, backend=PIPELINE_BACKEND)
     clean.transform()
-    save.save_processed_data(clean.processed_data)
-    save.create_tables()
-    save.save_to_database(clean.processed_data)
+    clean.check_accounting_identities()
+    IndicatorEngine(clean.processed_data).compute(history=save.load_processed('daily', tail=IndicatorEngine.LOOKBACK),
+                                                  state=save.load_processed('indicators', tail=1))
+    ratios = RatioEngine(clean.processed_data)
+    symbols, start = ratios.price_window()
+    ratios.compute(prices=save.load_processed('daily', symbols=symbols, start=start, columns=['close']))
+    save.save_processed_data(clean.processed_data, append=True)
+    if PANEL_DATA_DIR:
+        save.update_price_panel(clean.processed_data)
+    save.create_tables(partition_stocks=DB_PARTITION_STOCKS)
+    save.save_to_database(clean.processed_data, method=DB_LOAD_METHOD, on_conflict=DB_ON_CONFLICT, workers=DB_LOAD_WORKERS,
+                          chunk_rows=DB_CHUNK_ROWS, chunks_per_commit=DB_CHUNKS_PER_COMMIT, resume=DB_LOAD_RESUME,
+                          rebuild_indexes=DB_REBUILD_INDEXES, delta_only=DB_DELTA_ONLY)
  
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+import pandas as pd
+from utils.logging.logger import log_info
+from utils.exceptions.exception_handling import handle_exceptions
+from utils.cleaning.data_alignment import stack_processed, split_by_symbol, align_statements
+from utils.analytics.indicators import compute_indicators, LOOKBACK
+from utils.analytics.ratios import compute_ratios
+
+
+class IndicatorEngine:
+
+    LOOKBACK = LOOKBACK
+
+    def __init__(self, processed_data):
+        self.processed_data = processed_data
+        self.indicators = None
+
+    @log_info
+    @handle_exceptions
+    def compute(self, history=None, state=None):
+        """
+        Computes technical indicators for the processed daily prices of every symbol at once.
+
+        On an incremental run `processed_data` only holds the newly appended days. Pass the last
+        `LOOKBACK` processed closes of each symbol as `history` and the previously stored
+        indicators as `state`, and only the new days are computed, continuing from the stored values.
+
+        Results are added to `processed_data` under the 'indicators' data type, so they are
+        saved alongside the other processed data.
+
+        Parameters:
+        history (pd.DataFrame): Earlier processed daily prices with 'symbol', 'date' and 'close' columns.
+        state (pd.DataFrame): Earlier indicators with a 'symbol' column.
+
+        Returns:
+        pd.DataFrame: Long-format indicators of the new days.
+        """
+        prices = stack_processed(self.processed_data, 'daily')
+        if prices.empty:
+            self.indicators = pd.DataFrame(columns=['symbol', 'date'])
+            return self.indicators
+
+        prices = prices[['symbol', 'date', 'close']]
+        if history is not None and not history.empty:
+            history = history[history['symbol'].isin(prices['symbol'].unique())]
+            prices = pd.concat([history[['symbol', 'date', 'close']], prices.astype({'symbol': object})])
+            prices = prices.drop_duplicates(['symbol', 'date'], keep='last')
+
+        self.indicators = compute_indicators(prices, state)
+
+        for symbols, df in split_by_symbol(self.indicators).items():
+            self.processed_data[symbols]['indicators'] = df.drop(columns='close')
+
+        return self.indicators
+
+
+class RatioEngine:
+
+    PRICE_LOOKBACK = pd.Timedelta(days=10)  # Calendar days searched back for the close of a fiscal date
+
+    def __init__(self, processed_data):
+        self.processed_data = processed_data
+        self.ratios = None
+
+    def price_window(self):
+        """
+        Returns the stored prices `compute` needs for the processed statements.
+
+        Only the symbols with statements are needed, from `PRICE_LOOKBACK` before their earliest
+        fiscal date, so an incremental run reads a few days of history instead of all of it.
+
+        Returns:
+        tuple: (symbols, start) to pass to `DataStorage.load_processed`. `start` is None without statements.
+        """
+        aligned = align_statements(self.processed_data)
+        if aligned.empty:
+            return [], None
+        return list(aligned['symbol'].unique()), pd.Timestamp(aligned['date'].min()) - self.PRICE_LOOKBACK
+
+    @log_info
+    @handle_exceptions
+    def compute(self, prices=None):
+        """
+        Computes financial ratios for the processed statements of every symbol at once.
+
+        Income, balance and cash flow statements are aligned by symbol and fiscal date, joined with
+        the shares outstanding from 'info' and the last close on or before each fiscal date.
+        Results are added to `processed_data` under the 'ratios' data type.
+
+        Parameters:
+        prices (pd.DataFrame): Earlier processed daily prices with 'symbol', 'date' and 'close' columns,
+                               used together with the prices processed in this run. Prices within
+                               `price_window` are enough.
+
+        Returns:
+        pd.DataFrame: Long-format ratios, one row per (symbol, fiscal date).
+        """
+        daily = stack_processed(self.processed_data, 'daily')
+        if not daily.empty:
+            daily = daily[['symbol', 'date', 'close']].astype({'symbol': object})
+            prices = daily if prices is None or prices.empty else pd.concat([prices[['symbol', 'date', 'close']], daily])
+            prices = prices.drop_duplicates(['symbol', 'date'], keep='last')
+
+        self.ratios = compute_ratios(align_statements(self.processed_data),
+                                     stack_processed(self.processed_data, 'info'), prices)
+
+        for symbols, df in split_by_symbol(self.ratios).items():
+            self.processed_data[symbols]['ratios'] = df
+
+        return self.ratios
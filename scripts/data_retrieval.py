@@ -0,0 +1,163 @@
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+import pyarrow as pa
+from sqlalchemy import select, type_coerce, Float, Numeric
+from utils.logging.logger import log_info
+from utils.exceptions.exception_handling import handle_exceptions
+from scripts.data_saving import Company, DataStorage, TABLE_MAPPING
+
+
+class StockRepository:
+    """
+    Bulk read access to the stored prices, statements, indicators and ratios.
+
+    Results come back as one long-format DataFrame (or Arrow table) with a leading 'symbol'
+    column, like the processed data. PostgreSQL streams them with COPY ... TO STDOUT through a
+    pipe into Arrow's incremental CSV reader; other databases read them through a server-side
+    cursor in batches, so no ORM objects are built either way.
+
+    Results are kept in an LRU cache keyed by table, symbols and date range. The repository
+    listens to its DataStorage, and every database load evicts the cached results of the
+    tables it wrote to. Each eviction also bumps a per-table generation, and a query that was
+    running while its table's generation changed returns its rows without caching them.
+    """
+
+    def __init__(self, storage: DataStorage, cache_size: int = 32, batch_rows: int = 50_000):
+        self.storage = storage
+        self.cache_size = cache_size
+        self.batch_rows = batch_rows
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0  # Bumped when every table is invalidated
+        self.table_generations = {}
+        storage.load_listeners.append(self.invalidate)
+
+    @log_info
+    @handle_exceptions
+    def get(self, data_type: str, symbols: list, start=None, end=None, arrow: bool = False):
+        """
+        Returns the stored history of a data type for many symbols.
+
+        Parameters:
+        data_type (str): 'daily', 'income', 'balance', 'cash', 'indicators' or 'ratios'.
+        symbols (list): Ticker symbols to read.
+        start, end (date-like): Inclusive date bounds. None leaves the range open on that side.
+        arrow (bool): Return an Arrow table instead of a DataFrame.
+
+        Returns:
+        pd.DataFrame | pa.Table: Rows sorted by symbol and date, with a 'symbol' column first.
+        """
+        if data_type not in TABLE_MAPPING or data_type == "info":
+            raise ValueError(f"Unknown data type '{data_type}'.")
+
+        start = pd.Timestamp(start).date() if start is not None else None
+        end = pd.Timestamp(end).date() if end is not None else None
+        key = (TABLE_MAPPING[data_type].__tablename__, tuple(sorted(set(symbols))), start, end)
+
+        with self.lock:
+            table = self.cache.get(key)
+            if table is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                generation = self._generation(key[0])
+        if table is None:
+            query = self._query(data_type, key[1], start, end)
+            table = self._copy_to(query) if self.storage.engine.dialect.name == "postgresql" else self._stream(query)
+            with self.lock:
+                # A load invalidated the table while it was read, so the rows may already be stale
+                if self._generation(key[0]) == generation:
+                    self.cache[key] = table
+                    while len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+
+        return table if arrow else table.to_pandas()
+
+    def invalidate(self, tables=None):
+        """Evicts the cached results of the given table names, or every result when None."""
+        with self.lock:
+            if tables is None:
+                self.generation += 1
+            for name in tables or []:
+                self.table_generations[name] = self.table_generations.get(name, 0) + 1
+            for key in list(self.cache):
+                if tables is None or key[0] in tables:
+                    del self.cache[key]
+
+    def _generation(self, table_name: str) -> tuple:
+        """Returns the invalidation generation of a table. Call with the lock held."""
+        return self.generation, self.table_generations.get(table_name, 0)
+
+    def _query(self, data_type: str, symbols: tuple, start, end):
+        """Builds the SELECT of a table's rows for the symbols and date range, with decimals read as floats."""
+        table = TABLE_MAPPING[data_type].__table__
+        companies = Company.__table__
+        columns = [type_coerce(col, Float).label(col.name) if isinstance(col.type, Numeric) else col
+                   for col in table.columns if not col.primary_key and col.name != "company_id"]
+
+        query = (select(companies.c.ticker_symbol.label("symbol"), *columns)
+                 .join_from(table, companies, table.c.company_id == companies.c.company_id)
+                 .where(companies.c.ticker_symbol.in_(symbols)))
+        if start is not None:
+            query = query.where(table.c.date >= start)
+        if end is not None:
+            query = query.where(table.c.date <= end)
+        return query.order_by(companies.c.ticker_symbol, table.c.date)
+
+    def _copy_to(self, query) -> pa.Table:
+        """
+        Streams a query's rows out of PostgreSQL with COPY TO into Arrow's incremental CSV reader.
+
+        COPY writes into a pipe from a helper thread while Arrow parses blocks from the other end,
+        so only a pipe's worth of CSV text is held at a time rather than the whole result.
+        """
+        import pyarrow.csv as pa_csv  # Only PostgreSQL reads go through CSV
+
+        compiled = query.compile(dialect=self.storage.engine.dialect, compile_kwargs={"render_postcompile": True})
+        column_types = {"symbol": pa.string(), "date": pa.timestamp("ns")}
+        connection = self.storage.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            try:
+                statement = cursor.mogrify(str(compiled), compiled.params).decode()
+                read_fd, write_fd = os.pipe()
+                errors = []
+
+                def copy_out():
+                    try:
+                        with os.fdopen(write_fd, "wb") as sink:
+                            cursor.copy_expert(f"COPY ({statement}) TO STDOUT WITH (FORMAT csv, HEADER)", sink)
+                    except Exception as e:  # Includes the broken pipe left by a failed reader
+                        errors.append(e)
+
+                writer = threading.Thread(target=copy_out, daemon=True)
+                writer.start()
+                try:
+                    with os.fdopen(read_fd, "rb") as source:
+                        reader = pa_csv.open_csv(source, convert_options=pa_csv.ConvertOptions(column_types=column_types))
+                        table = reader.read_all()
+                finally:
+                    writer.join()
+                if errors:
+                    raise errors[0]  # COPY failed, so the rows read are incomplete
+                return table
+            finally:
+                cursor.close()
+        finally:
+            connection.close()
+
+    def _stream(self, query) -> pa.Table:
+        """Reads a query's rows through a server-side cursor in batches of `batch_rows`."""
+        with self.storage.engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, max_row_buffer=self.batch_rows).execute(query)
+            columns = list(result.keys())
+            frames = [pd.DataFrame(rows, columns=columns) for rows in result.partitions(self.batch_rows)]
+
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+        df["date"] = pd.to_datetime(df["date"])
+        return pa.Table.from_pandas(df, preserve_index=False)
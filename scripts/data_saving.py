@@ -1,10 +1,27 @@
+import hashlib
+import io
 import json
-from config.config import PROCESSED_DATA_DIR, RAW_DATA_DIR
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from config.config import PROCESSED_DATA_DIR, RAW_DATA_DIR, PANEL_DATA_DIR
 import os
-from utils.logging.logger import log_info
+from utils.logging.logger import log_info, configure_logger
 from utils.exceptions.exception_handling import handle_exceptions
-from config.config import DB_CONFIG
-from sqlalchemy import create_engine, Column, Integer, String, Date, DECIMAL, BigInteger, ForeignKey, UniqueConstraint
+from utils.cleaning.data_alignment import stack_processed
+from utils.analytics.price_panel import PricePanel
+from config.config import DB_CONFIG, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_LOAD_WORKERS
+from sqlalchemy import create_engine, func, inspect, literal, or_, select, text, union_all, table as sql_table, column as sql_column, MetaData, Table, \
+    Column, Integer, String, Date, DECIMAL, BigInteger, ForeignKey, UniqueConstraint, PrimaryKeyConstraint, Index
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 
@@ -12,6 +29,11 @@ from sqlalchemy.orm import sessionmaker, relationship
 # Define base for ORM models
 Base = declarative_base()
 
+LOAD_METHODS = ("orm", "copy", "staging")
+CONFLICT_MODES = ("error", "nothing", "update")
+CONFLICT_KEYS = ("company_id", "date")  # Every time-series table is unique on these
+LOAD_SEQUENCE = "load_sequence"  # Staging column numbering rows in the order they were copied
+
 DATABASE_URL = f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['dbname']}"
 
 class Company(Base):
@@ -26,11 +48,16 @@ class Company(Base):
     country = Column(String(255))
     sector = Column(String(255))
 
+    # A named unique index rather than a column constraint, so create_tables can add it to existing tables
+    __table_args__ = (Index("uq_companies_ticker_symbol", "ticker_symbol", unique=True),)
+
     # Relationships
     stocks = relationship("Stock", back_populates="company", cascade="all, delete-orphan")
     balance_sheets = relationship("BalanceSheet", back_populates="company", cascade="all, delete-orphan")
     income_statements = relationship("IncomeStatement", back_populates="company", cascade="all, delete-orphan")
     cash_flows = relationship("CashFlow", back_populates="company", cascade="all, delete-orphan")
+    indicators = relationship("StockIndicator", back_populates="company", cascade="all, delete-orphan")
+    ratios = relationship("FinancialRatio", back_populates="company", cascade="all, delete-orphan")
 
 
 class Stock(Base):
@@ -43,7 +70,13 @@ class Stock(Base):
     close = Column(DECIMAL(15,2))
     volume = Column(BigInteger)
 
-    __table_args__ = (UniqueConstraint("company_id", "date", name="uq_stock_date"),)
+    __table_args__ = (
+        UniqueConstraint("company_id", "date", name="uq_stock_date"),
+        # Date-range scans across all companies; BRIN stays tiny because rows arrive in date order
+        Index("ix_stocks_date_brin", "date", postgresql_using="brin"),
+        # Latest N days per company answered from the index alone
+        Index("ix_stocks_company_date_prices", "company_id", "date", postgresql_include=["open", "close", "volume"]),
+    )
 
     company = relationship("Company", back_populates="stocks")
 
@@ -109,16 +142,178 @@ class CashFlow(Base):
     company = relationship("Company", back_populates="cash_flows")
 
 
+class StockIndicator(Base):
+    __tablename__ = "stock_indicators"
+
+    indicator_id = Column(Integer, primary_key=True, autoincrement=True)
+    company_id = Column(Integer, ForeignKey("companies.company_id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, nullable=False)
+    daily_return = Column(DECIMAL(20,6))
+    log_return = Column(DECIMAL(20,6))
+    sma_20 = Column(DECIMAL(20,6))
+    sma_50 = Column(DECIMAL(20,6))
+    sma_200 = Column(DECIMAL(20,6))
+    volatility_20 = Column(DECIMAL(20,6))
+    ema_12 = Column(DECIMAL(20,6))
+    ema_26 = Column(DECIMAL(20,6))
+    running_max = Column(DECIMAL(20,6))
+    drawdown = Column(DECIMAL(20,6))
+    rsi_avg_gain = Column(DECIMAL(20,6))
+    rsi_avg_loss = Column(DECIMAL(20,6))
+    rsi_14 = Column(DECIMAL(20,6))
+
+    __table_args__ = (
+        UniqueConstraint("company_id", "date", name="uq_stock_indicator_date"),
+        Index("ix_stock_indicators_date_brin", "date", postgresql_using="brin"),
+    )
+
+    company = relationship("Company", back_populates="indicators")
+
+
+class FinancialRatio(Base):
+    __tablename__ = "financial_ratios"
+
+    ratio_id = Column(Integer, primary_key=True, autoincrement=True)
+    company_id = Column(Integer, ForeignKey("companies.company_id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, nullable=False)
+    close = Column(DECIMAL(15,2))
+    market_cap = Column(DECIMAL(25,2))
+    roe = Column(DECIMAL(20,6))
+    roa = Column(DECIMAL(20,6))
+    debt_to_equity = Column(DECIMAL(20,6))
+    current_ratio = Column(DECIMAL(20,6))
+    fcf_yield = Column(DECIMAL(20,6))
+    earnings_per_share = Column(DECIMAL(20,6))
+    book_value_per_share = Column(DECIMAL(20,6))
+    free_cashflow_per_share = Column(DECIMAL(20,6))
+    revenue_per_share = Column(DECIMAL(20,6))
+
+    __table_args__ = (UniqueConstraint("company_id", "date", name="uq_financial_ratio_date"),)
+
+    company = relationship("Company", back_populates="ratios")
+
+
+
+# Unique indexes the loaders' ON CONFLICT clauses rely on; created by create_tables and never dropped
+KEY_INDEXES = [index for table in Base.metadata.sorted_tables for index in table.indexes if index.unique]
+# Indexes declared on the models beyond their keys, managed by create_tables and rebuilt around bulk loads
+PERFORMANCE_INDEXES = [index for table in Base.metadata.sorted_tables
+                       for index in sorted(table.indexes, key=lambda index: index.name) if not index.unique]
+
+def partitioned_stocks_table() -> Table:
+    """
+    Returns a copy of the stocks table that PostgreSQL range-partitions by date.
+
+    A partitioned table's primary key must include the partition key, so the copy's primary key
+    is (stock_id, date); stock_id stays unique through its sequence. Partitions are created per
+    year by `DataStorage.create_stock_partitions`.
+    """
+    metadata = MetaData()
+    Company.__table__.to_metadata(metadata)  # Resolves the company_id foreign key
+    table = Stock.__table__.to_metadata(metadata)
+    table.c.date.primary_key = True
+    table.append_constraint(PrimaryKeyConstraint("stock_id", "date"))
+    table.dialect_options["postgresql"]["partition_by"] = "RANGE (date)"
+    return table
+
+
+TABLE_MAPPING = {
+    "daily": Stock,
+    "income": IncomeStatement,
+    "balance": BalanceSheet,
+    "cash": CashFlow,
+    "indicators": StockIndicator,
+    "ratios": FinancialRatio,
+    "info": Company
+}
+
+
+class LoadCheckpoint:
+    """
+    Records how many rows of each (symbol, table) batch a chunked load has committed.
+
+    The checkpoint is a JSON file rewritten atomically after every commit, so an interrupted
+    load can resume after its last committed chunk. Each entry is keyed on the batch's content
+    (see `fingerprint`), so a batch that differs from the one checkpointed starts over.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.batches = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.batches = json.load(f)
+
+    @staticmethod
+    def fingerprint(values) -> dict:
+        """
+        Identifies a processed DataFrame or Arrow table by its row count, first and last date
+        and a hash of its dates, its key within a (symbol, table) batch.
+        """
+        rows = values.num_rows if isinstance(values, pa.Table) else len(values)
+        names = values.column_names if isinstance(values, pa.Table) else values.columns
+        if "date" not in names or rows == 0:
+            return {"rows": rows}
+
+        dates = values["date"].to_numpy() if isinstance(values, pa.Table) else pd.to_datetime(values["date"]).to_numpy()
+        dates = dates.astype("datetime64[ns]")
+        return {
+            "rows": rows,
+            "first_date": str(dates[0].astype("datetime64[D]")),
+            "last_date": str(dates[-1].astype("datetime64[D]")),
+            "date_hash": hashlib.sha256(dates.view("int64").tobytes()).hexdigest()
+        }
+
+    def committed(self, symbol: str, table: str, fingerprint: dict) -> int:
+        """Returns the number of rows already committed for the batch with this fingerprint."""
+        entry = self.batches.get(f"{symbol}/{table}")
+        return entry["committed"] if entry and entry["fingerprint"] == fingerprint else 0
+
+    def update(self, symbol: str, table: str, fingerprint: dict, committed: int):
+        """Records the committed rows of a batch and rewrites the checkpoint file."""
+        with self.lock:
+            self.batches[f"{symbol}/{table}"] = {"fingerprint": fingerprint, "committed": committed}
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(self.batches, f)
+            os.replace(temp_path, self.path)
+
+    def clear(self):
+        """Removes the checkpoint once a load has completed."""
+        self.batches = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
 
 class DataStorage:
     PROCESSED_DATA_DIR = PROCESSED_DATA_DIR
     RAW_DATA_DIR = RAW_DATA_DIR 
+    PANEL_DATA_DIR = PANEL_DATA_DIR
 
-    def __init__(self):
+    def __init__(self, database_url: str = None, data_dir: str = None):
+        """
+        Parameters:
+        database_url (str): Database to load into. Defaults to the configured PostgreSQL database.
+        data_dir (str): Directory holding the raw and processed data instead of the configured ones.
+        """
+        if data_dir:
+            self.RAW_DATA_DIR = os.path.join(data_dir, "raw_data")
+            self.PROCESSED_DATA_DIR = os.path.join(data_dir, "processed_data")
         os.makedirs(self.RAW_DATA_DIR, exist_ok=True)
         os.makedirs(self.PROCESSED_DATA_DIR, exist_ok=True)
-        self.engine = create_engine(DATABASE_URL)
+
+        database_url = database_url or DATABASE_URL
+        # Keep a pooled connection per load worker, and check connections before handing them out
+        pool_options = {} if database_url.startswith("sqlite") else \
+            {"pool_size": max(DB_POOL_SIZE, DB_LOAD_WORKERS), "max_overflow": DB_MAX_OVERFLOW}
+        self.engine = create_engine(database_url, pool_pre_ping=True, **pool_options)
         self.Session = sessionmaker(bind=self.engine)
+        self.company_ids = {}  # Ticker to company_id, kept across loads by this instance
+        self.chunk_report = []  # Timing of every chunk of the last chunked load
+        self.failed_batches = []  # (symbol, table) batches the last parallel or chunked load did not finish
+        self.delta_report = {}  # Rows offered and rows newer than the database, per table, of the last delta load
+        self.load_listeners = []  # Called with the names of the tables each database load wrote to
 
     @log_info
     @handle_exceptions
@@ -130,74 +325,234 @@ class DataStorage:
                 self._save_json(file_path, values)
     @log_info
     @handle_exceptions
-    def save_processed_data(self, data: dict):
-        """Saves processed data to CSV files."""
+    def save_processed_data(self, data: dict, append: bool = False):
+        """
+        Saves processed data to CSV files, or to Parquet files for Arrow tables (Arrow-native runs).
+
+        With append=True rows are appended to existing files, which is how incremental
+        (watermarked) transforms add their delta to the processed store.
+        """
         for symbols, symbol_data in data.items():
             for keys, values in symbol_data.items():
+                if isinstance(values, pa.Table):
+                    file_path = os.path.join(self.PROCESSED_DATA_DIR, f"{symbols}_{keys}.parquet")
+                    self._save_parquet(file_path, values, append=append and keys != "info")
+                    continue
                 file_path = os.path.join(self.PROCESSED_DATA_DIR, f"{symbols}_{keys}.csv")
                 os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                values.to_csv(file_path, index=False)
+                if append and keys != "info" and os.path.exists(file_path):
+                    values.to_csv(file_path, mode="a", header=False, index=False)
+                else:
+                    values.to_csv(file_path, index=False)
+
+    @log_info
+    @handle_exceptions
+    def load_watermarks(self, symbols: list = None) -> dict:
+        """
+        Returns the last processed date of every (symbol, data_type) in the processed store.
+
+        Parameters:
+        symbols (list): Symbols to look up. Defaults to every symbol with processed files.
+
+        Returns:
+        dict: Watermarks keyed by symbol, then by data type, as 'YYYY-MM-DD' strings.
+        """
+        watermarks = defaultdict(dict)
+        for symbols_name, keys, file_path in self._processed_files():
+            if keys == "info" or (symbols and symbols_name not in symbols):
+                continue
+            dates = self._read_processed(file_path, columns=["date"])["date"]
+            if not dates.empty:
+                watermarks[symbols_name][keys] = str(dates.max())[:10]
+        return dict(watermarks)
+
+    @log_info
+    @handle_exceptions
+    def update_price_panel(self, data: dict):
+        """
+        Adds the processed daily prices of every symbol to the memory-mapped price panel.
+
+        The panel aligns 'close' and 'volume' of all symbols on a shared trading-day calendar
+        (see `PricePanel`), so cross-sectional work can run without querying the database.
+        """
+        prices = stack_processed(data, "daily")
+        if not prices.empty:
+            PricePanel(self.PANEL_DATA_DIR).update(prices)
+
+    @log_info
+    @handle_exceptions
+    def load_processed(self, data_type: str, symbols: list = None, tail: int = None,
+                       start=None, columns: list = None) -> pd.DataFrame:
+        """
+        Reads one data type of the processed store into a long-format DataFrame.
+
+        Parameters:
+        data_type (str): The type of data to read ('daily', 'indicators', ...).
+        symbols (list): Symbols to read. Defaults to every symbol with a processed file.
+        tail (int): Keep only the last `tail` rows of each symbol.
+        start (pd.Timestamp): Keep only rows dated on or after `start`. Parquet files are filtered while reading.
+        columns (list): Columns to read besides 'date'. Defaults to every column.
+
+        Returns:
+        pd.DataFrame: Frame with a leading 'symbol' column. Empty if nothing is stored.
+        """
+        frames = {}
+        for symbols_name, keys, file_path in self._processed_files():
+            if keys != data_type or (symbols is not None and symbols_name not in symbols):
+                continue
+            df = self._read_processed(file_path, columns=["date", *columns] if columns else None, start=start)
+            frames[symbols_name] = df.sort_values("date").tail(tail) if tail else df
+        if not frames:
+            return pd.DataFrame(columns=["symbol", "date"])
+        return pd.concat(frames, names=["symbol", None]).reset_index(level="symbol").reset_index(drop=True)
 
 
 
     @log_info
     @handle_exceptions
-    def create_tables(self):
-        """Create tables in the database."""
+    def create_tables(self, partition_stocks=False):
+        """
+        Create tables in the database, and any key or performance index missing from tables that already exist.
+
+        Parameters:
+        partition_stocks (bool): Create `stocks` range-partitioned by date (see `partitioned_stocks_table`).
+                                 Only applies on PostgreSQL when `stocks` does not exist yet; an
+                                 existing table is left as it is.
+        """
+        if partition_stocks and self.engine.dialect.name != "postgresql":
+            print(f"Partitioning is not supported by {self.engine.dialect.name}, creating stocks unpartitioned.")
+        elif partition_stocks and inspect(self.engine).has_table(Stock.__tablename__):
+            print("stocks already exists and is left as it is; partitioning only applies to a new table.")
+        elif partition_stocks:
+            Base.metadata.create_all(self.engine, tables=[table for table in Base.metadata.sorted_tables if table is not Stock.__table__])
+            partitioned_stocks_table().create(bind=self.engine)
+
         Base.metadata.create_all(self.engine)
+        self.create_indexes()
+
+    @log_info
+    @handle_exceptions
+    def create_stock_partitions(self, years):
+        """
+        Create the yearly partitions of a partitioned stocks table that do not exist yet.
+
+        Parameters:
+        years (iterable): Calendar years that need a partition.
+        """
+        with self.engine.begin() as connection:
+            for statement in self._partition_statements(years):
+                connection.execute(text(statement))
 
     @log_info
     @handle_exceptions
-    def save_to_database(self, data_dict):
-        """Load processed stock data from dictionary into the PostgreSQL database."""
+    def create_indexes(self):
+        """Create the declared key and performance indexes that do not exist yet."""
+        for index in KEY_INDEXES + PERFORMANCE_INDEXES:
+            index.create(bind=self.engine, checkfirst=True)
+
+    @log_info
+    @handle_exceptions
+    def drop_indexes(self):
+        """Drop the declared performance indexes, e.g. before a bulk load that would otherwise maintain them row by row."""
+        for index in PERFORMANCE_INDEXES:
+            index.drop(bind=self.engine, checkfirst=True)
+
+    @log_info
+    @handle_exceptions
+    def save_to_database(self, data_dict, method="orm", on_conflict="error", workers=1,
+                         chunk_rows=None, chunks_per_commit=1, resume=False, rebuild_indexes=False, delta_only=False):
+        """
+        Load processed stock data from dictionary into the PostgreSQL database.
+
+        By default every symbol loads in one transaction: if any of its tables fails, none of its
+        rows are kept. Parallel (`workers` > 1) and chunked (`chunk_rows`) loads commit each
+        (symbol, table) batch, and each group of chunks, on its own session instead, so a failed
+        batch can leave the symbol's other tables and its earlier chunks committed. Those loads
+        carry on with the remaining batches and list the unfinished ones in `failed_batches`.
+
+        Parameters:
+        data_dict (dict): Processed data keyed by symbol, then by data type.
+        method (str): 'orm' inserts through `bulk_insert_mappings`; 'copy' streams each frame into
+                      its table with PostgreSQL COPY (see `_copy_into`). Either way every symbol is
+                      committed on its own and rolled back on error. 'staging' copies every symbol
+                      into a temporary staging table and merges it into the live table with one
+                      statement per table, committed per table (see `_load_through_staging`).
+                      'copy' and 'staging' fall back to 'orm' on other databases.
+        on_conflict (str): What to do with rows whose (company_id, date) is already loaded.
+                           'error' plain-inserts, so the symbol is rolled back; 'nothing' skips them;
+                           'update' overwrites the columns whose values changed. The last two run
+                           one INSERT ... ON CONFLICT statement per table (see `_upsert_statement`).
+                           COPY cannot resolve conflicts, so 'copy' then merges through staging.
+        workers (int): Number of connections to load on. Above 1, every (symbol, table) batch
+                       (every table with 'staging') loads and commits on its own connection, after
+                       the companies they reference have been committed.
+        chunk_rows (int): Load every (symbol, table) batch in slices of this many rows, so only one
+                          slice is converted and sent at a time. Each chunk's timing is logged and
+                          kept in `chunk_report`. None loads whole frames.
+        chunks_per_commit (int): Chunks per transaction when chunking; every batch commits on its
+                                 own session, and progress is checkpointed after each commit.
+                                 Rerunning with `resume` completes the batches in `failed_batches`.
+        resume (bool): Skip the chunks a previous interrupted chunked load already committed.
+        rebuild_indexes (bool): Drop the performance indexes before loading and rebuild them once
+                                afterwards, which is faster for large backfills. Queries go without
+                                them while the load runs.
+        delta_only (bool): Only load rows dated after the latest date already stored for their
+                           company and table, fetched for all of them in one query. The rows kept
+                           per table are reported and stored in `delta_report`.
+        """
+        if method not in LOAD_METHODS:
+            raise ValueError(f"Unknown load method '{method}'. Expected one of {LOAD_METHODS}")
+        if on_conflict not in CONFLICT_MODES:
+            raise ValueError(f"Unknown conflict mode '{on_conflict}'. Expected one of {CONFLICT_MODES}")
+        if method in ("copy", "staging") and self.engine.dialect.name != "postgresql":
+            print(f"COPY is not supported by {self.engine.dialect.name}, loading through the ORM instead.")
+            method = "orm"
+        if method == "copy" and on_conflict != "error":
+            print("COPY cannot resolve conflicts, merging through staging tables instead.")
+            method = "staging"
+
+        if rebuild_indexes:
+            self.drop_indexes()
         session = self.Session()
+        loaded_tables = set()
+        self.failed_batches = []
 
-        TABLE_MAPPING = {
-        "daily": Stock,
-        "income": IncomeStatement,
-        "balance": BalanceSheet,
-        "cash": CashFlow,
-        "info": Company
-        }
-        
         try:
-            for symbol, data in data_dict.items():
-                print(f"Processing data for: {symbol}")
+            # Resolve every company_id up front, committed before any symbol's data loads
+            company_ids = self.resolve_company_ids(data_dict, update=on_conflict == "update")
 
-                # Process Company Info first to get company_id
-                if "info" in data:
-                    company_df = data["info"]
-                    company_data = company_df.to_dict(orient="records")[0]  # Convert first row to dict
+            batches = self._batches(data_dict, company_ids)
+            if delta_only:
+                batches = self._delta_batches(batches)
+            loaded_tables = {table.__tablename__ for _, table, _, _ in batches}
+            if self._stocks_partitioned():
+                self.create_stock_partitions(self._stock_years(batches))
 
-                    # Insert company and get company_id 
-                    existing_company = session.query(Company).filter_by(ticker_symbol=symbol).first()
-                    if existing_company:
-                        company_id = existing_company.company_id
-                    else:
-                        new_company = Company(**company_data)
-                        session.add(new_company)
-                        session.flush()  # Get company_id before commit
-                        company_id = new_company.company_id
-
-                # Insert other data types using bulk inserts
-                for key, df in data.items():
-                    if key == "info":
-                        continue 
-
-                    table = TABLE_MAPPING.get(key)
-                    if table is None:
-                        print(f"Skipping unrecognized key: {key}")
-                        continue
-
-                    # Add company_id to the DataFrame
-                    df["company_id"] = company_id
-                    
-                    # Convert DataFrame to list of dictionaries
-                    records = df.to_dict(orient="records")
-
-                    # Perform bulk insert
-                    session.bulk_insert_mappings(table, records)
-                    session.flush()
+            if method == "staging":
+                self._load_through_staging(batches, on_conflict, workers, chunk_rows)
+                return
+
+            if workers > 1 or chunk_rows:
+                checkpoint = self._load_checkpoint(resume) if chunk_rows else None
+                self.chunk_report = []
+                load = lambda batch: self._load_batch(*batch, method, on_conflict, chunk_rows, chunks_per_commit, checkpoint)
+                if workers > 1:
+                    with ThreadPoolExecutor(max_workers=workers) as executor:
+                        loaded = list(executor.map(load, batches))
+                else:
+                    loaded = [load(batch) for batch in batches]
+
+                if checkpoint is not None and all(loaded):
+                    checkpoint.clear()
+                if self.failed_batches:
+                    print(f"Load incomplete, {len(self.failed_batches)} of {len(batches)} batches failed: "
+                          f"{[(batch['symbol'], batch['table']) for batch in self.failed_batches]}")
+                return
+
+            for symbol, symbol_batches in groupby(batches, key=lambda batch: batch[0]):
+                print(f"Processing data for: {symbol}")
+                for _, table, values, company_id in symbol_batches:
+                    self._load_table(session, table, values, company_id, method, on_conflict)
 
                 session.commit()
                 print(f"{symbol} data successfully loaded into database.")
@@ -207,7 +562,474 @@ class DataStorage:
             print(f"Error loading data: {e}")
         finally:
             session.close()
+            if rebuild_indexes:
+                self.create_indexes()
+            # Listeners such as StockRepository caches hear about partial loads as well
+            for listener in self.load_listeners:
+                listener(loaded_tables)
+
+
+    @log_info
+    @handle_exceptions
+    def resolve_company_ids(self, data_dict: dict, update: bool = False) -> dict:
+        """
+        Upserts the companies of every symbol with one statement and returns their ids.
+
+        Ids are cached in `company_ids`, so symbols resolved by an earlier load cost no query.
+        Symbols without 'info' are looked up among the stored companies.
+
+        Parameters:
+        data_dict (dict): Processed data keyed by symbol, then by data type.
+        update (bool): Overwrite the stored info of existing companies instead of keeping it.
+
+        Returns:
+        dict: Ticker symbol to company_id, for the symbols that have a company.
+        """
+        infos = {symbol: data["info"] for symbol, data in data_dict.items()
+                 if "info" in data and (update or symbol not in self.company_ids)}
+        unresolved = [symbol for symbol in data_dict if symbol not in self.company_ids or symbol in infos]
+
+        if unresolved:
+            session = self.Session()
+            try:
+                if infos:
+                    # The dictionary key is the ticker every table is looked up by
+                    records = [dict(self._records(info, table=Company)[0], ticker_symbol=symbol) for symbol, info in infos.items()]
+                    columns = list(dict.fromkeys(col for record in records for col in record))
+                    records = [{col: record.get(col) for col in columns} for record in records]
+                    statement = self._insert_statement(Company)
+                    if update:
+                        statement = statement.on_conflict_do_update(
+                            index_elements=["ticker_symbol"],
+                            set_={col: statement.excluded[col] for col in columns if col != "ticker_symbol"}
+                        )
+                    else:
+                        statement = statement.on_conflict_do_nothing(index_elements=["ticker_symbol"])
+                    session.execute(statement, records)
+
+                rows = session.query(Company.ticker_symbol, Company.company_id).filter(Company.ticker_symbol.in_(unresolved))
+                self.company_ids.update(dict(rows.all()))
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+
+        return {symbol: self.company_ids[symbol] for symbol in data_dict if symbol in self.company_ids}
+
+    @log_info
+    @handle_exceptions
+    def load_database_watermarks(self, company_ids: list, tables: list = None) -> dict:
+        """
+        Returns the latest stored date per company and table, with a single UNION ALL query.
+
+        Parameters:
+        company_ids (list): Companies to look up.
+        tables (list): ORM models to look in. Defaults to every time-series table.
+
+        Returns:
+        dict: (table name, company_id) to the latest date. Pairs without rows are omitted.
+        """
+        tables = tables or [table for table in TABLE_MAPPING.values() if table is not Company]
+        if not company_ids or not tables:
+            return {}
+
+        query = union_all(*[
+            select(literal(table.__tablename__).label("table_name"), table.company_id, func.max(table.date).label("max_date"))
+            .where(table.company_id.in_(list(company_ids)))
+            .group_by(table.company_id)
+            for table in tables
+        ])
+        with self.engine.connect() as connection:
+            rows = connection.execute(query).all()
+        return {(name, company_id): max_date for name, company_id, max_date in rows if max_date is not None}
+
+    def _delta_batches(self, batches: list) -> list:
+        """Drops the rows of every batch that are not newer than the database watermark, and reports the delta sizes."""
+        tables = list(dict.fromkeys(table for _, table, _, _ in batches))
+        watermarks = self.load_database_watermarks({company_id for _, _, _, company_id in batches}, tables)
+
+        self.delta_report = {table.__tablename__: {"rows": 0, "delta": 0} for table in tables}
+        delta = []
+        for symbol, table, values, company_id in batches:
+            watermark = watermarks.get((table.__tablename__, company_id))
+            rows = self._rows(values)
+            if watermark is not None:
+                values = self._after(values, watermark)
+            self.delta_report[table.__tablename__]["rows"] += rows
+            self.delta_report[table.__tablename__]["delta"] += self._rows(values)
+            if self._rows(values):
+                delta.append((symbol, table, values, company_id))
+
+        logger = configure_logger(__name__)
+        for name, sizes in self.delta_report.items():
+            print(f"{name}: {sizes['delta']} of {sizes['rows']} rows are newer than the database.")
+            info_data = {"table": name, **sizes, "info_message": f"{name} delta is {sizes['delta']} of {sizes['rows']} rows"}
+            logger.info(json.dumps(info_data, indent=4), extra={"custom_funcName": "save_to_database"})
+        return delta
+
+    def _after(self, values, watermark):
+        """Returns the rows of a processed DataFrame or Arrow table dated after the watermark."""
+        watermark = pd.Timestamp(watermark)
+        if isinstance(values, pa.Table):
+            dates = values["date"]
+            return values.filter(pc.greater(dates, pa.scalar(watermark.to_pydatetime(), type=dates.type)))
+        return values[values["date"] > watermark]
+
+    def _stocks_partitioned(self) -> bool:
+        """Returns whether the stocks table is a PostgreSQL partitioned table."""
+        if self.engine.dialect.name != "postgresql":
+            return False
+        with self.engine.connect() as connection:
+            return connection.execute(text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name))"
+            ), {"name": Stock.__tablename__}).scalar()
+
+    def _partition_statements(self, years) -> list:
+        """Returns the CREATE TABLE ... PARTITION OF statements for the given years' stock partitions."""
+        return [f"CREATE TABLE IF NOT EXISTS {Stock.__tablename__}_{year} PARTITION OF {Stock.__tablename__} "
+                f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')" for year in sorted(set(years))]
+
+    def _stock_years(self, batches: list) -> list:
+        """Returns the calendar years of the stock prices in the batches."""
+        years = set()
+        for _, table, values, _ in batches:
+            if table is not Stock:
+                continue
+            if isinstance(values, pa.Table):
+                years.update(pc.unique(pc.year(values["date"])).to_pylist())
+            else:
+                years.update(values["date"].dt.year.unique().tolist())
+        return sorted(year for year in years if year is not None)
+
+    def _batches(self, data_dict: dict, company_ids: dict) -> list:
+        """
+        Lists the (symbol, table, values, company_id) batches to load, in symbol order.
+
+        Symbols without a company and data types without a table are skipped with a message.
+        """
+        batches = []
+        for symbol, data in data_dict.items():
+            if symbol not in company_ids:
+                print(f"Skipping {symbol}: no company info was provided or stored.")
+                continue
+            for key, values in data.items():
+                if key == "info":
+                    continue
+                if key not in TABLE_MAPPING:
+                    print(f"Skipping unrecognized key: {key}")
+                    continue
+                batches.append((symbol, TABLE_MAPPING[key], values, company_ids[symbol]))
+        return batches
+
+    def _load_table(self, session, table, values, company_id, method: str, on_conflict: str):
+        """Loads one processed DataFrame or Arrow table into its table on the session, without committing."""
+        if method == "copy":
+            self._copy_into(session, table, values, company_id)
+            return
+
+        # Convert DataFrame or Arrow table to list of dictionaries tagged with company_id
+        records = self._records(values, company_id, table)
+        if not records:
+            return
+
+        if on_conflict != "error":
+            session.execute(self._upsert_statement(table, list(records[0]), on_conflict), records)
+            return
+
+        # Perform bulk insert
+        session.bulk_insert_mappings(table, records)
+        session.flush()
+
+    def _load_batch(self, symbol: str, table, values, company_id, method: str, on_conflict: str,
+                    chunk_rows: int = None, chunks_per_commit: int = 1, checkpoint: LoadCheckpoint = None) -> bool:
+        """
+        Loads and commits one (symbol, table) batch on its own session, as parallel and chunked loads do.
+
+        With `chunk_rows`, the batch is loaded one slice at a time and committed every
+        `chunks_per_commit` slices, starting after the rows the checkpoint has recorded.
+        A failed batch is rolled back to its last commit and recorded in `failed_batches`.
+
+        Returns:
+        bool: Whether the whole batch was loaded.
+        """
+        rows = self._rows(values)
+        chunk_rows = chunk_rows or max(rows, 1)
+        name = table.__tablename__
+        fingerprint = LoadCheckpoint.fingerprint(values) if checkpoint else None
+        committed = checkpoint.committed(symbol, name, fingerprint) if checkpoint else 0
+
+        session = self.Session()
+        try:
+            for number, start in enumerate(range(committed, rows, chunk_rows), start=1):
+                stop = min(start + chunk_rows, rows)
+                started = time.perf_counter()
+                chunk = self._slice(values, start, stop)
+                self._load_table(session, table, chunk, company_id, method, on_conflict)
+
+                if number % chunks_per_commit == 0 or stop == rows:
+                    session.commit()
+                    committed = stop
+                    if checkpoint:
+                        checkpoint.update(symbol, name, fingerprint, committed)
+                if checkpoint:
+                    self._log_chunk(symbol, name, start, stop, time.perf_counter() - started, committed)
+
+            print(f"{symbol} {name} successfully loaded into database.")
+            return True
+        except Exception as e:
+            session.rollback()
+            print(f"Error loading {name} for {symbol} after {committed} committed rows: {e}")
+            self.failed_batches.append({"symbol": symbol, "table": name, "rows": rows, "committed": committed, "error": str(e)})
+            return False
+        finally:
+            session.close()
+
+    def _rows(self, values) -> int:
+        """Returns the row count of a processed DataFrame or Arrow table."""
+        return values.num_rows if isinstance(values, pa.Table) else len(values)
+
+    def _slice(self, values, start: int, stop: int):
+        """Returns rows [start, stop) of a processed DataFrame or Arrow table without copying them."""
+        return values.slice(start, stop - start) if isinstance(values, pa.Table) else values.iloc[start:stop]
+
+    def _load_checkpoint(self, resume: bool) -> LoadCheckpoint:
+        """Opens the chunked-load checkpoint next to the processed data, discarding it unless resuming."""
+        checkpoint = LoadCheckpoint(os.path.join(self.PROCESSED_DATA_DIR, "load_checkpoint.json"))
+        if not resume:
+            checkpoint.clear()
+        return checkpoint
+
+    def _log_chunk(self, symbol: str, table: str, start: int, stop: int, seconds: float, committed: int):
+        """Records and logs the timing of one loaded chunk."""
+        entry = {"symbol": symbol, "table": table, "start": start, "rows": stop - start,
+                 "seconds": round(seconds, 6), "committed": committed}
+        self.chunk_report.append(entry)
+
+        logger = configure_logger(__name__)
+        info_data = {
+            **entry,
+            "info_message": f"Loaded rows {start}-{stop} of {symbol} {table} in {seconds:.3f}s ({committed} committed)"
+        }
+        logger.info(json.dumps(info_data, indent=4), extra={"custom_funcName": "save_to_database"})
+
+    def _load_through_staging(self, batches: list, on_conflict: str, workers: int = 1, chunk_rows: int = None):
+        """
+        Loads every table through a temporary staging table and a single set-based merge.
+
+        For each table, all symbols are copied into a staging table without indexes or
+        constraints, then one INSERT ... SELECT moves them into the live table, all in one
+        transaction. The staging table is private to the session and dropped on commit, so
+        concurrent loads never share it. Index maintenance and constraint checks run once
+        per table instead of per row, and the live table is only locked for the merge.
+
+        Parameters:
+        batches (list): (symbol, table, values, company_id) batches from `_batches`.
+        on_conflict (str): Conflict mode for the merge (see `save_to_database`).
+        workers (int): Number of tables to merge concurrently, each on its own connection.
+        chunk_rows (int): Copy frames into staging in slices of this many rows to bound the CSV buffers.
+        """
+        frames = defaultdict(list)
+        for _, table, values, company_id in batches:
+            frames[table].append((values, company_id))
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda item: self._merge_table(*item, on_conflict, chunk_rows), frames.items()))
+            return
+
+        for table, table_frames in frames.items():
+            self._merge_table(table, table_frames, on_conflict, chunk_rows)
+
+    def _merge_table(self, table, frames: list, on_conflict: str, chunk_rows: int = None):
+        """Copies the (values, company_id) frames of one table into staging and merges them in one transaction."""
+        staging = f"staging_{table.__tablename__}"
+        columns = [col.name for col in table.__table__.columns if not col.primary_key]
+        session = self.Session()
+        try:
+            session.execute(text(f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+                                 f"SELECT {', '.join(columns)} FROM {table.__tablename__} WITH NO DATA"))
+            session.execute(text(f"ALTER TABLE {staging} ADD COLUMN {LOAD_SEQUENCE} BIGINT GENERATED ALWAYS AS IDENTITY"))
+            loaded = set()
+            for values, company_id in frames:
+                rows = self._rows(values)
+                for start in range(0, rows, chunk_rows or max(rows, 1)):
+                    chunk = self._slice(values, start, start + (chunk_rows or rows))
+                    loaded.update(self._copy_into(session, table, chunk, company_id, target=staging))
+
+            session.execute(self._merge_statement(table, staging, [col for col in columns if col in loaded], on_conflict))
+            session.commit()
+            print(f"{table.__tablename__}: merged {len(frames)} symbols through {staging}.")
+        except Exception as e:
+            session.rollback()
+            print(f"Error merging {table.__tablename__}: {e}")
+        finally:
+            session.close()
+
+    def _merge_statement(self, table, staging: str, columns: list, on_conflict: str):
+        """
+        Builds the INSERT ... SELECT that merges a staging table into its live table.
+
+        With a conflict mode, duplicate (company_id, date) rows in the staging table are reduced
+        to one with DISTINCT ON, since a single statement cannot update the same row twice. The
+        row copied last wins, as it would with one upsert per row.
+
+        Parameters:
+        table: ORM model of the live table.
+        staging (str): Name of the staging table.
+        columns (list): The columns that were loaded into the staging table.
+        on_conflict (str): 'error', 'nothing' or 'update'.
+
+        Returns:
+        Insert: PostgreSQL INSERT statement.
+        """
+        source = sql_table(staging, *[sql_column(col) for col in [*columns, LOAD_SEQUENCE]])
+        rows = select(*[source.c[col] for col in columns])
+        if on_conflict != "error":
+            keys = [source.c[col] for col in CONFLICT_KEYS]
+            rows = rows.distinct(*keys).order_by(*keys, source.c[LOAD_SEQUENCE].desc())
 
+        statement = postgresql.insert(table.__table__).from_select(columns, rows)
+        return self._on_conflict(statement, table, columns, on_conflict)
+
+    def _copy_into(self, session, table, values, company_id, target: str = None) -> list:
+        """
+        Streams a processed DataFrame or Arrow table into a table with PostgreSQL COPY.
+
+        COPY runs on the session's own connection, so the rows commit or roll back together
+        with the rest of the symbol's data. `target` names another table with the same columns,
+        such as a staging table, to copy into instead. Returns the copied column names.
+        """
+        buffer, columns = self._copy_buffer(table, values, company_id)
+        cursor = session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {target or table.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+        return columns
+
+    def _copy_buffer(self, table, values, company_id) -> tuple:
+        """
+        Renders a processed DataFrame or Arrow table as headerless CSV for COPY.
+
+        Like `bulk_insert_mappings`, columns the table does not define are skipped. Dates are
+        written as 'YYYY-MM-DD', nulls as empty fields and integer columns without a decimal point.
+
+        Returns:
+        tuple: (file-like CSV buffer, list of the column names in buffer order).
+        """
+        table_columns = table.__table__.columns
+        if isinstance(values, pa.Table):
+            arrays = {}
+            for name in values.column_names:
+                if name not in table_columns:
+                    continue
+                column = values[name]
+                if pa.types.is_timestamp(column.type):
+                    column = pc.cast(column, pa.date32())
+                elif isinstance(table_columns[name].type, Integer) and pa.types.is_floating(column.type):
+                    column = pc.cast(column, pa.int64())
+                arrays[name] = column
+            arrays["company_id"] = pa.array(np.full(values.num_rows, company_id))
+            buffer = io.BytesIO()
+            pa_csv.write_csv(pa.table(arrays), buffer, pa_csv.WriteOptions(include_header=False))
+            buffer.seek(0)
+            return buffer, list(arrays)
+
+        df = values[[col for col in values.columns if col in table_columns]].assign(company_id=company_id)
+        for col in df.columns:
+            if isinstance(table_columns[col].type, Integer) and pd.api.types.is_float_dtype(df[col]):
+                df[col] = df[col].astype("Int64")
+        buffer = io.StringIO()
+        df.to_csv(buffer, index=False, header=False, date_format="%Y-%m-%d")
+        buffer.seek(0)
+        return buffer, list(df.columns)
+
+    def _upsert_statement(self, table, columns: list, on_conflict: str):
+        """
+        Builds a set-based INSERT ... ON CONFLICT statement for a time-series table.
+
+        Parameters:
+        table: ORM model with a (company_id, date) unique constraint.
+        columns (list): The columns being loaded. 'update' only overwrites these, so a frame
+                        without some columns never nulls out what is already stored.
+        on_conflict (str): 'nothing' or 'update'.
+
+        Returns:
+        Insert: Statement to execute with the list of records.
+        """
+        return self._on_conflict(self._insert_statement(table), table, columns, on_conflict)
+
+    def _on_conflict(self, statement, table, columns: list, on_conflict: str):
+        """Adds the ON CONFLICT (company_id, date) clause for a conflict mode to an INSERT."""
+        if on_conflict == "error":
+            return statement
+        if on_conflict == "nothing":
+            return statement.on_conflict_do_nothing(index_elements=list(CONFLICT_KEYS))
+
+        # Only rewrite rows that actually changed, so repeated loads leave unchanged rows untouched
+        updated = [table.__table__.c[col] for col in columns if col not in CONFLICT_KEYS]
+        if not updated:
+            return statement.on_conflict_do_nothing(index_elements=list(CONFLICT_KEYS))
+        return statement.on_conflict_do_update(
+            index_elements=list(CONFLICT_KEYS),
+            set_={col.name: statement.excluded[col.name] for col in updated},
+            where=or_(*[col.is_distinct_from(statement.excluded[col.name]) for col in updated])
+        )
+
+    def _insert_statement(self, table):
+        """Returns an INSERT for the table from the engine's dialect, which supports ON CONFLICT clauses."""
+        dialects = {"postgresql": postgresql, "sqlite": sqlite}
+        if self.engine.dialect.name not in dialects:
+            raise ValueError(f"ON CONFLICT is not supported by {self.engine.dialect.name}")
+        return dialects[self.engine.dialect.name].insert(table.__table__)
+
+    def _records(self, values, company_id=None, table=None) -> list:
+        """
+        Converts a processed DataFrame or Arrow table to insert mappings, adding company_id when given.
+        When a table is given, columns it does not define are dropped.
+        """
+        if table is not None:
+            names = values.column_names if isinstance(values, pa.Table) else values.columns
+            columns = [col for col in names if col in table.__table__.columns]
+            values = values.select(columns) if isinstance(values, pa.Table) else values[columns]
+        if isinstance(values, pa.Table):
+            if company_id is not None:
+                values = values.append_column("company_id", pa.array(np.full(values.num_rows, company_id)))
+            return values.to_pylist()
+        if company_id is not None:
+            values = values.assign(company_id=company_id)
+        return values.to_dict(orient="records")
+
+    def _processed_files(self):
+        """Yields (symbol, data type, path) for every CSV or Parquet file in the processed store."""
+        for file_name in os.listdir(self.PROCESSED_DATA_DIR):
+            stem, extension = os.path.splitext(file_name)
+            if extension in (".csv", ".parquet"):
+                symbols_name, _, keys = stem.rpartition("_")
+                yield symbols_name, keys, os.path.join(self.PROCESSED_DATA_DIR, file_name)
+
+    def _read_processed(self, file_path: str, columns: list = None, start=None) -> pd.DataFrame:
+        """Reads a processed CSV or Parquet file, with 'date' parsed as datetime and rows before `start` skipped."""
+        if file_path.endswith(".parquet"):
+            filters = [("date", ">=", pd.Timestamp(start))] if start is not None else None
+            return pd.read_parquet(file_path, columns=columns, filters=filters)
+        df = pd.read_csv(file_path, usecols=columns)
+        if "date" in df.columns:
+            df["date"] = pd.to_datetime(df["date"])
+        if start is not None:
+            df = df[df["date"] >= pd.Timestamp(start)].reset_index(drop=True)
+        return df
+
+    def _save_parquet(self, file_path: str, table: pa.Table, append: bool = False):
+        """Writes an Arrow table to Parquet, appending to the existing file's rows when asked."""
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        if append and os.path.exists(file_path):
+            table = pa.concat_tables([pq.read_table(file_path), table], promote_options="permissive")
+        temp_path = f"{file_path}.tmp"
+        pq.write_table(table, temp_path)
+        os.replace(temp_path, file_path)
 
     def _save_json(self, file_path: str, data: dict):
         """Helper function to save data as JSON."""
@@ -1,10 +1,86 @@
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import importlib
+import json
+import multiprocessing
+import os
 import warnings
-from utils.logging.logger import log_info
+from utils.logging.logger import log_info, configure_logger
 from utils.exceptions.exception_handling import handle_exceptions
 from utils.validation.processed_data_validation import validate_processed_data
-from utils.validation.raw_data_validation import raw_data_validation
-from utils.cleaning.data_cleaners import format_daily, format_financial, format_info
+from utils.validation.raw_data_validation import raw_data_validation, remove_invalid_rows
+from utils.validation.accounting_validation import check_accounting_identities
+from utils.cleaning.data_alignment import align_statements, split_by_symbol
+from utils.cleaning.data_cleaners import (format_daily, format_financial, format_info, apply_dtype_profile,
+                                          format_daily_batch, format_financial_batch, format_info_batch,
+                                          slice_after_watermark, is_empty_payload)
+
+
+def validate_raw_payload(symbols, data_types, values, drop_invalid_rows=False):
+    """
+    Validates one raw payload, dropping its invalid rows when `drop_invalid_rows` is set.
+
+    Returns:
+    tuple: (payload to clean or None when it must be skipped, validation report or None).
+    """
+    validation_result = raw_data_validation(values,data_types,accumulate=drop_invalid_rows)
+    report = validation_result if drop_invalid_rows else None
+    if validation_result["error"] and drop_invalid_rows and validation_result["recoverable"]:
+        warnings.warn(f'Dropping {len(validation_result["bad_rows"])} invalid rows from {symbols} {data_types} data: {validation_result["message"]}')
+        return remove_invalid_rows(values, data_types, validation_result), report
+    elif validation_result["error"]:
+        warnings.warn(f'Error validating {symbols} {data_types} data: {validation_result["message"]}')
+        return None, report
+    return values, report
+
+
+def clean_symbol(symbols, data, drop_invalid_rows=False, dtype_profile='default', watermarks=None, backend='pandas'):
+    """
+    Validates, cleans and re-validates every data type of one symbol.
+
+    `backend` selects the formatters (see `DataCleaner.formatters`), so processed frames are
+    pandas DataFrames or, with 'arrow', Arrow tables.
+
+    When `watermarks` maps a data type to its last processed date, only the newer rows are
+    validated and cleaned, and data types without new rows are skipped.
+
+    Runs in the caller's process or in a worker process, so nothing is written to a DataCleaner.
+    Warnings are recorded instead of emitted, because warnings raised in a worker process never
+    reach the parent's logging.
+
+    Returns:
+    tuple: (processed frames, raw validation reports, memory usage, list of (message, category) warnings),
+           the first three keyed by data type.
+    """
+    processed, validation_reports, memory_report = {}, {}, {}
+
+    with warnings.catch_warnings(record=True) as caught_warnings:
+        warnings.simplefilter("always")
+        for data_types, values in data.items():
+            values = slice_after_watermark(values, data_types, (watermarks or {}).get(data_types))
+            if is_empty_payload(values, data_types):
+                continue
+            values, report = validate_raw_payload(symbols, data_types, values, drop_invalid_rows)
+            if report is not None:
+                validation_reports[data_types] = report
+            if values is None:
+                continue
+            result = DataCleaner.formatters(backend)[0][data_types](values,data_types)
+            if dtype_profile != 'default':
+                memory_before = int(result.memory_usage(deep=True).sum())
+                result = apply_dtype_profile(result, dtype_profile)
+                memory_report[data_types] = {"before": memory_before,
+                                             "after": int(result.memory_usage(deep=True).sum())}
+            validation_result = validate_processed_data(result, data_types, dtype_profile)
+            if validation_result["error"]:
+                warnings.warn(f"Error validating {symbols} {data_types} data: {validation_result["message"]}")
+                continue
+            else:
+                processed[data_types] = result
+
+    return processed, validation_reports, memory_report, [(str(w.message), w.category) for w in caught_warnings]
+
 
 class DataCleaner:
 
@@ -15,25 +91,240 @@ class DataCleaner:
         'cash': format_financial,
         'info': format_info
         }
+
+    batch_formatting_functions = {
+        'daily': format_daily_batch,
+        'income': format_financial_batch,
+        'balance': format_financial_batch,
+        'cash': format_financial_batch,
+        'info': format_info_batch
+        }
+
+    # Execution backends and the module of their cleaners; pandas uses the functions above
+    backends = {
+        'pandas': None,
+        'arrow': 'utils.cleaning.arrow_cleaners',
+        'polars': 'utils.cleaning.polars_cleaners'
+        }
+    _loaded_backends = {}
+
+    @classmethod
+    def formatters(cls, backend):
+        """
+        Returns the (per-symbol, batched) formatters of a backend, keyed by data type.
+
+        The Arrow and Polars cleaners are imported on first use, so pandas runs and their
+        worker processes never pay for importing Polars.
+        """
+        if cls.backends[backend] is None:
+            return cls.formatting_functions, cls.batch_formatting_functions
+        if backend not in cls._loaded_backends:
+            cleaners = importlib.import_module(cls.backends[backend])
+            kinds = {'daily': 'daily', 'income': 'financial', 'balance': 'financial', 'cash': 'financial', 'info': 'info'}
+            cls._loaded_backends[backend] = (
+                {data_type: getattr(cleaners, f'format_{kind}_{backend}') for data_type, kind in kinds.items()},
+                {data_type: getattr(cleaners, f'format_{kind}_{backend}_batch') for data_type, kind in kinds.items()}
+            )
+        return cls._loaded_backends[backend]
     
-    def __init__(self, raw_data):
+    def __init__(self, raw_data, drop_invalid_rows=False, dtype_profile='default', watermarks=None, cache=None,
+                 backend='pandas'):
+        if backend not in self.backends:
+            raise ValueError(f"Unknown backend '{backend}'. Expected one of {list(self.backends.keys())}")
+        if backend == 'arrow' and dtype_profile != 'default':
+            raise ValueError(f"dtype profiles only apply to pandas DataFrames, got '{dtype_profile}' with '{backend}'")
+
         self.raw_data = raw_data
+        self.backend = backend
+        self.cache = cache
+        self.watermarks = watermarks or {}
+        self.drop_invalid_rows = drop_invalid_rows
+        self.dtype_profile = dtype_profile
         self.processed_data = defaultdict(lambda: defaultdict(dict))
+        self.accounting_report = None
+        self.validation_reports = defaultdict(dict)
+        self.memory_report = defaultdict(dict)
+        self.batched_data = {}
+
+    @log_info
+    @handle_exceptions
+    def transform(self, parallel=False, max_workers=None, batched=False, split=True):
+        """
+        Validates and cleans every (symbol, data_type) of the raw data.
+
+        With parallel=True symbols are spread across a process pool of `max_workers` processes
+        (defaults to the CPU count). Warnings raised in the workers are re-issued here, so they are
+        logged exactly as in a serial run.
+
+        With batched=True all symbols of a data type are cleaned together as one long-format frame
+        (see `_transform_batched`); `split` controls whether it is split back per symbol.
+
+        The backend chosen at construction decides how frames are cleaned: 'pandas', 'polars'
+        (lazy multithreaded query plans, returning pandas DataFrames) or 'arrow' (Arrow tables
+        that flow unconverted into `DataStorage`).
+        """
+        if batched:
+            return self._transform_batched(split)
+
+        symbol_names = list(self.raw_data.keys())
+        payloads = [dict(self.raw_data[symbol]) for symbol in symbol_names]
+        watermarks = [self.watermarks.get(symbol, {}) for symbol in symbol_names]
+        cache_keys = {}
+        if self.cache is not None:
+            payloads, cache_keys = self._load_cached(symbol_names, payloads, watermarks)
+            watermarks = repeat(None)  # Payloads are already sliced to their watermarks
+        options = (repeat(self.drop_invalid_rows), repeat(self.dtype_profile), watermarks, repeat(self.backend))
+
+        if parallel and len(symbol_names) > 1:
+            workers = max_workers or os.cpu_count()
+            # Forking after Polars has started its thread pool can deadlock the workers
+            mp_context = multiprocessing.get_context('spawn') if self.backend == 'polars' else None
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+                chunksize = max(1, len(symbol_names) // (workers * 4))
+                results = list(executor.map(clean_symbol, symbol_names, payloads, *options, chunksize=chunksize))
+        else:
+            results = map(clean_symbol, symbol_names, payloads, *options)
+
+        for symbols, (processed, validation_reports, memory_report, caught_warnings) in zip(symbol_names, results):
+            for message, category in caught_warnings:
+                warnings.warn(message, category)
+            for data_types, result in processed.items():
+                self.processed_data[symbols][data_types] = result
+                if (symbols, data_types) in cache_keys:
+                    self.cache.put(cache_keys[(symbols, data_types)], result)
+            if validation_reports:
+                self.validation_reports[symbols].update(validation_reports)
+            if memory_report:
+                self.memory_report[symbols].update(memory_report)
+
+        if self.memory_report:
+            self._log_memory_report()
+        if self.cache is not None:
+            self._log_cache_stats()
+
 
     @log_info
     @handle_exceptions
-    def transform(self):
+    def check_accounting_identities(self):
+        """Checks accounting identities across the processed statements of every symbol at once."""
+        aligned = align_statements(self.processed_data)
+        self.accounting_report = check_accounting_identities(aligned)
+
+        failed = self.accounting_report[~self.accounting_report['passed']]
+        for symbols, date in zip(failed['symbol'], failed['date']):
+            warnings.warn(f'Accounting identity check failed for {symbols} statements dated {date:%Y-%m-%d}')
+
+        return self.accounting_report
+
+
+    def _transform_batched(self, split=True):
+        """
+        Cleans every data type in a single vectorized pass over all symbols.
+
+        Raw payloads are still validated one by one, then the valid ones of each data type are
+        formatted, converted and validated as one long-format frame with a 'symbol' column.
+        With split=True the frame is split back into `processed_data`, otherwise it is kept
+        in `batched_data` keyed by data type.
+        """
+        payloads = defaultdict(dict)
         for symbols, data in self.raw_data.items():
             for data_types, values in data.items():
-                validation_result = raw_data_validation(values,data_types)
-                if validation_result["error"]:
-                    warnings.warn(f'Error validating {symbols} {data_types} data: {validation_result["message"]}')
+                values = slice_after_watermark(values, data_types, self.watermarks.get(symbols, {}).get(data_types))
+                if is_empty_payload(values, data_types):
                     continue
-                result = DataCleaner.formatting_functions[data_types](values,data_types)
-                validation_result = validate_processed_data(result, data_types)
+                values, report = validate_raw_payload(symbols, data_types, values, self.drop_invalid_rows)
+                if report is not None:
+                    self.validation_reports[symbols][data_types] = report
+                if values is not None:
+                    payloads[data_types][symbols] = values
+
+        for data_types, symbol_payloads in payloads.items():
+            result = DataCleaner.formatters(self.backend)[1][data_types](symbol_payloads, data_types)
+            if self.dtype_profile != 'default':
+                memory_before = {symbols: int(df.memory_usage(deep=True).sum())
+                                 for symbols, df in split_by_symbol(result).items()}
+                result = apply_dtype_profile(result, self.dtype_profile)
+
+            # Validate every symbol on its own, so one bad symbol only drops its own data
+            failed = []
+            for symbols, df in split_by_symbol(result).items():
+                validation_result = validate_processed_data(df, data_types, self.dtype_profile)
                 if validation_result["error"]:
                     warnings.warn(f"Error validating {symbols} {data_types} data: {validation_result["message"]}")
+                    failed.append(symbols)
                     continue
+                if self.dtype_profile != 'default':
+                    self.memory_report[symbols][data_types] = {"before": memory_before[symbols],
+                                                               "after": int(df.memory_usage(deep=True).sum())}
+                if split:
+                    self.processed_data[symbols][data_types] = df
+
+            if not split:
+                self.batched_data[data_types] = self._drop_symbols(result, failed)
+
+        if self.memory_report:
+            self._log_memory_report()
+
+
+    def _drop_symbols(self, result, symbols):
+        """Removes the rows of the given symbols from a long-format DataFrame or Arrow table."""
+        if not symbols:
+            return result
+        if self.backend != 'arrow':
+            return result[~result['symbol'].isin(symbols)].reset_index(drop=True)
+
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        names = pc.cast(result['symbol'], pa.string())
+        return result.filter(pc.invert(pc.is_in(names, value_set=pa.array(symbols, pa.string()))))
+
+
+    def _load_cached(self, symbol_names, payloads, watermarks):
+        """
+        Serves every (symbol, data_type) it can from the result cache.
+
+        Returns:
+        tuple: (payloads still to clean, sliced to their watermarks, cache key of each pending (symbol, data_type)).
+        """
+        pending, cache_keys = [], {}
+        for symbols, data, symbol_watermarks in zip(symbol_names, payloads, watermarks):
+            remaining = {}
+            for data_types, values in data.items():
+                values = slice_after_watermark(values, data_types, symbol_watermarks.get(data_types))
+                if is_empty_payload(values, data_types):
+                    continue
+                key = self.cache.key(values, data_types, self.dtype_profile, self.drop_invalid_rows, self.backend)
+                cached = self.cache.get(key, arrow=self.backend == 'arrow')
+                if cached is not None:
+                    self.processed_data[symbols][data_types] = cached
                 else:
-                    self.processed_data[symbols][data_types] = result
+                    remaining[data_types] = values
+                    cache_keys[(symbols, data_types)] = key
+            pending.append(remaining)
+        return pending, cache_keys
 
+
+    def _log_cache_stats(self):
+        """Logs the result cache hit rate of the last transform."""
+        stats = self.cache.stats()
+        logger = configure_logger(__name__)
+        info_data = {
+            **stats,
+            "info_message": f"Result cache served {stats['hits']} of {stats['hits'] + stats['misses']} lookups ({stats['hit_rate']:.0%})"
+        }
+        logger.info(json.dumps(info_data, indent=4), extra={"custom_funcName": "transform"})
+
+
+    def _log_memory_report(self):
+        """Logs the memory used by the processed frames before and after applying the dtype profile."""
+        before = sum(usage["before"] for data in self.memory_report.values() for usage in data.values())
+        after = sum(usage["after"] for data in self.memory_report.values() for usage in data.values())
+
+        logger = configure_logger(__name__)
+        info_data = {
+            "dtype_profile": self.dtype_profile,
+            "bytes_before": before,
+            "bytes_after": after,
+            "info_message": f"Processed frames use {after / 2**20:.2f} MiB instead of {before / 2**20:.2f} MiB"
+        }
+        logger.info(json.dumps(info_data, indent=4), extra={"custom_funcName": "transform"})
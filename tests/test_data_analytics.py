@@ -0,0 +1,149 @@
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from scripts.data_analytics import IndicatorEngine, RatioEngine
+from utils.analytics.indicators import compute_indicators, LOOKBACK, STATE_COLUMNS
+from utils.analytics.price_panel import PricePanel
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range("2023-01-02", periods=300)
+    return pd.concat([pd.DataFrame({"symbol": symbol, "date": dates,
+                                    "close": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))})
+                      for symbol in ["AAPL", "MSFT"]], ignore_index=True)
+
+
+def test_compute_indicators(prices):
+    """Test that returns, moving averages, drawdown and RSI are computed per symbol over the full history."""
+    indicators = compute_indicators(prices)
+    aapl = indicators[indicators["symbol"] == "AAPL"].reset_index(drop=True)
+    close = aapl["close"]
+
+    assert len(indicators) == len(prices)  # One row per (symbol, date)
+    assert aapl["daily_return"].iloc[1] == pytest.approx(close.iloc[1] / close.iloc[0] - 1)
+    assert aapl["sma_20"].iloc[:19].isna().all()  # Not enough history for the window
+    assert aapl["sma_20"].iloc[19] == pytest.approx(close.iloc[:20].mean())
+    assert aapl["sma_200"].iloc[-1] == pytest.approx(close.iloc[-200:].mean())
+    assert (aapl["drawdown"] <= 0).all()
+    assert aapl["rsi_14"].dropna().between(0, 100).all()
+
+
+def test_incremental_indicators_match_full_recompute(prices):
+    """Test that continuing from stored state over the new days gives the same indicators as a full recompute."""
+    cutoff = prices["date"].iloc[-3]
+    history, new_days = prices[prices["date"] <= cutoff], prices[prices["date"] > cutoff]
+
+    state = compute_indicators(history)
+    context = history.groupby("symbol").tail(LOOKBACK)
+    incremental = compute_indicators(pd.concat([context, new_days]), state[["symbol", "date"] + STATE_COLUMNS])
+    expected = compute_indicators(prices)
+
+    assert len(incremental) == 2 * 2  # Only the new days are returned
+    pd.testing.assert_frame_equal(incremental, expected[expected["date"] > cutoff].reset_index(drop=True))
+
+
+def test_indicator_engine_adds_indicators(prices):
+    """Test that the engine adds the indicators of the new days to the processed data of each symbol."""
+    cutoff = prices["date"].iloc[-2]
+    processed_data = {symbol: {"daily": df[df["date"] > cutoff].drop(columns="symbol").reset_index(drop=True)}
+                      for symbol, df in prices.groupby("symbol")}
+    history = prices[prices["date"] <= cutoff]
+
+    engine = IndicatorEngine(processed_data)
+    engine.compute(history=history.groupby("symbol").tail(IndicatorEngine.LOOKBACK),
+                   state=compute_indicators(history))
+    expected = compute_indicators(prices)
+    expected = expected[expected["date"] > cutoff]
+
+    assert set(processed_data["AAPL"]) == {"daily", "indicators"}
+    assert "close" not in processed_data["AAPL"]["indicators"].columns  # Prices stay in the stocks table
+    assert processed_data["MSFT"]["indicators"]["ema_26"].tolist() == pytest.approx(
+        expected.loc[expected["symbol"] == "MSFT", "ema_26"].tolist())
+
+
+@pytest.fixture
+def statements():
+    dates = pd.to_datetime(["2023-12-31", "2024-12-31"])
+    return {
+        "AAPL": {
+            "income": pd.DataFrame({"date": dates, "total_revenue": [400.0, 500.0], "net_income": [40.0, 60.0]}),
+            "balance": pd.DataFrame({"date": dates, "total_current_assets": [100.0, 120.0],
+                                     "total_non_current_assets": [300.0, 280.0], "total_current_liabilities": [50.0, 0.0],
+                                     "total_shareholder_equity": [200.0, 240.0], "short_term_debt": [10.0, None],
+                                     "long_term_debt": [90.0, 60.0]}),
+            "cash": pd.DataFrame({"date": dates, "free_cashflow": [30.0, 50.0]}),
+            "info": pd.DataFrame({"name": ["Apple Inc"], "total_shares": [10]}),
+            "daily": pd.DataFrame({"date": pd.to_datetime(["2024-12-30", "2025-01-02"]), "close": [25.0, 26.0]}),
+        }
+    }
+
+
+def test_ratio_engine(statements):
+    """Test that ratios use the last close on or before each fiscal date and leave undefined ratios as NaN."""
+    history = pd.DataFrame({"symbol": ["AAPL"], "date": pd.to_datetime(["2023-12-29"]), "close": [20.0]})
+
+    ratios = RatioEngine(statements).compute(prices=history)
+    first, second = ratios.iloc[0], ratios.iloc[1]
+
+    assert first["close"] == 20.0 and second["close"] == 25.0  # Last close on or before the fiscal date
+    assert first["roe"] == pytest.approx(40 / 200)
+    assert first["roa"] == pytest.approx(40 / 400)
+    assert first["debt_to_equity"] == pytest.approx(100 / 200)
+    assert second["debt_to_equity"] == pytest.approx(60 / 240)  # Missing short term debt counts as none
+    assert np.isnan(second["current_ratio"])  # Zero current liabilities
+    assert second["fcf_yield"] == pytest.approx(50 / (25.0 * 10))
+    assert second["earnings_per_share"] == pytest.approx(6.0)
+    assert statements["AAPL"]["ratios"]["book_value_per_share"].tolist() == pytest.approx([20.0, 24.0])
+
+
+def test_ratio_engine_price_window(statements):
+    """Test that ratios only ask for the prices of symbols with statements, from shortly before their first fiscal date."""
+    statements["MSFT"] = {"daily": statements["AAPL"]["daily"]}  # Prices only, so no ratios
+
+    symbols, start = RatioEngine(statements).price_window()
+    assert symbols == ["AAPL"]
+    assert start == pd.Timestamp("2023-12-31") - RatioEngine.PRICE_LOOKBACK
+    assert RatioEngine({"MSFT": statements["MSFT"]}).price_window() == ([], None)
+
+
+def test_price_panel_extends_in_place(tmp_path):
+    """Test that new days are appended, existing days updated in place and new symbols rebuild the panel."""
+    panel = PricePanel(str(tmp_path))
+    panel.update(pd.DataFrame({"symbol": ["AAPL", "AAPL", "MSFT"], "date": pd.to_datetime(["2025-03-26", "2025-03-27", "2025-03-27"]),
+                               "close": [221.53, 223.85, 390.58], "volume": [34532656, 37094774, 18575000]}))
+    panel.update(pd.DataFrame({"symbol": ["AAPL", "MSFT", "MSFT"], "date": pd.to_datetime(["2025-03-28", "2025-03-28", "2025-03-26"]),
+                               "close": [217.9, 378.8, 389.97], "volume": [39818617, 21632000, 18000000]}))
+
+    close = panel.frame("close")
+    assert isinstance(panel.field("close"), np.memmap)
+    assert close.shape == (3, 2)  # New day appended as a row
+    assert close.loc["2025-03-28", "AAPL"] == 217.9
+    assert close.loc["2025-03-26", "MSFT"] == 389.97  # Existing day updated in place
+    assert os.path.getsize(tmp_path / "close.dat") == 3 * 2 * 8
+
+    panel.update(pd.DataFrame({"symbol": ["IBM"], "date": pd.to_datetime(["2025-03-28"]), "close": [250.0], "volume": [1]}))
+    assert panel.symbols == ["AAPL", "MSFT", "IBM"]  # New symbol rebuilds the panel
+    assert panel.frame("close")["IBM"].isna().sum() == 2
+    assert panel.frame("volume").loc["2025-03-27", "AAPL"] == 37094774
+
+
+def test_price_panel_rebuild_swaps_complete_directory(tmp_path):
+    """Test that a rebuild either replaces every panel file or none of them, and an interrupted swap is finished."""
+    panel_dir = tmp_path / "panel"
+    panel = PricePanel(str(panel_dir))
+    panel.update(pd.DataFrame({"symbol": ["AAPL"], "date": pd.to_datetime(["2025-03-27"]), "close": [223.85], "volume": [37094774]}))
+    new_symbol = pd.DataFrame({"symbol": ["MSFT"], "date": pd.to_datetime(["2025-03-27"]), "close": [390.58], "volume": [18575000]})
+
+    with patch("utils.analytics.price_panel.json.dump", side_effect=OSError("disk full")), pytest.raises(OSError):
+        panel.update(new_symbol)
+    assert panel.symbols == ["AAPL"] and panel.frame("close").shape == (1, 1)  # Old panel untouched
+
+    with patch.object(PricePanel, "_swap"):  # Interrupted after the complete rebuild was renamed
+        panel.update(new_symbol)
+    assert panel.symbols == ["AAPL"]
+    assert PricePanel(str(panel_dir)).symbols == ["AAPL", "MSFT"]  # Opening the panel finishes the swap
+    assert sorted(os.listdir(tmp_path)) == ["panel"]
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import patch
-from utils.validation.raw_data_validation import input_validation, raw_data_validation
+from utils.validation.raw_data_validation import input_validation, raw_data_validation, remove_invalid_rows, financial_required_columns
 from utils.fetching.api_utils import build_parameters, fetch_api_response
 from scripts.data_ingestion import StockFetcher
 from requests.exceptions import HTTPError
@@ -722,4 +722,61 @@ def test_stock_fetcher(data_get):
     """Test for proper object behaviour"""
     data_get.get_data()
 
-    assert isinstance(data_get.data, dict)
\ No newline at end of file
+    assert isinstance(data_get.data, dict)
+
+
+def test_validation_report_collects_all_errors():
+    """Test that accumulate mode reports every violation in one pass"""
+    daily = {"Time Series (Daily)": {
+        "2025-03-28": {"1. open": "221.67", "2. high": "223.81", "3. low": "217.68", "4. close": "217.90", "5. volume": "39818617"},
+        "2025-03-27": {"1. open": "abc", "2. high": "224.99", "3. low": "220.56", "4. close": "223.85", "5. volume": "37094774"},
+        "2025-3-26": {"1. open": "223.51", "2. high": "225.02", "3. low": "220.47", "4. close": "221.53"},
+    }}
+    result = raw_data_validation(daily, 'daily', accumulate=True)
+
+    assert result['error'] == True
+    assert result['violations'] == {'invalid_date': 1, 'invalid_value': 1, 'missing_column': 1} # Every rule is counted
+    assert result['samples']['invalid_value'][0] == {'row': '2025-03-27', 'column': '1. open', 'value': 'abc'}
+    assert result['bad_rows'] == ['2025-3-26', '2025-03-27']
+    assert result['recoverable'] == True # One good row remains
+
+    cleaned = remove_invalid_rows(daily, 'daily', result)
+    assert list(cleaned['Time Series (Daily)']) == ['2025-03-28']
+    assert len(daily['Time Series (Daily)']) == 3 # Input payload is untouched
+
+def test_validation_report_with_structural_error():
+    """Test that payload-level problems are reported as unrecoverable"""
+    result = raw_data_validation({8465444: 'HELLO World'}, 'daily', accumulate=True)
+
+    assert result['error'] == True
+    assert result['violations'] == {'structure': 1}
+    assert result['recoverable'] == False
+
+def test_validation_report_matches_first_failure_on_none_values():
+    """Test that present None values are reported like the first-failure path does, not as missing columns"""
+    daily = {"Time Series (Daily)": {
+        "2025-03-28": {"1. open": None, "2. high": "223.81", "3. low": "217.68", "4. close": "217.90", "5. volume": "39818617"},
+    }}
+    income = {"annualReports": [dict.fromkeys(financial_required_columns['income'], "100") | {"netIncome": None}]}
+
+    daily_result = raw_data_validation(daily, 'daily', accumulate=True)
+    income_result = raw_data_validation(income, 'income', accumulate=True)
+
+    assert daily_result['violations'] == {'invalid_value': 1} # Same rule as 'Invalid value format'
+    assert income_result['violations'] == {'invalid_type': 1} # Same rule as 'Expected a string, int, or float'
+    assert income_result['samples']['invalid_type'][0] == {'row': 0, 'column': 'netIncome', 'value': None}
+    assert raw_data_validation(daily, 'daily')['message'].startswith("Invalid value format")
+    assert raw_data_validation(income, 'income')['message'].startswith("Expected a string, int, or float")
+
+def test_validation_report_keeps_empty_daily_rows():
+    """Test that a date without any values is reported as missing every column instead of crashing"""
+    daily = {'Time Series (Daily)': {
+        '2025-01-01': {},
+        '2025-01-02': {"1. open": "221.67", "2. high": "223.81", "3. low": "217.68", "4. close": "217.90", "5. volume": "39818617"},
+    }}
+    result = raw_data_validation(daily, 'daily', accumulate=True)
+
+    assert result['violations'] == {'missing_column': 5} # Every required column of the empty row
+    assert result['bad_rows'] == ['2025-01-01']
+    assert result['recoverable'] == True
+    assert raw_data_validation(daily, 'daily')['message'].startswith("The following columns are missing") # Both modes agree
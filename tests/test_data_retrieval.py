@@ -0,0 +1,121 @@
+import pytest
+import pandas as pd
+import pyarrow as pa
+from unittest.mock import patch, MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from scripts.data_saving import DataStorage
+from scripts.data_retrieval import StockRepository
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """DataStorage on an in-memory SQLite database holding five days of AAPL and MSFT prices."""
+    monkeypatch.setattr(DataStorage, "RAW_DATA_DIR", str(tmp_path / "raw_data"))
+    monkeypatch.setattr(DataStorage, "PROCESSED_DATA_DIR", str(tmp_path / "processed_data"))
+    monkeypatch.setattr("scripts.data_saving.create_engine", lambda url, **kwargs: create_engine("sqlite:///:memory:"))
+    storage = DataStorage()
+    storage.create_tables()
+
+    dates = pd.bdate_range("2025-03-24", periods=5)
+    storage.save_to_database({
+        symbol: {"info": pd.DataFrame({"name": [f"{symbol} Inc"], "ticker_symbol": [symbol]}),
+                 "daily": pd.DataFrame({"date": dates, "open": base + 0.5, "close": [base + day for day in range(5)],
+                                        "volume": [1000 * (day + 1) for day in range(5)]}),
+                 "income": pd.DataFrame({"date": pd.to_datetime(["2024-12-31"]), "total_revenue": [base * 1e9]})}
+        for symbol, base in [("AAPL", 220.0), ("MSFT", 390.0)]
+    })
+    return storage
+
+def test_get_returns_long_history_for_symbols_and_range(storage):
+    """Test that many symbols and a date range come back as one long frame sorted by symbol and date."""
+    repository = StockRepository(storage)
+
+    prices = repository.get("daily", ["MSFT", "AAPL"], start="2025-03-25", end="2025-03-27")
+
+    assert list(prices.columns) == ["symbol", "date", "open", "close", "volume"]
+    assert prices["symbol"].tolist() == ["AAPL"] * 3 + ["MSFT"] * 3
+    assert prices["date"].min() == pd.Timestamp("2025-03-25") and prices["date"].max() == pd.Timestamp("2025-03-27")
+    assert prices["close"].tolist() == [221.0, 222.0, 223.0, 391.0, 392.0, 393.0]  # Decimals read as floats
+
+    income = repository.get("income", ["AAPL"], arrow=True)
+    assert isinstance(income, pa.Table)
+    assert income.column("total_revenue").to_pylist() == [220e9]
+
+def test_results_are_cached_until_a_load_writes_the_table(storage):
+    """Test that repeated reads are served from the LRU cache and loads evict only the tables they wrote."""
+    repository = StockRepository(storage, cache_size=2)
+    repository.get("daily", ["AAPL"])
+    repository.get("income", ["AAPL"])
+
+    with patch.object(repository, "_stream", side_effect=AssertionError("queried")):
+        assert len(repository.get("daily", ["AAPL"])) == 5  # Same symbols in any order hit the cache
+    assert (repository.hits, repository.misses) == (1, 2)
+
+    storage.save_to_database({"AAPL": {"daily": pd.DataFrame({"date": pd.to_datetime(["2025-03-31"]), "close": [225.0]})}})
+    assert [key[0] for key in repository.cache] == ["income_statements"]  # Only the stocks entry was evicted
+    assert len(repository.get("daily", ["AAPL"])) == 6
+
+    repository.get("daily", ["MSFT"])
+    assert len(repository.cache) == 2  # Least recently used entry evicted past cache_size
+
+def test_results_invalidated_during_a_query_are_not_cached(storage):
+    """Test that a load finishing while a table is read keeps the possibly stale rows out of the cache."""
+    repository = StockRepository(storage)
+    stream = repository._stream
+
+    def load_during_query(query):
+        rows = stream(query)
+        storage.save_to_database({"AAPL": {"daily": pd.DataFrame({"date": pd.to_datetime(["2025-03-31"]), "close": [225.0]})}})
+        return rows
+
+    with patch.object(repository, "_stream", side_effect=load_during_query):
+        assert len(repository.get("daily", ["AAPL"])) == 5  # Rows read before the load finished
+    assert not repository.cache
+    assert len(repository.get("daily", ["AAPL"])) == 6  # Next read queries again and is cached
+    assert list(repository.cache) == [("stocks", ("AAPL",), None, None)]
+
+def test_copy_to_query_for_postgresql(storage):
+    """Test the SELECT that PostgreSQL wraps in COPY ... TO STDOUT."""
+    repository = StockRepository(storage)
+    query = repository._query("daily", ("AAPL", "MSFT"), pd.Timestamp("2025-03-25").date(), None)
+    compiled = query.compile(dialect=postgresql.dialect(), compile_kwargs={"render_postcompile": True})
+
+    assert " ".join(str(compiled).split()) == (
+        "SELECT companies.ticker_symbol AS symbol, stocks.date, stocks.open AS open, stocks.close AS close, stocks.volume "
+        "FROM stocks JOIN companies ON stocks.company_id = companies.company_id "
+        "WHERE companies.ticker_symbol IN (%(ticker_symbol_1_1)s, %(ticker_symbol_1_2)s) AND stocks.date >= %(date_1)s "
+        "ORDER BY companies.ticker_symbol, stocks.date")
+    assert compiled.params["ticker_symbol_1_2"] == "MSFT"
+
+def test_copy_to_parses_rows_while_copy_writes_them(storage):
+    """Test that COPY output is read incrementally through a pipe and a failed COPY is raised, not returned."""
+    repository = StockRepository(storage)
+    rows = 20_000  # Several pipe buffers of CSV text
+    lines = [b"symbol,date,close\n"] + [f"AAPL,2025-03-{day % 28 + 1:02d},{day}.5\n".encode() for day in range(rows)]
+    cursor = MagicMock()
+    cursor.mogrify.return_value = b"SELECT 1"
+    storage.engine.raw_connection = MagicMock(return_value=MagicMock(**{"cursor.return_value": cursor}))
+
+    def copy_expert(sql, sink):
+        for start in range(0, len(lines), 1000):
+            sink.write(b"".join(lines[start:start + 1000]))
+    cursor.copy_expert.side_effect = copy_expert
+
+    table = repository._copy_to(repository._query("daily", ("AAPL",), None, None))
+    assert table.num_rows == rows
+    assert table.schema.field("date").type == pa.timestamp("ns")
+    assert table.column("close")[-1].as_py() == rows - 0.5
+
+    def failing_copy(sql, sink):
+        sink.write(b"".join(lines[:100]))
+        raise RuntimeError("connection lost")
+    cursor.copy_expert.side_effect = failing_copy
+
+    with pytest.raises(RuntimeError):
+        repository._copy_to(repository._query("daily", ("AAPL",), None, None))
+
+def test_get_rejects_unknown_data_type(storage):
+    """Test that company info and unknown data types are rejected."""
+    with pytest.raises(ValueError):
+        StockRepository(storage).get("info", ["AAPL"])
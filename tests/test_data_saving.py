@@ -1,9 +1,15 @@
 import pytest
-from sqlalchemy import create_engine, func
+from sqlalchemy import create_engine, func, inspect, text
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex, CreateTable
 from datetime import datetime
-from scripts.data_saving import Base, DataStorage, Stock, IncomeStatement, BalanceSheet, CashFlow, Company 
+from scripts.data_saving import Base, DataStorage, Stock, IncomeStatement, BalanceSheet, CashFlow, Company, StockIndicator, PERFORMANCE_INDEXES, partitioned_stocks_table
 from unittest.mock import patch, MagicMock
+import os
+import json
+import pandas as pd
+import pyarrow as pa
 
 
 @pytest.fixture
@@ -125,3 +131,360 @@ def test_balance_sheet_company_relationship(test_db, date, company):
     assert retrieved_bs.current_assets == 300004
     assert retrieved_bs.non_current_assets == 2339984
     assert retrieved_bs.company_id == company.company_id  # Ensures correct linkage
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """DataStorage writing to temporary directories and an in-memory SQLite database."""
+    monkeypatch.setattr(DataStorage, "RAW_DATA_DIR", str(tmp_path / "raw_data"))
+    monkeypatch.setattr(DataStorage, "PROCESSED_DATA_DIR", str(tmp_path / "processed_data"))
+    monkeypatch.setattr("scripts.data_saving.create_engine", lambda url, **kwargs: create_engine(TEST_DATABASE_URL))
+    return DataStorage()
+
+def test_append_processed_data_and_load_watermarks(storage):
+    """Test that incremental saves append to the processed store and advance the watermarks."""
+    history = pd.DataFrame({"date": pd.to_datetime(["2025-03-27", "2025-03-26"]), "close": [223.85, 221.53]})
+    delta = pd.DataFrame({"date": pd.to_datetime(["2025-03-28"]), "close": [217.9]})
+
+    storage.save_processed_data({"AAPL": {"daily": history}})
+    assert storage.load_watermarks() == {"AAPL": {"daily": "2025-03-27"}}
+
+    storage.save_processed_data({"AAPL": {"daily": delta}}, append=True)
+    saved = pd.read_csv(os.path.join(storage.PROCESSED_DATA_DIR, "AAPL_daily.csv"))
+
+    assert len(saved) == 3  # Delta appended without a second header
+    assert storage.load_watermarks(["AAPL"]) == {"AAPL": {"daily": "2025-03-28"}}
+
+def test_load_processed_and_save_indicators(storage):
+    """Test that the processed store is read back per symbol and indicators are loaded next to stocks."""
+    daily = pd.DataFrame({"date": pd.to_datetime(["2025-03-26", "2025-03-27", "2025-03-28"]),
+                          "close": [221.53, 223.85, 217.9]})
+    indicators = pd.DataFrame({"date": pd.to_datetime(["2025-03-28"]), "daily_return": [-0.026580], "ema_12": [220.1]})
+    info = pd.DataFrame({"name": ["Apple Inc"], "ticker_symbol": ["AAPL"]})
+    storage.save_processed_data({"AAPL": {"daily": daily}})
+
+    history = storage.load_processed("daily", tail=2)
+    assert history["symbol"].tolist() == ["AAPL", "AAPL"]
+    assert history["date"].max() == pd.Timestamp("2025-03-28")  # Tail keeps the latest rows
+
+    storage.create_tables()
+    storage.save_to_database({"AAPL": {"info": info, "indicators": indicators}})
+    session = storage.Session()
+    saved = session.query(StockIndicator).one()
+    session.close()
+
+    assert float(saved.ema_12) == pytest.approx(220.1)
+    assert float(saved.daily_return) == pytest.approx(-0.02658)
+
+@pytest.mark.parametrize("as_arrow", [False, True])
+def test_load_processed_from_start(storage, as_arrow):
+    """Test that processed reads can be limited to symbols, columns and rows from a start date, from CSV and Parquet."""
+    daily = pd.DataFrame({"date": pd.to_datetime(["2025-03-26", "2025-03-27", "2025-03-28"]),
+                          "open": [220.0, 221.39, 221.67], "close": [221.53, 223.85, 217.9]})
+    store = (lambda df: pa.Table.from_pandas(df, preserve_index=False)) if as_arrow else (lambda df: df)
+    storage.save_processed_data({"AAPL": {"daily": store(daily)}, "MSFT": {"daily": store(daily)}})
+
+    prices = storage.load_processed("daily", symbols=["AAPL"], start=pd.Timestamp("2025-03-27"), columns=["close"])
+    assert list(prices.columns) == ["symbol", "date", "close"]
+    assert prices["close"].tolist() == [223.85, 217.9]
+    assert storage.load_processed("daily", symbols=[]).empty  # No symbols asked for, nothing read
+
+def test_arrow_tables_saved_to_parquet_and_database(storage):
+    """Test that Arrow tables are written to Parquet, appended to, and loaded into the database as they are."""
+    daily = pa.table({"date": pa.array(pd.to_datetime(["2025-03-27"])), "open": [221.39], "close": [223.85], "volume": [37094774]})
+    delta = pa.table({"date": pa.array(pd.to_datetime(["2025-03-28"])), "open": [221.67], "close": [217.9], "volume": [39818617]})
+    info = pa.table({"name": ["Apple Inc"], "ticker_symbol": ["AAPL"], "total_shares": [15022100000]})
+
+    storage.save_processed_data({"AAPL": {"daily": daily, "info": info}})
+    storage.save_processed_data({"AAPL": {"daily": delta}}, append=True)
+
+    assert os.path.exists(os.path.join(storage.PROCESSED_DATA_DIR, "AAPL_daily.parquet"))
+    assert storage.load_watermarks() == {"AAPL": {"daily": "2025-03-28"}}
+    assert storage.load_processed("daily")["close"].tolist() == [223.85, 217.9]
+
+    storage.create_tables()
+    storage.save_to_database({"AAPL": {"info": info, "daily": pa.concat_tables([daily, delta])}})
+    session = storage.Session()
+    volumes = [stock.volume for stock in session.query(Stock).order_by(Stock.date)]
+    company = session.query(Company).one()
+    session.close()
+
+    assert volumes == [37094774, 39818617]
+    assert company.total_shares == 15022100000
+
+def test_copy_buffer_and_statement(storage):
+    """Test that COPY receives headerless CSV in the statement's column order, from pandas and Arrow alike."""
+    daily = pd.DataFrame({"date": pd.to_datetime(["2025-03-28"]), "open": [221.67], "close": [None], "volume": [39818617.0],
+                          "unmapped": ["skipped"]})
+    session = MagicMock()
+    cursor = session.connection.return_value.connection.cursor.return_value
+
+    storage._copy_into(session, Stock, daily, company_id=7)
+    statement, buffer = cursor.copy_expert.call_args[0]
+
+    assert statement == "COPY stocks (date, open, close, volume, company_id) FROM STDIN WITH (FORMAT csv)"
+    assert buffer.read() == "2025-03-28,221.67,,39818617,7\n"  # Null close, integer volume
+    cursor.close.assert_called_once()
+
+    arrow_buffer, columns = storage._copy_buffer(Stock, pa.Table.from_pandas(daily, preserve_index=False), company_id=7)
+    assert columns == ["date", "open", "close", "volume", "company_id"]
+    assert arrow_buffer.read() == b"2025-03-28,221.67,,39818617,7\n"
+
+def test_save_to_database_copy_falls_back_outside_postgres(storage):
+    """Test that the COPY loader falls back to ORM inserts on databases without COPY."""
+    daily = pd.DataFrame({"date": pd.to_datetime(["2025-03-28"]), "open": [221.67], "close": [217.9], "volume": [39818617]})
+    info = pd.DataFrame({"name": ["Apple Inc"], "ticker_symbol": ["AAPL"]})
+
+    storage.create_tables()
+    storage.save_to_database({"AAPL": {"info": info, "daily": daily}}, method="copy")
+    session = storage.Session()
+    count = session.query(Stock).count()
+    session.close()
+
+    assert count == 1
+
+@pytest.mark.parametrize("on_conflict, expected_close", [("nothing", 217.9), ("update", 218.5)])
+def test_save_to_database_upserts_repeated_loads(storage, on_conflict, expected_close):
+    """Test that repeated loads skip or update existing (company_id, date) rows instead of rolling back."""
+    info = pd.DataFrame({"name": ["Apple Inc"], "ticker_symbol": ["AAPL"]})
+    first = pd.DataFrame({"date": pd.to_datetime(["2025-03-28"]), "open": [221.67], "close": [217.9], "volume": [39818617]})
+    rerun = pd.DataFrame({"date": pd.to_datetime(["2025-03-28", "2025-03-31"]), "close": [218.5, 222.13]})
+
+    storage.create_tables()
+    storage.save_to_database({"AAPL": {"info": info, "daily": first}})
+    storage.save_to_database({"AAPL": {"info": info, "daily": rerun}}, on_conflict=on_conflict)
+    session = storage.Session()
+    stocks = session.query(Stock).order_by(Stock.date).all()
+    session.close()
+
+    assert len(stocks) == 2  # New date inserted alongside the existing one
+    assert float(stocks[0].close) == pytest.approx(expected_close)
+    assert float(stocks[0].open) == pytest.approx(221.67)  # Columns missing from the rerun are kept
+    assert stocks[0].volume == 39818617
+
+def test_save_to_database_rejects_unknown_conflict_mode(storage):
+    """Test that an unknown conflict mode is rejected before anything is loaded."""
+    with pytest.raises(ValueError):
+        storage.save_to_database({}, on_conflict="replace")
+
+def test_resolve_company_ids_batches_and_caches(storage):
+    """Test that companies are upserted in one pass, cached, and symbols without info no longer inherit an id."""
+    daily = pd.DataFrame({"date": pd.to_datetime(["2025-03-28"]), "close": [217.9]})
+    data = {
+        "AAPL": {"info": pd.DataFrame({"name": ["Apple Inc"], "ticker_symbol": ["AAPL"]}), "daily": daily},
+        "MSFT": {"info": pd.DataFrame({"name": ["Microsoft"], "ticker_symbol": ["MSFT"]}), "daily": daily},
+        "IBM": {"daily": daily}
+    }
+
+    storage.create_tables()
+    storage.save_to_database(data)
+    session = storage.Session()
+    loaded = {company.ticker_symbol: len(company.stocks) for company in session.query(Company)}
+    session.close()
+
+    assert loaded == {"AAPL": 1, "MSFT": 1}  # IBM has no company, so its prices are skipped
+    assert set(storage.company_ids) == {"AAPL", "MSFT"}
+
+    with patch.object(storage, "Session", side_effect=AssertionError("queried")):
+        ids = storage.resolve_company_ids({"AAPL": {"daily": daily}, "MSFT": data["MSFT"]})
+    assert ids == {"AAPL": storage.company_ids["AAPL"], "MSFT": storage.company_ids["MSFT"]}  # Served from the cache
+
+def test_create_tables_adds_ticker_index_to_existing_companies(storage):
+    """Test that create_tables backfills the unique ticker index the company upsert conflicts on."""
+    with storage.engine.begin() as connection:  # A companies table created before ticker_symbol was unique
+        connection.execute(text("CREATE TABLE companies (company_id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL UNIQUE, "
+                                "total_shares BIGINT, ticker_symbol VARCHAR(10) NOT NULL, exchange VARCHAR(255), "
+                                "currency VARCHAR(25), country VARCHAR(255), sector VARCHAR(255))"))
+
+    storage.create_tables()
+    indexes = {index["name"]: index for index in inspect(storage.engine).get_indexes("companies")}
+    assert indexes["uq_companies_ticker_symbol"]["unique"]
+
+    info = {"AAPL": {"info": pd.DataFrame({"name": ["Apple Inc"], "ticker_symbol": ["AAPL"]})}}
+    first = storage.resolve_company_ids(info)
+    storage.company_ids.clear()
+    assert storage.resolve_company_ids(info, update=True) == first == {"AAPL": 1}  # ON CONFLICT (ticker_symbol) resolves
+
+def test_merge_statement_from_staging(storage):
+    """Test that staging merges are one INSERT ... SELECT, deduplicated only when conflicts are resolved."""
+    def compiled(on_conflict):
+        statement = storage._merge_statement(Stock, "staging_stocks", ["company_id", "date", "close"], on_conflict)
+        return " ".join(str(statement.compile(dialect=postgresql.dialect())).split())
+
+    assert compiled("error") == ("INSERT INTO stocks (company_id, date, close) SELECT staging_stocks.company_id, "
+                                 "staging_stocks.date, staging_stocks.close FROM staging_stocks")
+    assert "SELECT DISTINCT ON (staging_stocks.company_id, staging_stocks.date)" in compiled("nothing")
+    assert ("ORDER BY staging_stocks.company_id, staging_stocks.date, "
+            "staging_stocks.load_sequence DESC") in compiled("nothing")  # Last copied duplicate wins
+    assert compiled("update").endswith("ON CONFLICT (company_id, date) DO UPDATE SET close = excluded.close "
+                                       "WHERE stocks.close IS DISTINCT FROM excluded.close")
+
+def test_load_through_staging_copies_then_merges_per_table(storage):
+    """Test that every symbol is copied into one session-private staging table, merged once and committed."""
+    daily = pd.DataFrame({"date": pd.to_datetime(["2025-03-28"]), "close": [217.9]})
+    session = MagicMock()
+    cursor = session.connection.return_value.connection.cursor.return_value
+    storage.Session = MagicMock(return_value=session)
+
+    batches = storage._batches({"AAPL": {"daily": daily}, "MSFT": {"daily": daily}, "IBM": {"daily": daily}},
+                               {"AAPL": 1, "MSFT": 2})
+    storage._load_through_staging(batches, on_conflict="nothing")
+    statements = [str(call[0][0]) for call in session.execute.call_args_list]
+
+    assert [call[0][0] for call in cursor.copy_expert.call_args_list] == \
+        ["COPY staging_stocks (date, close, company_id) FROM STDIN WITH (FORMAT csv)"] * 2  # IBM has no company
+    assert statements[0].startswith("CREATE TEMP TABLE staging_stocks ON COMMIT DROP AS SELECT company_id, date, open, close, volume")
+    assert statements[1] == "ALTER TABLE staging_stocks ADD COLUMN load_sequence BIGINT GENERATED ALWAYS AS IDENTITY"
+    assert statements[2].startswith("INSERT INTO stocks (company_id, date, close) SELECT")
+    assert len(statements) == 3  # Dropped on commit, not by hand
+    session.commit.assert_called_once()
+
+def test_save_to_database_in_parallel(storage, tmp_path):
+    """Test that parallel loads commit every (symbol, table) batch after the companies they reference."""
+    # Each thread gets its own connection, so share a file database instead of an in-memory one
+    storage.engine = create_engine(f"sqlite:///{tmp_path / 'stocks.db'}")
+    storage.Session = sessionmaker(bind=storage.engine)
+    daily = pd.DataFrame({"date": pd.to_datetime(["2025-03-27", "2025-03-28"]), "close": [223.85, 217.9]})
+    income = pd.DataFrame({"date": pd.to_datetime(["2024-12-31"]), "total_revenue": [391035000000]})
+    data = {symbol: {"info": pd.DataFrame({"name": [f"{symbol} Inc"], "ticker_symbol": [symbol]}),
+                     "daily": daily, "income": income} for symbol in ["AAPL", "MSFT", "NVDA"]}
+
+    storage.create_tables()
+    storage.save_to_database(data, workers=3)
+    session = storage.Session()
+    counts = (session.query(Stock).count(), session.query(IncomeStatement).count(), session.query(Company).count())
+    session.close()
+
+    assert counts == (6, 3, 3)
+
+@pytest.fixture
+def five_days():
+    return {"AAPL": {"info": pd.DataFrame({"name": ["Apple Inc"], "ticker_symbol": ["AAPL"]}),
+                     "daily": pd.DataFrame({"date": pd.bdate_range("2025-03-24", periods=5), "close": [220.0, 221.0, 222.0, 223.0, 224.0]})}}
+
+def test_chunked_load_commits_and_reports_every_chunk(storage, five_days):
+    """Test that chunked loads slice batches, commit every few chunks and report each chunk's timing."""
+    storage.create_tables()
+    storage.save_to_database(five_days, chunk_rows=2, chunks_per_commit=2)
+    session = storage.Session()
+    count = session.query(Stock).count()
+    session.close()
+
+    assert count == 5
+    assert [(entry["start"], entry["rows"], entry["committed"]) for entry in storage.chunk_report] == [(0, 2, 0), (2, 2, 4), (4, 1, 5)]
+    assert all(entry["seconds"] >= 0 for entry in storage.chunk_report)
+    assert not os.path.exists(os.path.join(storage.PROCESSED_DATA_DIR, "load_checkpoint.json"))  # Cleared once complete
+
+def test_chunked_load_resumes_after_last_committed_chunk(storage, five_days):
+    """Test that an interrupted chunked load resumes from its checkpoint instead of reloading committed rows."""
+    load_table = storage._load_table
+    def failing_load(session, table, chunk, *args):
+        if chunk["date"].iloc[0] == pd.Timestamp("2025-03-28"):
+            raise RuntimeError("connection lost")
+        return load_table(session, table, chunk, *args)
+
+    storage.create_tables()
+    with patch.object(storage, "_load_table", side_effect=failing_load):
+        storage.save_to_database(five_days, chunk_rows=2)
+
+    with open(os.path.join(storage.PROCESSED_DATA_DIR, "load_checkpoint.json")) as f:
+        entry = json.load(f)["AAPL/stocks"]
+    assert entry["committed"] == 4
+    assert [{key: batch[key] for key in ["symbol", "table", "rows", "committed"]} for batch in storage.failed_batches] == \
+        [{"symbol": "AAPL", "table": "stocks", "rows": 5, "committed": 4}]  # Partial load is reported
+    assert {key: entry["fingerprint"][key] for key in ["rows", "first_date", "last_date"]} == \
+        {"rows": 5, "first_date": "2025-03-24", "last_date": "2025-03-28"}
+
+    storage.save_to_database(five_days, chunk_rows=2, resume=True)
+    session = storage.Session()
+    count = session.query(Stock).count()
+    session.close()
+
+    assert count == 5  # Plain inserts, so reloading the first four rows would have failed
+    assert [entry["start"] for entry in storage.chunk_report] == [4]
+    assert storage.failed_batches == []
+
+def test_performance_indexes_created_and_rebuilt_around_loads(storage, five_days):
+    """Test that create_tables manages the declared indexes and loads can drop and rebuild them."""
+    def index_names():
+        return {index["name"] for table in ["stocks", "stock_indicators"] for index in inspect(storage.engine).get_indexes(table)}
+
+    declared = {index.name for index in PERFORMANCE_INDEXES}
+    storage.create_tables()
+    assert declared <= index_names()
+
+    storage.drop_indexes()
+    assert not declared & index_names()
+    storage.create_tables()  # Existing tables get their missing indexes back
+    assert declared <= index_names()
+
+    with patch.object(storage, "drop_indexes", wraps=storage.drop_indexes) as drop:
+        storage.save_to_database(five_days, rebuild_indexes=True)
+    drop.assert_called_once()
+    assert declared <= index_names()
+
+    covering = next(index for index in PERFORMANCE_INDEXES if index.name == "ix_stocks_company_date_prices")
+    brin = next(index for index in PERFORMANCE_INDEXES if index.name == "ix_stocks_date_brin")
+    assert str(CreateIndex(covering).compile(dialect=postgresql.dialect())).endswith("(company_id, date) INCLUDE (open, close, volume)")
+    assert "USING brin (date)" in str(CreateIndex(brin).compile(dialect=postgresql.dialect()))
+
+def test_partitioned_stocks_table_and_yearly_partitions(storage, five_days):
+    """Test the partitioned stocks DDL, the yearly partitions a load needs and the fallback outside PostgreSQL."""
+    ddl = " ".join(str(CreateTable(partitioned_stocks_table()).compile(dialect=postgresql.dialect())).split())
+    assert "PRIMARY KEY (stock_id, date)" in ddl  # Partition key must be part of the primary key
+    assert ddl.endswith("PARTITION BY RANGE (date)")
+
+    history = pa.table({"date": pa.array(pd.to_datetime(["2023-12-29", "2024-01-02"])), "close": [192.53, 185.64]})
+    batches = [("AAPL", Stock, five_days["AAPL"]["daily"], 1), ("MSFT", Stock, history, 2),
+               ("AAPL", IncomeStatement, pd.DataFrame({"date": pd.to_datetime(["2019-12-31"])}), 1)]
+    assert storage._stock_years(batches) == [2023, 2024, 2025]
+    assert storage._partition_statements([2025]) == [
+        "CREATE TABLE IF NOT EXISTS stocks_2025 PARTITION OF stocks FOR VALUES FROM ('2025-01-01') TO ('2026-01-01')"]
+
+    storage.create_tables(partition_stocks=True)  # SQLite creates stocks unpartitioned
+    storage.save_to_database(five_days)
+    session = storage.Session()
+    assert session.query(Stock).count() == 5
+    session.close()
+
+def test_delta_only_loads_rows_newer_than_the_database(storage, five_days):
+    """Test that delta loads skip stored dates per company and table and report the delta sizes."""
+    daily = five_days["AAPL"]["daily"]
+    income = pa.table({"date": pa.array(pd.to_datetime(["2024-12-31"])), "total_revenue": [391035000000]})
+    storage.create_tables()
+    storage.save_to_database({"AAPL": {"info": five_days["AAPL"]["info"], "daily": daily.iloc[:3]}})
+
+    storage.save_to_database({"AAPL": {"daily": daily, "income": income}}, delta_only=True)  # Plain inserts
+    session = storage.Session()
+    counts = (session.query(Stock).count(), session.query(IncomeStatement).count())
+    session.close()
+
+    assert counts == (5, 1)
+    assert storage.delta_report == {"stocks": {"rows": 5, "delta": 2}, "income_statements": {"rows": 1, "delta": 1}}
+    company_id = storage.company_ids["AAPL"]
+    assert storage.load_database_watermarks([company_id]) == {("stocks", company_id): pd.Timestamp("2025-03-28").date(),
+                                                             ("income_statements", company_id): pd.Timestamp("2024-12-31").date()}
+    assert storage._after(income, pd.Timestamp("2024-12-31").date()).num_rows == 0
+
+def test_chunked_resume_restarts_batches_with_different_content(storage, five_days):
+    """Test that a checkpoint left by another batch of the same size does not skip rows of the new one."""
+    info = five_days["AAPL"]["info"]
+    day_one = pd.DataFrame({"date": pd.bdate_range("2025-03-31", periods=4), "close": [220.0, 221.0, 222.0, 223.0]})
+    day_two = pd.DataFrame({"date": pd.bdate_range("2025-04-07", periods=4), "close": [224.0, 225.0, 226.0, 227.0]})
+    load_table = storage._load_table
+    def failing_load(session, table, chunk, *args):
+        if chunk["date"].iloc[0] == pd.Timestamp("2025-04-02"):
+            raise RuntimeError("connection lost")
+        return load_table(session, table, chunk, *args)
+
+    storage.create_tables()
+    with patch.object(storage, "_load_table", side_effect=failing_load):
+        storage.save_to_database({"AAPL": {"info": info, "daily": day_one}}, chunk_rows=2)
+
+    storage.save_to_database({"AAPL": {"daily": day_two}}, chunk_rows=2, resume=True)
+    session = storage.Session()
+    dates = {stock.date for stock in session.query(Stock)}
+    session.close()
+
+    assert set(day_two["date"].dt.date) <= dates  # Same row count, different dates, so nothing is skipped
+    assert [entry["start"] for entry in storage.chunk_report] == [0, 2]
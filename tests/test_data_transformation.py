@@ -1,6 +1,18 @@
+import os
+import subprocess
+import sys
 import pytest
+import numpy as np
 import pandas as pd
+import polars as pl
+import pyarrow as pa
+from unittest.mock import patch
 from scripts.data_transformation import DataCleaner
+from utils.caching.result_cache import ResultCache
+from utils.cleaning import data_cleaners, polars_cleaners
+from utils.cleaning.data_cleaners import build_daily_frame, coerce_numeric_block
+from utils.validation.accounting_validation import check_accounting_identities
+from utils.validation.processed_data_validation import validate_processed_data
 
 
 
@@ -665,3 +677,297 @@ def test_transform_with_invalid_type(missing_key_data, caplog):
     # Check that a warning was logged
     assert "Error validating AAPL" in caplog.text
 
+
+
+def test_check_accounting_identities(data_cleaner):
+    """Test the accounting identity checks over the processed statements."""
+    data_cleaner.transform()
+    report = data_cleaner.check_accounting_identities()
+
+    aapl = report[report['symbol'] == 'AAPL'].set_index('date')
+    assert aapl.loc['2024-09-30', 'balance_ok'] == True  # Assets equal liabilities plus equity
+    assert aapl.loc['2024-09-30', 'passed'] == True
+    assert 'free_cashflow_ok' not in report.columns  # Derived by the cash cleaner, so it cannot fail
+
+
+def test_check_accounting_identities_flags_violations():
+    """Test that identity violations are flagged row by row."""
+    aligned = pd.DataFrame({
+        'symbol': ['AAA', 'BBB'],
+        'date': pd.to_datetime(['2024-12-31', '2024-12-31']),
+        'total_current_assets': [60.0, 60.0],
+        'total_non_current_assets': [40.0, 40.0],
+        'total_current_liabilities': [30.0, 30.0],
+        'total_non_current_liabilities': [20.0, 20.0],
+        'total_shareholder_equity': [50.0, 10.0],
+        'gross_margin': [40.0, 250.0],
+    })
+    report = check_accounting_identities(aligned)
+
+    assert report['balance_ok'].tolist() == [True, False]  # BBB assets do not balance
+    assert report['gross_margin_ok'].tolist() == [True, False]  # BBB margin is out of range
+    assert report['passed'].tolist() == [True, False]
+
+
+def test_transform_drops_invalid_rows(sample_raw_data):
+    """Test that invalid rows are dropped instead of the whole data type."""
+    sample_raw_data['AAPL']['daily']['Time Series (Daily)']['2025-03-27']['4. close'] = 'None'
+
+    cleaner = DataCleaner(sample_raw_data, drop_invalid_rows=True)
+    cleaner.transform()
+
+    daily = cleaner.processed_data['AAPL']['daily']
+    assert len(daily) == 6  # Only the bad day is dropped
+    assert pd.Timestamp('2025-03-27') not in daily['date'].tolist()
+    assert cleaner.validation_reports['AAPL']['daily']['violations'] == {'invalid_value': 1}
+
+
+def test_build_daily_frame_dtypes(sample_raw_data):
+    """Test that the columnar daily builder produces typed columns in API order."""
+    df = build_daily_frame(sample_raw_data['AAPL']['daily']['Time Series (Daily)'])
+
+    assert list(df.columns) == ['date', 'open', 'close', 'volume']
+    assert df['date'].dtype == 'datetime64[ns]'
+    assert df['open'].dtype == 'float64' and df['close'].dtype == 'float64'
+    assert df['volume'].dtype == 'int64'
+    assert df['date'].iloc[0] == pd.Timestamp('2025-03-28')  # Newest first, as returned by the API
+    assert df['close'].iloc[0] == 217.9
+
+
+def test_transform_with_compact_profile(sample_raw_data):
+    """Test that the compact dtype profile shrinks the processed frames and passes validation."""
+    cleaner = DataCleaner(sample_raw_data, dtype_profile='compact')
+    cleaner.transform()
+
+    daily = cleaner.processed_data['AAPL']['daily']
+    info = cleaner.processed_data['AAPL']['info']
+    assert daily['close'].dtype == 'float32'  # Prices fit in float32
+    assert daily['volume'].dtype == 'uint32'
+    assert cleaner.processed_data['AAPL']['balance']['total_current_assets'].dtype == 'float64'  # Too large for float32
+    assert isinstance(info['currency'].dtype, pd.CategoricalDtype)
+    assert info['name'].dtype == 'string[pyarrow]'
+
+    usage = cleaner.memory_report['AAPL']['daily']
+    assert usage['after'] < usage['before']
+
+
+@pytest.mark.parametrize("data_type, n_numeric", [('balance', 9), ('income', 6), ('cash', 6)])
+def test_cleaners_convert_once_and_leave_input(sample_raw_data, data_type, n_numeric):
+    """Test that each cleaner returns its converted numeric block without copying it and never modifies its input."""
+    raw_df = pd.DataFrame.from_dict(sample_raw_data['AAPL'][data_type]['annualReports'])
+    original = raw_df.copy()
+    cleaner = {'balance': data_cleaners.clean_balance, 'income': data_cleaners.clean_income, 'cash': data_cleaners.clean_cash}[data_type]
+    numeric_columns = {'balance': data_cleaners.BALANCE_NUMERIC_COLUMNS, 'income': data_cleaners.INCOME_NUMERIC_COLUMNS,
+                       'cash': data_cleaners.CASH_NUMERIC_COLUMNS}[data_type]
+
+    blocks, coerce_numeric_block = [], data_cleaners.coerce_numeric_block
+    def coerce(block):
+        blocks.append(coerce_numeric_block(block))
+        return blocks[-1]
+
+    with patch.object(data_cleaners, 'coerce_numeric_block', side_effect=coerce):
+        cleaned = cleaner(raw_df)
+
+    block, = blocks  # One block for all numeric columns
+    assert block.shape[1] == n_numeric
+    for col in numeric_columns:
+        assert np.shares_memory(cleaned[col].to_numpy(), block), col  # Returned without a copy
+    pd.testing.assert_frame_equal(raw_df, original)  # Input columns and values are unchanged
+    assert cleaned['date'].dtype == 'datetime64[ns]'
+
+
+def test_coerce_numeric_block():
+    """Test that "None", empty and malformed values become NaN and numbers are parsed."""
+    block = np.array([['100', 'None'], ['', ' 2.5 '], [None, '-3e2']], dtype=object)
+    expected = np.array([[100.0, np.nan], [np.nan, 2.5], [np.nan, -300.0]])
+
+    np.testing.assert_array_equal(coerce_numeric_block(block), expected)
+    block[0, 0] = 'n/a'  # Malformed values fall back to per-column coercion
+    np.testing.assert_array_equal(coerce_numeric_block(block)[:, 0], [np.nan, np.nan, np.nan])
+
+
+def test_transform_parallel_matches_serial(sample_raw_data):
+    """Test that the process-pool transform returns the same processed data as the serial one."""
+    serial = DataCleaner(sample_raw_data)
+    serial.transform()
+    parallel = DataCleaner(sample_raw_data)
+    parallel.transform(parallel=True, max_workers=2)
+
+    assert set(parallel.processed_data) == set(serial.processed_data)
+    for symbol, data in serial.processed_data.items():
+        assert set(parallel.processed_data[symbol]) == set(data)
+        for data_type, df in data.items():
+            pd.testing.assert_frame_equal(parallel.processed_data[symbol][data_type], df)
+
+
+def test_transform_parallel_keeps_warnings(sample_raw_data, caplog):
+    """Test that warnings raised in worker processes are still logged."""
+    sample_raw_data['MSFT']['daily'] = None
+
+    cleaner = DataCleaner(sample_raw_data)
+    cleaner.transform(parallel=True, max_workers=2)
+
+    assert "Error validating MSFT daily data" in caplog.text
+    assert "daily" in cleaner.processed_data["AAPL"]
+
+
+def test_transform_batched_matches_per_symbol(sample_raw_data):
+    """Test that batched cleaning split back per symbol matches the per-symbol path."""
+    serial = DataCleaner(sample_raw_data)
+    serial.transform()
+    batched = DataCleaner(sample_raw_data)
+    batched.transform(batched=True)
+
+    for symbol, data in serial.processed_data.items():
+        assert set(batched.processed_data[symbol]) == set(data)
+        for data_type, df in data.items():
+            pd.testing.assert_frame_equal(batched.processed_data[symbol][data_type], df)
+
+
+@pytest.mark.parametrize("split", [True, False])
+def test_transform_batched_drops_only_invalid_symbols(sample_raw_data, split, caplog):
+    """Test that a symbol failing processed validation in batched mode only drops its own data."""
+    daily_calls = []
+    def failing_validation(df, data_type, dtype_profile='default'):
+        if data_type == 'daily':
+            daily_calls.append(df)
+            if len(daily_calls) == 2:  # Symbols are validated in order of appearance, so this is MSFT
+                return {"error": True, "message": "Column 'close' must be numeric."}
+        return validate_processed_data(df, data_type, dtype_profile)
+
+    cleaner = DataCleaner(sample_raw_data, dtype_profile='compact')
+    with patch("scripts.data_transformation.validate_processed_data", side_effect=failing_validation):
+        cleaner.transform(batched=True, split=split)
+
+    assert "Error validating MSFT daily data" in caplog.text
+    if split:
+        assert set(cleaner.processed_data['AAPL']) == {'daily', 'info', 'cash', 'balance', 'income'}
+        assert 'MSFT' not in cleaner.processed_data
+    else:
+        assert cleaner.batched_data['daily']['symbol'].unique().tolist() == ['AAPL']
+    assert set(cleaner.memory_report) == {'AAPL'}  # Reported per symbol, not under 'batch', and not for MSFT
+    assert 'daily' in cleaner.memory_report['AAPL']
+
+
+def test_transform_batched_long_format(sample_raw_data):
+    """Test that the unsplit batched output holds every symbol in one long-format frame."""
+    cleaner = DataCleaner(sample_raw_data)
+    cleaner.transform(batched=True, split=False)
+
+    daily = cleaner.batched_data['daily']
+    assert list(daily.columns) == ['symbol', 'date', 'open', 'close', 'volume']
+    assert daily['symbol'].value_counts().to_dict() == {'AAPL': 7, 'MSFT': 7}
+    assert 'gross_margin' in cleaner.batched_data['income']  # Derived columns are computed for all symbols
+    assert cleaner.processed_data == {}
+
+
+def test_transform_with_watermarks(sample_raw_data):
+    """Test that only rows newer than the watermark are cleaned."""
+    watermarks = {'AAPL': {'daily': '2025-03-26', 'balance': '2024-01-01', 'income': '2024-09-30'}}
+    cleaner = DataCleaner(sample_raw_data, watermarks=watermarks)
+    cleaner.transform()
+
+    aapl = cleaner.processed_data['AAPL']
+    assert aapl['daily']['date'].min() == pd.Timestamp('2025-03-27')  # Only the two newer days
+    assert len(aapl['daily']) == 2
+    assert len(aapl['balance']) == 1  # The 2023 report is behind the watermark
+    assert 'income' not in aapl  # No newer report, nothing to clean
+    assert len(cleaner.processed_data['MSFT']['daily']) == 7  # No watermark, full history
+
+
+def test_transform_with_result_cache(sample_raw_data, tmp_path):
+    """Test that a second run over identical raw payloads is served from the result cache."""
+    first = DataCleaner(sample_raw_data, cache=ResultCache(str(tmp_path)))
+    first.transform()
+    assert first.cache.hits == 0
+
+    second = DataCleaner(sample_raw_data, cache=ResultCache(str(tmp_path)))
+    second.transform()
+
+    assert second.cache.misses == 0
+    assert second.cache.hit_rate == 1.0
+    pd.testing.assert_frame_equal(second.processed_data['AAPL']['income'], first.processed_data['AAPL']['income'])
+
+    stale = DataCleaner(sample_raw_data, cache=ResultCache(str(tmp_path), version='next'))
+    stale.transform()
+    assert stale.cache.hits == 0  # A new cleaner version recomputes everything
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path):
+    """Test that the cache stays under its size limit by dropping the oldest entries."""
+    cache = ResultCache(str(tmp_path))
+    df = pd.DataFrame({'close': range(1000)})
+    for i in range(3):
+        cache.put(str(i), df)
+        os.utime(os.path.join(str(tmp_path), f'{i}.parquet'), (i, i))
+    entry_size = cache.stats()['bytes'] // 3
+
+    cache.max_bytes = entry_size * 2
+    cache.put('3', df)
+
+    assert cache.get('0') is None and cache.get('1') is None  # Oldest entries evicted
+    assert cache.get('3') is not None
+
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_transform_arrow_backend_matches_pandas(sample_raw_data, batched):
+    """Test that the Arrow-native backend produces Arrow tables holding the pandas backend's values."""
+    pandas_cleaner = DataCleaner(sample_raw_data)
+    pandas_cleaner.transform()
+    arrow_cleaner = DataCleaner(sample_raw_data, backend='arrow')
+    arrow_cleaner.transform(batched=batched)
+
+    for symbol, data in pandas_cleaner.processed_data.items():
+        for data_type, df in data.items():
+            table = arrow_cleaner.processed_data[symbol][data_type]
+            assert isinstance(table, pa.Table)
+            pd.testing.assert_frame_equal(table.to_pandas(), df, check_dtype=False)  # Statements stay float64
+
+    assert arrow_cleaner.processed_data['AAPL']['daily'].schema.field('volume').type == pa.int64()
+
+
+def test_validate_processed_table():
+    """Test that Arrow tables are validated on their schema."""
+    table = pa.table({'date': pa.array([pd.Timestamp('2025-03-28')], pa.timestamp('ns')),
+                      'open': [221.67], 'close': [217.9], 'volume': pa.array(['39818617'])})
+
+    assert validate_processed_data(table, 'daily')["message"] == "Column 'volume' must be numeric."
+    assert not validate_processed_data(table.set_column(3, 'volume', pa.array([39818617])), 'daily')["error"]
+    with pytest.raises(ValueError):
+        DataCleaner({}, backend='arrow', dtype_profile='compact')  # Dtype profiles are pandas-only
+
+
+@pytest.mark.parametrize("options", [{}, {'batched': True}, {'parallel': True, 'max_workers': 2}])
+def test_transform_polars_backend_matches_pandas(sample_raw_data, options):
+    """Test that the Polars backend returns validated pandas frames equal to the pandas backend's."""
+    pandas_cleaner = DataCleaner(sample_raw_data)
+    pandas_cleaner.transform(batched=options.get('batched', False))
+    polars_cleaner = DataCleaner(sample_raw_data, backend='polars')
+    polars_cleaner.transform(**options)  # Parallel runs spawn their workers
+
+    for symbol, data in pandas_cleaner.processed_data.items():
+        assert data.keys() == polars_cleaner.processed_data[symbol].keys()  # Nothing rejected by validation
+        for data_type, df in data.items():
+            pd.testing.assert_frame_equal(polars_cleaner.processed_data[symbol][data_type], df, check_dtype=False)
+
+
+def test_pandas_backend_does_not_import_other_cleaners():
+    """Test that the Arrow and Polars cleaners are only imported when their backend is used."""
+    code = ("import sys; from scripts.data_transformation import DataCleaner; "
+            "DataCleaner.formatters('pandas'); "
+            "print('polars' in sys.modules, 'utils.cleaning.arrow_cleaners' in sys.modules); "
+            "DataCleaner.formatters('polars'); print('polars' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.split() == ["False", "False", "True"]
+
+
+def test_polars_cleaners_coerce_none_strings():
+    """Test that the Polars cleaners turn Alpha Vantage "None" strings into missing values."""
+    raw = pl.LazyFrame({'fiscalDateEnding': ['2024-09-30'], 'totalRevenue': ['1000'], 'grossProfit': ['None'],
+                        'operatingIncome': ['250'], 'ebit': [' 200 '], 'netIncome': ['150'], 'interestAndDebtExpense': ['None']})
+    cleaned = polars_cleaners.clean_income(raw).collect()
+
+    assert cleaned['gross_profit'].null_count() == 1
+    assert cleaned['operating_margin'].to_list() == [25.0]
+    assert cleaned['ebit_margin'].to_list() == [20.0]  # Padded numbers are still parsed
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+SMA_WINDOWS = (20, 50, 200)
+EMA_SPANS = (12, 26)
+VOLATILITY_WINDOW = 20
+RSI_PERIOD = 14
+TRADING_DAYS = 252
+
+# Rows of earlier closes an incremental update needs per symbol for the rolling windows
+LOOKBACK = max(max(SMA_WINDOWS), VOLATILITY_WINDOW + 1)
+
+# Recursive indicators, continued from their last stored value on incremental updates
+STATE_COLUMNS = [f'ema_{span}' for span in EMA_SPANS] + ['running_max', 'rsi_avg_gain', 'rsi_avg_loss']
+
+
+def compute_indicators(prices: pd.DataFrame, state: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Computes technical indicators for every symbol of a long-format price panel in one vectorized pass.
+
+    Indicators: daily and log returns, SMAs, EMAs, annualized rolling volatility of log returns,
+    running maximum and drawdown, and Wilder's RSI.
+
+    For an incremental update, `prices` holds the last LOOKBACK closes already processed for each
+    symbol followed by the new rows, and `state` holds the previously computed indicators. Only
+    rows dated after a symbol's last state row are returned; the EMAs, running maximum and RSI
+    averages continue from the stored values, so appending a day gives the same result as
+    recomputing the full history.
+
+    Parameters:
+    prices (pd.DataFrame): Long-format frame with 'symbol', 'date' and 'close' columns.
+    state (pd.DataFrame): Earlier output of `compute_indicators`. Only the last row per symbol is used.
+
+    Returns:
+    pd.DataFrame: One row per new (symbol, date), sorted by symbol and date.
+    """
+    prices = prices[['symbol', 'date', 'close']].sort_values(['symbol', 'date'], kind='stable', ignore_index=True)
+    prices['symbol'] = prices['symbol'].astype(object)
+    close = prices['close'].astype('float64')
+    by_symbol = close.groupby(prices['symbol'], sort=False)
+
+    indicators = prices.copy()
+    indicators['daily_return'] = by_symbol.pct_change()
+    indicators['log_return'] = np.log(close) - np.log(by_symbol.shift(1))
+
+    for window in SMA_WINDOWS:
+        indicators[f'sma_{window}'] = _per_symbol(by_symbol.rolling(window).mean())
+    log_returns = indicators['log_return'].groupby(prices['symbol'], sort=False)
+    indicators[f'volatility_{VOLATILITY_WINDOW}'] = (_per_symbol(log_returns.rolling(VOLATILITY_WINDOW).std())
+                                                     * np.sqrt(TRADING_DAYS))
+
+    # Recursive indicators only run over the new rows, seeded with the last stored state
+    last_state = None
+    is_new = pd.Series(True, index=prices.index)
+    if state is not None and not state.empty:
+        last_state = state.sort_values('date', kind='stable').groupby('symbol', sort=False, observed=True).tail(1)
+        last_state = last_state.assign(symbol=last_state['symbol'].astype(object)).set_index('symbol')
+        state_dates = prices['symbol'].map(last_state['date'])
+        is_new = state_dates.isna() | (prices['date'] > state_dates)
+
+    new = indicators[is_new].copy()
+    seeds = (lambda col: last_state[col]) if last_state is not None else (lambda col: None)
+    new_symbols, new_close = new['symbol'], new['close'].astype('float64')
+
+    for span in EMA_SPANS:
+        new[f'ema_{span}'] = _seeded(new_symbols, new_close, seeds(f'ema_{span}'),
+                                     lambda grouped: grouped.ewm(span=span, adjust=False).mean())
+    new['running_max'] = _seeded(new_symbols, new_close, seeds('running_max'), lambda grouped: grouped.cummax())
+    new['drawdown'] = new_close / new['running_max'] - 1
+
+    change = (close - by_symbol.shift(1))[is_new]
+    for column, moves in [('rsi_avg_gain', change.clip(lower=0)), ('rsi_avg_loss', (-change).clip(lower=0))]:
+        new[column] = _seeded(new_symbols, moves, seeds(column),
+                              lambda grouped: grouped.ewm(alpha=1 / RSI_PERIOD, adjust=False).mean())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        new[f'rsi_{RSI_PERIOD}'] = 100 - 100 / (1 + new['rsi_avg_gain'] / new['rsi_avg_loss'])
+
+    return new.reset_index(drop=True)
+
+
+def _per_symbol(result: pd.Series) -> pd.Series:
+    """Drops the symbol level a groupby window operation adds, restoring the original row index."""
+    return result.droplevel(0) if result.index.nlevels > 1 else result
+
+
+def _seeded(symbols: pd.Series, values: pd.Series, seeds: pd.Series, func) -> pd.Series:
+    """
+    Applies a recursive per-symbol computation to `values`, continuing from each symbol's seed.
+
+    Seeds are prepended as an extra first row of their symbol, so recursive operations such as
+    `ewm(adjust=False)` and `cummax` pick up exactly where the previous run stopped.
+    """
+    frame = pd.DataFrame({'symbol': symbols, 'value': values})
+    if seeds is not None and len(seeds):
+        seed_frame = pd.DataFrame({'symbol': seeds.index.astype(object), 'value': seeds.to_numpy(dtype='float64')},
+                                  index=pd.RangeIndex(-len(seeds), 0))
+        frame = pd.concat([seed_frame, frame]).sort_values('symbol', kind='stable')
+
+    result = _per_symbol(func(frame.groupby('symbol', sort=False)['value']))
+    return result.reindex(values.index)
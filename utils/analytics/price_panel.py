@@ -0,0 +1,168 @@
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+
+class PricePanel:
+    """
+    Dense dates × symbols price panel stored as memory-mapped files.
+
+    Every field is a row-major float64 matrix with one row per trading day of the shared calendar
+    and one column per symbol, so a new day is appended to the end of each file and existing days
+    are updated in place. Days a symbol did not trade are NaN.
+
+    Files in `panel_dir`:
+    - `<field>.dat` for each of FIELDS
+    - `dates.npy`, the trading-day calendar as datetime64[D]
+    - `symbols.json`, the symbol of each column
+
+    The calendar is written last, so rows appended by an interrupted update are ignored and overwritten.
+    Rebuilds are written to the sibling directory `<panel_dir>.build`, renamed to `<panel_dir>.new` once
+    complete and swapped in, so a panel is never a mix of old and new files. A swap interrupted after the
+    rename is finished when the panel is next opened.
+    """
+
+    FIELDS = ('close', 'volume')
+
+    def __init__(self, panel_dir: str):
+        self.panel_dir = os.path.normpath(panel_dir)
+        if os.path.isdir(self._sibling('new')):
+            self._swap()
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self._path('dates.npy'))
+
+    @property
+    def dates(self) -> np.ndarray:
+        """The trading-day calendar, one entry per row."""
+        return np.load(self._path('dates.npy'))
+
+    @property
+    def symbols(self) -> list:
+        """The symbol of each column."""
+        with open(self._path('symbols.json')) as f:
+            return json.load(f)
+
+    def field(self, name: str, mode: str = 'r') -> np.memmap:
+        """
+        Returns one field as a memory-mapped (dates, symbols) matrix.
+
+        Parameters:
+        name (str): One of FIELDS.
+        mode (str): 'r' for read-only access, 'r+' to update values in place.
+        """
+        shape = (len(self.dates), len(self.symbols))
+        if not shape[0] or not shape[1]:
+            return np.empty(shape)
+        return np.memmap(self._path(f'{name}.dat'), dtype='float64', mode=mode, shape=shape)
+
+    def frame(self, name: str) -> pd.DataFrame:
+        """Returns one field as a DataFrame indexed by date with a column per symbol, backed by the memory map."""
+        return pd.DataFrame(self.field(name), index=pd.DatetimeIndex(self.dates), columns=self.symbols, copy=False)
+
+    def to_long(self) -> pd.DataFrame:
+        """Returns the panel as a long-format frame with 'symbol', 'date' and one column per field."""
+        dates, symbols = self.dates, self.symbols
+        long_df = pd.DataFrame({'symbol': np.tile(np.array(symbols, dtype=object), len(dates)),
+                                'date': np.repeat(dates.astype('datetime64[ns]'), len(symbols))})
+        for name in self.FIELDS:
+            long_df[name] = np.asarray(self.field(name)).ravel()
+        return long_df.dropna(subset=list(self.FIELDS), how='all').reset_index(drop=True)
+
+    def update(self, prices: pd.DataFrame):
+        """
+        Adds long-format prices to the panel.
+
+        Days after the end of the calendar are appended and days already in it are overwritten
+        in place. New symbols and days that fall inside or before the calendar change the
+        shape of the matrices, so the panel is rebuilt in those cases.
+
+        Parameters:
+        prices (pd.DataFrame): Long-format frame with 'symbol', 'date' and FIELDS columns.
+        """
+        prices = prices[['symbol', 'date', *self.FIELDS]].dropna(subset=['date'])
+        prices = prices.assign(symbol=prices['symbol'].astype(object))
+        if prices.empty:
+            return
+        if not self.exists:
+            return self._write(prices)
+
+        dates, symbols = self.dates, pd.Index(self.symbols)
+        new_dates = np.unique(_days(prices['date']))
+        new_dates = new_dates[~np.isin(new_dates, dates)]
+        if (symbols.get_indexer(prices['symbol'].unique()) < 0).any() or (len(new_dates) and new_dates[0] <= dates[-1]):
+            combined = pd.concat([self.to_long(), prices])
+            return self._write(combined.drop_duplicates(['symbol', 'date'], keep='last'))
+
+        if len(new_dates):
+            blank = np.full((len(new_dates), len(symbols)), np.nan).tobytes()
+            for name in self.FIELDS:
+                with open(self._path(f'{name}.dat'), 'r+b') as f:
+                    f.truncate(len(dates) * len(symbols) * 8)  # Drop rows of an interrupted update
+                    f.seek(0, os.SEEK_END)
+                    f.write(blank)
+            dates = np.concatenate([dates, new_dates])
+
+        rows = np.searchsorted(dates, _days(prices['date']))
+        columns = symbols.get_indexer(prices['symbol'])
+        for name in self.FIELDS:
+            matrix = np.memmap(self._path(f'{name}.dat'), dtype='float64', mode='r+', shape=(len(dates), len(symbols)))
+            matrix[rows, columns] = prices[name].to_numpy(dtype='float64')
+            matrix.flush()
+            del matrix
+
+        if len(new_dates):
+            self._save_dates(dates)
+
+    def _write(self, prices: pd.DataFrame):
+        """Builds the panel from scratch from long-format prices in a sibling directory, then swaps it in."""
+        build_dir = self._sibling('build')
+        shutil.rmtree(build_dir, ignore_errors=True)  # Left behind by an interrupted rebuild
+        os.makedirs(build_dir)
+        days = _days(prices['date'])
+        dates = np.unique(days)
+        symbols = pd.Index(pd.unique(prices['symbol']))
+        rows = np.searchsorted(dates, days)
+        columns = symbols.get_indexer(prices['symbol'])
+
+        for name in self.FIELDS:
+            matrix = np.full((len(dates), len(symbols)), np.nan)
+            matrix[rows, columns] = prices[name].to_numpy(dtype='float64')
+            matrix.tofile(os.path.join(build_dir, f'{name}.dat'))
+
+        with open(os.path.join(build_dir, 'symbols.json'), 'w') as f:
+            json.dump(list(symbols), f)
+        np.save(os.path.join(build_dir, 'dates.npy'), dates)
+
+        os.replace(build_dir, self._sibling('new'))
+        self._swap()
+
+    def _swap(self):
+        """Replaces the panel directory with the complete rebuild in `<panel_dir>.new`."""
+        old_dir = self._sibling('old')
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(self.panel_dir):
+            os.replace(self.panel_dir, old_dir)
+        os.replace(self._sibling('new'), self.panel_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    def _save_dates(self, dates: np.ndarray):
+        """Atomically replaces the calendar, which commits the rows written before it."""
+        temp_path = self._path('dates.npy.tmp')
+        with open(temp_path, 'wb') as f:
+            np.save(f, dates)
+        os.replace(temp_path, self._path('dates.npy'))
+
+    def _path(self, file_name: str) -> str:
+        return os.path.join(self.panel_dir, file_name)
+
+    def _sibling(self, suffix: str) -> str:
+        return f'{self.panel_dir}.{suffix}'
+
+
+def _days(dates: pd.Series) -> np.ndarray:
+    """Converts a date column to calendar days, the resolution of the panel calendar."""
+    return pd.to_datetime(dates).to_numpy().astype('datetime64[D]')
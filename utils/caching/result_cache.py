@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.cleaning.data_cleaners import CLEANER_VERSION
+
+
+class ResultCache:
+    """
+    Content-addressed on-disk cache of cleaned DataFrames.
+
+    Entries are keyed by a hash of the raw payload, the data type, the cleaner version and any
+    option that changes the output, and stored as Parquet files. When the cache grows past
+    `max_bytes`, the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024, version: str = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = version or CLEANER_VERSION
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, data, data_type: str, *options) -> str:
+        """Returns the cache key of a raw payload for a data type and the given cleaning options."""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(data, sort_keys=True, default=str).encode())
+        digest.update(json.dumps([data_type, self.version, *options], default=str).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str, arrow: bool = False):
+        """Returns the cached DataFrame (or Arrow table with arrow=True) for a key, or None on a miss."""
+        file_path = self._path(key)
+        try:
+            df = pq.read_table(file_path) if arrow else pd.read_parquet(file_path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        os.utime(file_path)  # Mark as recently used for eviction
+        self.hits += 1
+        return df
+
+    def put(self, key: str, df):
+        """Stores a DataFrame or Arrow table under a key, then evicts old entries if the cache is over its size limit."""
+        file_path = self._path(key)
+        temp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        if isinstance(df, pa.Table):
+            pq.write_table(df, temp_path)
+        else:
+            df.to_parquet(temp_path, index=False)
+        os.replace(temp_path, file_path)  # Atomic, so concurrent readers never see a partial file
+        self._evict()
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """Returns the lookup counters, hit rate and current size of the cache."""
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries)
+        }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def _entries(self) -> list:
+        """Returns (path, size, last use) for every cache entry."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".parquet"):
+                stat = entry.stat()
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """Removes the least recently used entries until the cache fits in max_bytes."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for file_path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            total -= size
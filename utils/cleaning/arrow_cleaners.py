@@ -0,0 +1,165 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from utils.cleaning.data_cleaners import (DAILY_COLUMNS, INFO_KEYS, BALANCE_COLUMN_MAP, BALANCE_NUMERIC_COLUMNS,
+                                          INCOME_COLUMN_MAP, INCOME_NUMERIC_COLUMNS, CASH_COLUMN_MAP,
+                                          CASH_NUMERIC_COLUMNS, INFO_COLUMN_MAP, INFO_STRING_COLUMNS)
+
+# Matches the number formats Alpha Vantage sends; anything else ("None", "", "-") becomes null
+NUMBER_PATTERN = r'^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$'
+
+DATE_TYPE = pa.timestamp('ns')
+
+STATEMENT_COLUMNS = {
+    'balance': (BALANCE_COLUMN_MAP, BALANCE_NUMERIC_COLUMNS),
+    'income': (INCOME_COLUMN_MAP, INCOME_NUMERIC_COLUMNS),
+    'cash': (CASH_COLUMN_MAP, CASH_NUMERIC_COLUMNS)
+}
+
+
+def format_daily_arrow(data, data_type):
+    """Format JSON stock data gotten from the Alpha Vantage API into an Arrow table."""
+
+    time_series = data.get('Time Series (Daily)', None)
+    return pa.table(_daily_arrays(list(time_series.keys()), list(time_series.values())))
+
+
+
+def format_daily_arrow_batch(payloads: dict, data_type: str = 'daily') -> pa.Table:
+    """Format the daily JSON data of many symbols into one Arrow table with a dictionary-encoded 'symbol' column."""
+
+    series = [payload.get('Time Series (Daily)', None) for payload in payloads.values()]
+
+    arrays = {'symbol': _symbol_array(list(payloads), [len(time_series) for time_series in series])}
+    arrays.update(_daily_arrays([date for time_series in series for date in time_series.keys()],
+                                [row for time_series in series for row in time_series.values()]))
+    return pa.table(arrays)
+
+
+
+def format_financial_arrow(data, data_type):
+    """Format JSON financial data gotten from the Alpha Vantage API into an Arrow table."""
+
+    statement = data.get('annualReports', None)
+    return clean_statement_arrow(pa.Table.from_pylist(statement), data_type)
+
+
+
+def format_financial_arrow_batch(payloads: dict, data_type: str) -> pa.Table:
+    """Format the financial JSON data of many symbols into one Arrow table with a 'symbol' column."""
+
+    statements = [data.get('annualReports', None) or [] for data in payloads.values()]
+
+    table = pa.Table.from_pylist([report for statement in statements for report in statement])
+    table = table.append_column('symbol', _symbol_array(list(payloads), [len(statement) for statement in statements]))
+    return clean_statement_arrow(table, data_type)
+
+
+
+def format_info_arrow(data, data_type):
+    """Format JSON company data gotten from the Alpha Vantage API into an Arrow table."""
+
+    return clean_info_arrow(pa.Table.from_pylist([{key: data.get(key, None) for key in INFO_KEYS}]))
+
+
+
+def format_info_arrow_batch(payloads: dict, data_type: str = 'info') -> pa.Table:
+    """Format the company JSON data of many symbols into one Arrow table with a 'symbol' column."""
+
+    table = pa.Table.from_pylist([{key: data.get(key, None) for key in INFO_KEYS} for data in payloads.values()])
+    table = table.append_column('symbol', _symbol_array(list(payloads), [1] * len(payloads)))
+    return clean_info_arrow(table)
+
+
+
+def clean_statement_arrow(table: pa.Table, data_type: str) -> pa.Table:
+    """
+    Cleans a raw income, balance sheet or cash flow statement table with Arrow compute kernels.
+
+    Mirrors `clean_income`, `clean_balance` and `clean_cash`: the relevant columns are renamed,
+    projected and converted in one pass, then the margins or free cash flow are engineered.
+    Columns missing from the input are skipped, leaving the processed data validation to report them.
+
+    Parameters:
+    table (pa.Table): Raw statement reports, one row per report, all values as strings.
+    data_type (str): The type of statement ('income', 'balance', 'cash').
+
+    Returns:
+    pa.Table: Table with 'date' as timestamp[ns] and the numeric columns as float64.
+    """
+    column_name_map, numeric_columns = STATEMENT_COLUMNS[data_type]
+    raw_names = {new: old for old, new in column_name_map.items()}
+    arrays = {}
+
+    if 'symbol' in table.column_names:
+        arrays['symbol'] = table['symbol']
+    if raw_names['date'] in table.column_names:
+        arrays['date'] = _to_timestamp(table[raw_names['date']])
+    for col in numeric_columns:
+        if raw_names[col] in table.column_names:
+            arrays[col] = to_float(table[raw_names[col]])
+
+    if data_type == 'income' and {'gross_profit', 'operating_income', 'ebit', 'total_revenue'} <= arrays.keys():
+        for margin, numerator in [('gross_margin', 'gross_profit'), ('operating_margin', 'operating_income'),
+                                  ('ebit_margin', 'ebit')]:
+            arrays[margin] = pc.round(pc.multiply(pc.divide(arrays[numerator], arrays['total_revenue']), 100), 2)
+    elif data_type == 'cash' and {'operating_cashflow', 'capital_expenditures'} <= arrays.keys():
+        arrays['free_cashflow'] = pc.subtract(arrays['operating_cashflow'], arrays['capital_expenditures'])
+
+    return pa.table(arrays)
+
+
+
+def clean_info_arrow(table: pa.Table) -> pa.Table:
+    """Cleans a raw company overview table, mirroring `clean_info`."""
+    arrays = {}
+    if 'symbol' in table.column_names:
+        arrays['symbol'] = table['symbol']
+    for old, new in INFO_COLUMN_MAP.items():
+        if old not in table.column_names:
+            continue
+        column = table[old]
+        arrays[new] = _to_integer(to_float(column)) if new not in INFO_STRING_COLUMNS else column.cast(pa.string())
+    return pa.table(arrays)
+
+
+
+def to_float(column) -> pa.ChunkedArray:
+    """
+    Converts a column of number strings to float64, turning anything that is not a number into null.
+
+    Non-numbers are masked with a regex kernel before the cast, so no value ever raises.
+    """
+    if not pa.types.is_string(column.type) and not pa.types.is_null(column.type):
+        return pc.cast(column, pa.float64())
+    column = pc.cast(column, pa.string())
+    return pc.cast(pc.if_else(pc.match_substring_regex(column, NUMBER_PATTERN), column, None), pa.float64())
+
+
+
+def _to_timestamp(column) -> pa.ChunkedArray:
+    """Parses 'YYYY-MM-DD' strings into timestamp[ns], turning unparseable dates into null."""
+    return pc.strptime(pc.cast(column, pa.string()), format='%Y-%m-%d', unit='ns', error_is_null=True)
+
+
+
+def _daily_arrays(dates: list, rows: list) -> dict:
+    """Parses daily dates and value dicts into typed Arrow arrays keyed by processed column name."""
+    arrays = {'date': _to_timestamp(pa.array(dates, pa.string()))}
+    for key, (name, dtype) in DAILY_COLUMNS.items():
+        values = to_float(pa.array([row.get(key) for row in rows], pa.string()))
+        arrays[name] = _to_integer(values) if np.issubdtype(dtype, np.integer) else values
+    return arrays
+
+
+
+def _to_integer(values) -> pa.Array:
+    """Casts float64 counts (volume, shares) to int64, keeping float64 when values are missing like pandas does."""
+    return pc.cast(values, pa.int64()) if values.null_count == 0 else values
+
+
+
+def _symbol_array(symbols: list, lengths: list) -> pa.DictionaryArray:
+    """Builds a dictionary-encoded symbol column repeating each symbol for its number of rows."""
+    indices = pa.array(np.repeat(np.arange(len(symbols), dtype=np.int32), lengths))
+    return pa.DictionaryArray.from_arrays(indices, pa.array(symbols, pa.string()))
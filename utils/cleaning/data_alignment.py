@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+
+def stack_processed(processed_data: dict, data_type: str) -> pd.DataFrame:
+    """
+    Stacks the processed frames of one data type for every symbol into a single long-format DataFrame.
+
+    Parameters:
+    processed_data (dict): Processed data keyed by symbol, then by data type.
+                           Arrow tables (Arrow-native runs) are converted to pandas.
+    data_type (str): The type of data to stack ('daily', 'income', 'balance', 'cash', 'info').
+
+    Returns:
+    pd.DataFrame: Long-format DataFrame with a leading 'symbol' column. Empty if no symbol has the data type.
+    """
+    frames = {symbol: to_pandas(data[data_type]) for symbol, data in processed_data.items() if data_type in data}
+
+    if not frames:
+        return pd.DataFrame(columns=['symbol'])
+
+    stacked = pd.concat(frames, names=['symbol', None])
+    stacked = stacked.reset_index(level='symbol').reset_index(drop=True)
+
+    # Categoricals with different categories per symbol concatenate to object, so restore them
+    for col, dtype in next(iter(frames.values())).dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) and stacked[col].dtype == object:
+            stacked[col] = stacked[col].astype('category')
+
+    return stacked
+
+
+
+def split_by_symbol(long_df: pd.DataFrame) -> dict:
+    """
+    Splits a long-format DataFrame back into one DataFrame per symbol.
+
+    Parameters:
+    long_df (pd.DataFrame | pa.Table): Frame with a 'symbol' column, such as the output of a batched formatter.
+
+    Returns:
+    dict: Symbol to DataFrame (or Arrow table) without the 'symbol' column, in order of first appearance.
+    """
+    if isinstance(long_df, pa.Table):
+        return _split_table(long_df)
+
+    groups = long_df.groupby('symbol', sort=False, observed=True)
+    return {symbol: group.drop(columns='symbol').reset_index(drop=True) for symbol, group in groups}
+
+
+
+def align_statements(processed_data: dict) -> pd.DataFrame:
+    """
+    Aligns the processed income, balance and cash flow statements of every symbol by fiscal date.
+
+    Parameters:
+    processed_data (dict): Processed data keyed by symbol, then by data type.
+
+    Returns:
+    pd.DataFrame: One row per (symbol, date) holding the columns of all three statements.
+                  Statements missing for a row are left as NaN.
+    """
+    aligned = None
+    for data_type in ['income', 'balance', 'cash']:
+        stacked = stack_processed(processed_data, data_type)
+        if stacked.empty:
+            continue
+        aligned = stacked if aligned is None else aligned.merge(stacked, on=['symbol', 'date'], how='outer')
+
+    if aligned is None:
+        return pd.DataFrame(columns=['symbol', 'date'])
+
+    return aligned.sort_values(['symbol', 'date'], ignore_index=True)
+
+
+
+def float_column(df: pd.DataFrame, name: str) -> pd.Series:
+    """Returns a column of aligned statements as float64, or an all-NaN column when the statement did not provide it."""
+    if name in df.columns:
+        return df[name].astype('float64')
+    return pd.Series(np.nan, index=df.index)
+
+
+
+def to_pandas(data):
+    """Returns processed data as a pandas DataFrame, converting Arrow tables."""
+    return data.to_pandas() if isinstance(data, pa.Table) else data
+
+
+
+def _split_table(table: pa.Table) -> dict:
+    """Splits an Arrow table by its 'symbol' column with one sort and zero-copy slices."""
+    symbols = table['symbol'].combine_chunks()
+    if not pa.types.is_dictionary(symbols.type):
+        symbols = symbols.dictionary_encode()
+    codes = symbols.indices.to_numpy(zero_copy_only=False)
+
+    order = np.argsort(codes, kind='stable')
+    table = table.drop_columns('symbol').take(pa.array(order))
+    counts = np.bincount(codes, minlength=len(symbols.dictionary))
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    first_seen = np.unique(codes, return_index=True)
+    by_appearance = first_seen[0][np.argsort(first_seen[1])]
+    return {symbols.dictionary[code].as_py(): table.slice(offsets[code], counts[code]) for code in by_appearance}
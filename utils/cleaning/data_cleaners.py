@@ -1,25 +1,107 @@
+import numpy as np
 import pandas as pd
 from utils.exceptions.exception_handling import handle_exceptions
 from utils.logging.logger import log_info
 import json
 
 
+# Bump whenever a change to the formatters or cleaners alters their output, so cached results are recomputed
+CLEANER_VERSION = '2'
+
+DAILY_DATE_FORMAT = '%Y-%m-%d'
+
+# Alpha Vantage daily keys kept in the processed frame, with their target name and dtype
+DAILY_COLUMNS = {
+    '1. open': ('open', np.float64),
+    '4. close': ('close', np.float64),
+    '5. volume': ('volume', np.int64)
+}
+
+
 def format_daily(data, data_type):
     """Format JSON stock data gotten from the Alpha Vantage API into a pandas DataFrame."""
 
     time_series = data.get('Time Series (Daily)', None)
-    time_series_df = pd.DataFrame.from_dict(time_series, orient='index')
-    cleaned_time_series_df = clean_data(time_series_df,data_type)
+    cleaned_time_series_df = build_daily_frame(time_series)
 
     return cleaned_time_series_df
 
 
 
+def build_daily_frame(time_series: dict) -> pd.DataFrame:
+    """
+    Builds a cleaned daily stock DataFrame straight from the Alpha Vantage time series.
+
+    Each output column is parsed once into a typed NumPy array (datetime64 dates, float64 prices,
+    int64 volume), so no intermediate object-dtype frame is created and no column is copied
+    by later drop, reset_index or rename steps.
+
+    Parameters:
+    time_series (dict): The 'Time Series (Daily)' mapping of date strings to daily values.
+
+    Returns:
+    pd.DataFrame: DataFrame with 'date', 'open', 'close' and 'volume' columns, in API order.
+    """
+    columns = _daily_columns(list(time_series.keys()), list(time_series.values()))
+
+    return pd.DataFrame(columns, copy=False)
+
+
+
+def format_daily_batch(payloads: dict, data_type: str = 'daily') -> pd.DataFrame:
+    """
+    Format the daily JSON data of many symbols into a single long-format DataFrame.
+
+    All symbols' rows are parsed together, so every column is converted in one vectorized pass.
+
+    Parameters:
+    payloads (dict): Raw daily payloads keyed by symbol.
+    data_type (str): Always 'daily', kept for symmetry with the other formatters.
+
+    Returns:
+    pd.DataFrame: DataFrame with a categorical 'symbol' column followed by the `build_daily_frame` columns.
+    """
+    series = [payload.get('Time Series (Daily)', None) for payload in payloads.values()]
+    lengths = [len(time_series) for time_series in series]
+
+    columns = {'symbol': _symbol_column(list(payloads), lengths)}
+    columns.update(_daily_columns([date for time_series in series for date in time_series.keys()],
+                                  [row for time_series in series for row in time_series.values()]))
+
+    return pd.DataFrame(columns, copy=False)
+
+
+
+def _daily_columns(dates: list, rows: list) -> dict:
+    """Parses daily dates and value dicts into typed NumPy arrays keyed by processed column name."""
+    columns = {'date': pd.to_datetime(dates, format=DAILY_DATE_FORMAT, errors='coerce')}
+
+    for key, (name, dtype) in DAILY_COLUMNS.items():
+        values = [row.get(key) for row in rows]
+        try:
+            columns[name] = np.array(values, dtype=dtype)
+        except (TypeError, ValueError):
+            # Only reached for malformed values the raw validation let through
+            columns[name] = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy()
+
+    return columns
+
+
+
+def _symbol_column(symbols: list, lengths: list) -> pd.Categorical:
+    """Builds a categorical symbol column repeating each symbol for its number of rows."""
+    codes = np.repeat(np.arange(len(symbols)), lengths)
+    return pd.Categorical.from_codes(codes, categories=symbols)
+
+
+
+INFO_KEYS = ['Name', 'SharesOutstanding','Symbol', 'Exchange','Currency','Country','Sector']
+
+
 def format_info(data, data_type):
     """Format JSON company gotten from the Alpha Vantage API into a pandas DataFrame."""
 
-    keys = ['Name', 'SharesOutstanding','Symbol', 'Exchange','Currency','Country','Sector']
-    info = {key: data.get(key, None) for key in keys}
+    info = {key: data.get(key, None) for key in INFO_KEYS}
 
     info_df = pd.DataFrame([info])
     cleaned_info_df = clean_data(info_df,data_type)
@@ -40,6 +122,152 @@ def format_financial(data, data_type):
     return cleaned_statement_df 
 
 
+
+def format_info_batch(payloads: dict, data_type: str = 'info') -> pd.DataFrame:
+    """Format the company JSON data of many symbols into one DataFrame with a 'symbol' column."""
+
+    info_df = pd.DataFrame([{key: data.get(key, None) for key in INFO_KEYS} for data in payloads.values()])
+    info_df['symbol'] = _symbol_column(list(payloads), [1] * len(payloads))
+    cleaned_info_df = clean_data(info_df,data_type)
+
+    return cleaned_info_df
+
+
+
+def format_financial_batch(payloads: dict, data_type: str) -> pd.DataFrame:
+    """
+    Format the financial JSON data of many symbols into a single long-format DataFrame.
+
+    The reports of every symbol are cleaned together, so renaming, numeric conversion and the
+    engineered margins or free cash flow are computed once for all symbols.
+
+    Parameters:
+    payloads (dict): Raw statement payloads of one data type, keyed by symbol.
+    data_type (str): The type of statement ('income', 'balance', 'cash').
+
+    Returns:
+    pd.DataFrame: Cleaned statements with a leading categorical 'symbol' column.
+    """
+    statements = [data.get('annualReports', None) or [] for data in payloads.values()]
+
+    statement_df = pd.DataFrame.from_records([report for statement in statements for report in statement])
+    statement_df['symbol'] = _symbol_column(list(payloads), [len(statement) for statement in statements])
+    cleaned_statement_df = clean_data(statement_df,data_type)
+
+    return cleaned_statement_df
+
+
+def slice_after_watermark(data: dict, data_type: str, watermark) -> dict:
+    """
+    Returns a copy of a raw payload holding only the rows dated strictly after a watermark.
+
+    Dates are compared as 'YYYY-MM-DD' strings, so the delta is found without parsing the history.
+
+    Parameters:
+    data (dict): Raw API payload. It is not modified.
+    data_type (str): The type of data ('daily', 'income', 'balance', 'cash', 'info').
+    watermark (str | datetime | None): Last date already processed. None keeps every row.
+
+    Returns:
+    dict: Payload restricted to the new rows. 'info' payloads are returned unchanged.
+    """
+    if watermark is None or data_type == 'info' or not isinstance(data, dict):
+        return data
+
+    watermark = pd.Timestamp(watermark).strftime(DAILY_DATE_FORMAT)
+    delta = dict(data)
+
+    if data_type == 'daily' and isinstance(data.get('Time Series (Daily)'), dict):
+        delta['Time Series (Daily)'] = {date: values for date, values in data['Time Series (Daily)'].items()
+                                        if str(date) > watermark}
+    elif isinstance(data.get('annualReports'), list):
+        delta['annualReports'] = [report for report in data['annualReports']
+                                  if not isinstance(report, dict) or str(report.get('fiscalDateEnding')) > watermark]
+    return delta
+
+
+def is_empty_payload(data: dict, data_type: str) -> bool:
+    """Returns True when a daily or statement payload has no rows left, e.g. after slicing to a watermark."""
+    if not isinstance(data, dict) or data_type == 'info':
+        return False
+    rows = data.get('Time Series (Daily)') if data_type == 'daily' else data.get('annualReports')
+    return rows is not None and len(rows) == 0
+
+
+
+DTYPE_PROFILES = ['default', 'compact']
+
+FLOAT32_TOLERANCE = 0.005  # Half a cent, the database stores two decimals
+INTEGER_COLUMNS = ['volume', 'total_shares']
+CATEGORICAL_COLUMNS = ['ticker_symbol', 'exchange', 'currency', 'country', 'sector']
+
+
+def apply_dtype_profile(df: pd.DataFrame, dtype_profile: str = 'default') -> pd.DataFrame:
+    """
+    Converts a processed DataFrame to the requested dtype profile.
+
+    Parameters:
+    df (pd.DataFrame): A processed DataFrame.
+    dtype_profile (str): 'default' keeps the cleaners' dtypes, 'compact' applies `compact_dtypes`.
+
+    Returns:
+    pd.DataFrame: The DataFrame in the requested profile.
+
+    Raises:
+    ValueError: If an unknown profile is passed.
+    """
+    if dtype_profile not in DTYPE_PROFILES:
+        raise ValueError(f"Unknown dtype profile '{dtype_profile}'. Expected one of {DTYPE_PROFILES}")
+
+    if dtype_profile == 'compact':
+        return compact_dtypes(df)
+    return df
+
+
+
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns a copy of a processed DataFrame using the smallest dtypes that keep its values:
+    - Volumes and share counts become unsigned integers (nullable Int64 when values are missing).
+    - Floats become float32 when every value round-trips within FLOAT32_TOLERANCE.
+    - Low-cardinality strings (ticker, exchange, currency, ...) become categoricals.
+    - Remaining strings become Arrow-backed strings.
+
+    Parameters:
+    df (pd.DataFrame): A processed DataFrame.
+
+    Returns:
+    pd.DataFrame: DataFrame with compact dtypes. Dates are left untouched.
+    """
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+
+        if col in INTEGER_COLUMNS and pd.api.types.is_numeric_dtype(series):
+            if series.isna().any():
+                columns[col] = series.astype('Int64')
+            else:
+                columns[col] = pd.to_numeric(series, downcast='unsigned' if (series >= 0).all() else 'integer')
+
+        elif pd.api.types.is_float_dtype(series) or pd.api.types.is_integer_dtype(series):
+            values = series.to_numpy(dtype=np.float64)
+            narrowed = values.astype(np.float32)
+            fits = np.allclose(narrowed, values, rtol=0, atol=FLOAT32_TOLERANCE, equal_nan=True)
+            columns[col] = pd.Series(narrowed, index=series.index) if fits else series
+
+        elif series.dtype == object and col in CATEGORICAL_COLUMNS and series.notna().any():
+            columns[col] = series.astype('category')
+
+        elif series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty'):
+            columns[col] = series.astype('string[pyarrow]')
+
+        else:
+            columns[col] = series
+
+    return pd.DataFrame(columns, index=df.index)
+
+
+
 @log_info
 @handle_exceptions
 def clean_data(df: pd.DataFrame, data_type: str) -> pd.DataFrame:
@@ -82,7 +310,9 @@ def clean_daily(df):
     - Dropping unnecessary columns ('2. high', '3. low').
     - Converting the index to datetime format.
     - Renaming columns to more readable names.
-    - Ensuring 'Open', 'Close', and 'Volume' columns have the correct data type (float64).
+    - Ensuring 'Open', 'Close', and 'Volume' columns have a numeric data type.
+
+    The input DataFrame is left untouched.
 
     Parameters:
     df (pd.DataFrame): DataFrame containing stock market data with specific column names.
@@ -90,23 +320,67 @@ def clean_daily(df):
     Returns:
     pd.DataFrame: Cleaned DataFrame with updated column names and data types.
     """
-    df.drop(columns=[ '2. high', '3. low'], inplace=True, errors='ignore')
-    df.index.name = 'date'
-    df.reset_index(inplace=True)
-    df['date'] = pd.to_datetime(df['date'], errors="coerce")
-
-    
-
-    df.rename(columns={
+    column_name_map = {
         "1. open": "open",
         "4. close": "close",
         "5. volume": "volume"
-    }, inplace=True)
-
-    df[['open','close','volume']] = df[['open','close','volume']].apply(pd.to_numeric, errors="coerce")
-
-    return df
+    }
 
+    columns = {'date': pd.to_datetime(df.index, errors="coerce")}
+    columns.update(_convert_columns(df, column_name_map, list(column_name_map.values())))
+
+    return pd.DataFrame(columns, copy=False)
+
+
+
+# Alpha Vantage statement keys and their processed names
+BALANCE_COLUMN_MAP = {
+    'fiscalDateEnding': 'date',
+    'reportedCurrency': 'reported_currency',
+    'totalAssets': 'total_assets',
+    'totalCurrentAssets': 'total_current_assets',
+    'cashAndCashEquivalentsAtCarryingValue': 'cash_and_cash_equivalents',
+    'cashAndShortTermInvestments': 'cash_and_short_term_investments',
+    'inventory': 'inventory',
+    'currentNetReceivables': 'current_net_receivables',
+    'totalNonCurrentAssets': 'total_non_current_assets',
+    'propertyPlantEquipment': 'property_plant_and_equipment',
+    'accumulatedDepreciationAmortizationPPE': 'accumulated_depreciation_on_ppe',
+    'intangibleAssets': 'intangible_assets',
+    'intangibleAssetsExcludingGoodwill': 'intangible_assets_excl_goodwill',
+    'goodwill': 'goodwill',
+    'investments': 'investments',
+    'longTermInvestments': 'long_term_investments',
+    'shortTermInvestments': 'short_term_investments',
+    'otherCurrentAssets': 'other_current_assets',
+    'otherNonCurrentAssets': 'other_non_current_assets',
+    'totalLiabilities': 'total_liabilities',
+    'totalCurrentLiabilities': 'total_current_liabilities',
+    'currentAccountsPayable': 'current_accounts_payable',
+    'deferredRevenue': 'deferred_revenue',
+    'currentDebt': 'current_debt',
+    'shortTermDebt': 'short_term_debt',
+    'totalNonCurrentLiabilities': 'total_non_current_liabilities',
+    'capitalLeaseObligations': 'capital_lease_obligations',
+    'longTermDebt': 'long_term_debt',
+    'currentLongTermDebt': 'current_long_term_debt',
+    'longTermDebtNoncurrent': 'non_current_long_term_debt',
+    'shortLongTermDebtTotal': 'total_short_long_term_debt',
+    'otherCurrentLiabilities': 'other_current_liabilities',
+    'otherNonCurrentLiabilities': 'other_non_current_liabilities',
+    'totalShareholderEquity': 'total_shareholder_equity',
+    'treasuryStock': 'treasury_stock',
+    'retainedEarnings': 'retained_earnings',
+    'commonStock': 'common_stock',
+    'commonStockSharesOutstanding': 'common_stock_shares_outstanding'
+}
+
+# Relevant columns kept in the processed frame, all of them numeric apart from 'date'
+BALANCE_NUMERIC_COLUMNS = [
+    'total_current_assets', 'total_non_current_assets', 'total_current_liabilities',
+    'total_non_current_liabilities', 'total_shareholder_equity', 'short_term_debt',
+    'long_term_debt', 'retained_earnings', 'cash_and_cash_equivalents'
+]
 
 
 def clean_balance(df):
@@ -117,261 +391,266 @@ def clean_balance(df):
     - Converting 'fiscalDateEnding' to datetime format.
     - Ensuring numeric columns are properly cast to float64.
 
+    The input DataFrame is left untouched.
+
     Parameters:
     df (pd.DataFrame): DataFrame containing balance sheet data.
 
     Returns:
     pd.DataFrame: Cleaned DataFrame with relevant columns and correct data types.
     """
-  
-    column_name_map = {
-        'fiscalDateEnding': 'date',
-        'reportedCurrency': 'reported_currency',
-        'totalAssets': 'total_assets',
-        'totalCurrentAssets': 'total_current_assets',
-        'cashAndCashEquivalentsAtCarryingValue': 'cash_and_cash_equivalents',
-        'cashAndShortTermInvestments': 'cash_and_short_term_investments',
-        'inventory': 'inventory',
-        'currentNetReceivables': 'current_net_receivables',
-        'totalNonCurrentAssets': 'total_non_current_assets',
-        'propertyPlantEquipment': 'property_plant_and_equipment',
-        'accumulatedDepreciationAmortizationPPE': 'accumulated_depreciation_on_ppe',
-        'intangibleAssets': 'intangible_assets',
-        'intangibleAssetsExcludingGoodwill': 'intangible_assets_excl_goodwill',
-        'goodwill': 'goodwill',
-        'investments': 'investments',
-        'longTermInvestments': 'long_term_investments',
-        'shortTermInvestments': 'short_term_investments',
-        'otherCurrentAssets': 'other_current_assets',
-        'otherNonCurrentAssets': 'other_non_current_assets',
-        'totalLiabilities': 'total_liabilities',
-        'totalCurrentLiabilities': 'total_current_liabilities',
-        'currentAccountsPayable': 'current_accounts_payable',
-        'deferredRevenue': 'deferred_revenue',
-        'currentDebt': 'current_debt',
-        'shortTermDebt': 'short_term_debt',
-        'totalNonCurrentLiabilities': 'total_non_current_liabilities',
-        'capitalLeaseObligations': 'capital_lease_obligations',
-        'longTermDebt': 'long_term_debt',
-        'currentLongTermDebt': 'current_long_term_debt',
-        'longTermDebtNoncurrent': 'non_current_long_term_debt',
-        'shortLongTermDebtTotal': 'total_short_long_term_debt',
-        'otherCurrentLiabilities': 'other_current_liabilities',
-        'otherNonCurrentLiabilities': 'other_non_current_liabilities',
-        'totalShareholderEquity': 'total_shareholder_equity',
-        'treasuryStock': 'treasury_stock',
-        'retainedEarnings': 'retained_earnings',
-        'commonStock': 'common_stock',
-        'commonStockSharesOutstanding': 'common_stock_shares_outstanding'
-    }
+    columns = _convert_columns(df, BALANCE_COLUMN_MAP, BALANCE_NUMERIC_COLUMNS)
+
+    return pd.DataFrame(columns, copy=False)
+
+
+
+INCOME_COLUMN_MAP = {
+    'fiscalDateEnding': 'date',
+    'reportedCurrency': 'reported_currency',
+    'grossProfit': 'gross_profit',
+    'totalRevenue': 'total_revenue',
+    'costOfRevenue': 'cost_of_revenue',
+    'costofGoodsAndServicesSold': 'cost_of_goods_and_services_sold',
+    'operatingIncome': 'operating_income',
+    'sellingGeneralAndAdministrative': 'selling_general_and_administrative',
+    'researchAndDevelopment': 'research_and_development',
+    'operatingExpenses': 'operating_expenses',
+    'investmentIncomeNet': 'investment_income_net',
+    'netInterestIncome': 'net_interest_income',
+    'interestIncome': 'interest_income',
+    'interestExpense': 'interest_expense',
+    'nonInterestIncome': 'non_interest_income',
+    'otherNonOperatingIncome': 'other_non_operating_income',
+    'depreciation': 'depreciation',
+    'depreciationAndAmortization': 'depreciation_and_amortization',
+    'incomeBeforeTax': 'income_before_tax',
+    'incomeTaxExpense': 'income_tax_expense',
+    'interestAndDebtExpense': 'interest_and_debt_expense',
+    'netIncomeFromContinuingOperations': 'net_income_from_continuing_operations',
+    'comprehensiveIncomeNetOfTax': 'comprehensive_income_net_of_tax',
+    'ebit': 'ebit',
+    'ebitda': 'ebitda',
+    'netIncome': 'net_income'
+}
+
+# Relevant columns kept in the processed frame, all of them numeric apart from 'date'
+INCOME_NUMERIC_COLUMNS = [
+    'total_revenue', 'gross_profit',
+    'operating_income', 'net_income',
+    'interest_and_debt_expense', 'ebit'
+]
 
-    df.rename(columns=column_name_map, inplace=True)
 
-    # Define and select relevant columns
-    columns_to_keep = [
-            'date', 'total_current_assets', 'total_non_current_assets',
-            'total_current_liabilities', 'total_non_current_liabilities',
-            'total_shareholder_equity', 'short_term_debt', 'long_term_debt',
-            'retained_earnings', 'cash_and_cash_equivalents'
-        ]
-    
-    # Using `.filter()` to prevent KeyError if a column is missing
-    df = df.filter(items=columns_to_keep)
-    
-    df['date'] = pd.to_datetime(df['date'])
+def clean_income(df):
+    """
+    Cleans an income statement DataFrame by:
+    - Renaming columns to more readable names.
+    - Selecting only relevant columns.
+    - Converting 'fiscalDateEnding' to datetime format.
+    - Ensuring numeric columns are properly cast to float64.
+    - Engineering new columns.
 
-    # Convert financial values to float64 safely
-    numeric_columns = [
-        'total_current_assets', 'total_non_current_assets', 'total_current_liabilities',
-        'total_non_current_liabilities', 'total_shareholder_equity', 'short_term_debt',
-        'long_term_debt', 'retained_earnings', 'cash_and_cash_equivalents'
-    ]   
+    The input DataFrame is left untouched.
 
-    df[numeric_columns] = df[numeric_columns].apply(pd.to_numeric, errors="coerce")
+    Parameters:
+    df (pd.DataFrame): DataFrame containing balance sheet data.
 
-    return df
+    Returns:
+    pd.DataFrame: Cleaned DataFrame with relevant columns and correct data types.
+    """
+    columns = _convert_columns(df, INCOME_COLUMN_MAP, INCOME_NUMERIC_COLUMNS)
 
+    # Engineer columns 
+    with np.errstate(divide='ignore', invalid='ignore'):
+        columns['gross_margin'] = ((columns['gross_profit']/columns['total_revenue']) * 100).round(2)
+        columns['operating_margin'] = ((columns['operating_income']/columns['total_revenue']) * 100).round(2)
+        columns['ebit_margin'] = ((columns['ebit']/columns['total_revenue']) * 100).round(2)
+
+    return pd.DataFrame(columns, copy=False)
+
+
+
+CASH_COLUMN_MAP = {
+    'fiscalDateEnding': 'date',
+    'reportedCurrency': 'reported_currency',
+    'operatingCashflow': 'operating_cashflow',
+    'paymentsForOperatingActivities': 'payments_for_operating_activities',
+    'proceedsFromOperatingActivities': 'proceeds_from_operating_activities',
+    'changeInOperatingLiabilities': 'change_in_operating_liabilities',
+    'changeInOperatingAssets': 'change_in_operating_assets',
+    'depreciationDepletionAndAmortization': 'depreciation_depletion_and_amortization',
+    'capitalExpenditures': 'capital_expenditures',
+    'changeInReceivables': 'change_in_receivables',
+    'changeInInventory': 'change_in_inventory',
+    'profitLoss': 'profit_loss',
+    'cashflowFromInvestment': 'cashflow_from_investment',
+    'cashflowFromFinancing': 'cashflow_from_financing',
+    'proceedsFromRepaymentsOfShortTermDebt': 'debt_repayments',
+    'paymentsForRepurchaseOfCommonStock': 'payments_for_repurchase_of_common_stock',
+    'paymentsForRepurchaseOfEquity': 'payments_for_repurchase_of_equity',
+    'paymentsForRepurchaseOfPreferredStock': 'payments_for_repurchase_of_preferred_stock',
+    'dividendPayout': 'dividend_payout',
+    'dividendPayoutCommonStock': 'dividend_payout_common_stock',
+    'dividendPayoutPreferredStock': 'dividend_payout_preferred_stock',
+    'proceedsFromIssuanceOfCommonStock': 'proceeds_from_issuance_of_common_stock',
+    'proceedsFromIssuanceOfLongTermDebtAndCapitalSecuritiesNet': 'proceeds_from_issuance_of_long_term_debt_and_capital_securities_net',
+    'proceedsFromIssuanceOfPreferredStock': 'proceeds_from_issuance_of_preferred_stock',
+    'proceedsFromRepurchaseOfEquity': 'proceeds_from_repurchase_of_equity',
+    'proceedsFromSaleOfTreasuryStock': 'proceeds_from_sale_of_treasury_stock',
+    'changeInCashAndCashEquivalents': 'change_in_cash_and_cash_equivalents',
+    'changeInExchangeRate': 'change_in_exchange_rate',
+    'netIncome': 'net_income'
+}
+
+# Relevant columns kept in the processed frame, all of them numeric apart from 'date'
+CASH_NUMERIC_COLUMNS = [
+    'operating_cashflow', 'capital_expenditures',
+    'cashflow_from_investment', 'cashflow_from_financing',
+    'dividend_payout', 'debt_repayments'
+]
 
 
-def clean_income(df):
+def clean_cash(df):
     """
-    Cleans an income statement DataFrame by:
+    Cleans an cash flow statement DataFrame by:
     - Renaming columns to more readable names.
     - Selecting only relevant columns.
     - Converting 'fiscalDateEnding' to datetime format.
     - Ensuring numeric columns are properly cast to float64.
     - Engineering new columns.
 
+    The input DataFrame is left untouched.
+
     Parameters:
     df (pd.DataFrame): DataFrame containing balance sheet data.
 
     Returns:
     pd.DataFrame: Cleaned DataFrame with relevant columns and correct data types.
     """
+    columns = _convert_columns(df, CASH_COLUMN_MAP, CASH_NUMERIC_COLUMNS)
 
-    column_name_map = {
-        'fiscalDateEnding': 'date',
-        'reportedCurrency': 'reported_currency',
-        'grossProfit': 'gross_profit',
-        'totalRevenue': 'total_revenue',
-        'costOfRevenue': 'cost_of_revenue',
-        'costofGoodsAndServicesSold': 'cost_of_goods_and_services_sold',
-        'operatingIncome': 'operating_income',
-        'sellingGeneralAndAdministrative': 'selling_general_and_administrative',
-        'researchAndDevelopment': 'research_and_development',
-        'operatingExpenses': 'operating_expenses',
-        'investmentIncomeNet': 'investment_income_net',
-        'netInterestIncome': 'net_interest_income',
-        'interestIncome': 'interest_income',
-        'interestExpense': 'interest_expense',
-        'nonInterestIncome': 'non_interest_income',
-        'otherNonOperatingIncome': 'other_non_operating_income',
-        'depreciation': 'depreciation',
-        'depreciationAndAmortization': 'depreciation_and_amortization',
-        'incomeBeforeTax': 'income_before_tax',
-        'incomeTaxExpense': 'income_tax_expense',
-        'interestAndDebtExpense': 'interest_and_debt_expense',
-        'netIncomeFromContinuingOperations': 'net_income_from_continuing_operations',
-        'comprehensiveIncomeNetOfTax': 'comprehensive_income_net_of_tax',
-        'ebit': 'ebit',
-        'ebitda': 'ebitda',
-        'netIncome': 'net_income'
-    }
+    # Engineer columns 
+    columns['free_cashflow'] = (columns['operating_cashflow']-columns['capital_expenditures'])
 
-    df.rename(columns=column_name_map, inplace=True)
+    return pd.DataFrame(columns, copy=False)
 
-    # Define and select relevant columns
-    columns_to_keep = [
-        'date', 'total_revenue', 'gross_profit',
-        'operating_income', 'net_income',
-        'interest_and_debt_expense', 'ebit'
-    ]
 
-    # Using `.filter()` to prevent KeyError if a column is missing
-    df = df.filter(items=columns_to_keep)
 
-    df['date'] = pd.to_datetime(df['date'])
+INFO_COLUMN_MAP = {
+    'Name': 'name',
+    'SharesOutstanding': 'total_shares',
+    'Symbol': 'ticker_symbol',
+    'Exchange':'exchange',
+    'Currency': 'currency',
+    'Country': 'country',
+    'Sector': 'sector'
+}
 
-    # Convert financial values to float64 safely
-    numeric_columns = [
-        'total_revenue', 'gross_profit',
-        'operating_income', 'net_income',
-        'interest_and_debt_expense', 'ebit'
-    ]
+INFO_STRING_COLUMNS = ['name', 'ticker_symbol', 'exchange', 'currency', 'country', 'sector']
 
-    df[numeric_columns] = df[numeric_columns].apply(pd.to_numeric, errors="coerce")
 
-    # Engineer columns 
-    df['gross_margin'] = ((df['gross_profit']/df['total_revenue']) * 100).round(2)
-    df['operating_margin'] = ((df['operating_income']/df['total_revenue']) * 100).round(2)
-    df['ebit_margin'] = ((df['ebit']/df['total_revenue']) * 100).round(2)
+def clean_info(df):
+    """
+    Cleans company overview data.
+    
+    - Renames columns to follow snake_case naming convention.
 
-    return df 
+    The input DataFrame is left untouched.
 
+    Parameters:
+    df (pd.DataFrame): DataFrame containing company overview information.
 
+    Returns:
+    pd.DataFrame: Cleaned DataFrame with unique IDs assigned.
+    """
+    columns = _convert_columns(df, INFO_COLUMN_MAP, ['total_shares'], passthrough_columns=INFO_STRING_COLUMNS)
+    columns = {col: columns[col] for col in ['symbol', *INFO_COLUMN_MAP.values()] if col in columns}
 
-def clean_cash(df):
+    return pd.DataFrame(columns, copy=False)
+
+
+
+def _convert_columns(df: pd.DataFrame, column_name_map: dict, numeric_columns: list,
+                     passthrough_columns: list = None) -> dict:
     """
-    Cleans an cash flow statement DataFrame by:
-    - Renaming columns to more readable names.
-    - Selecting only relevant columns.
-    - Converting 'fiscalDateEnding' to datetime format.
-    - Ensuring numeric columns are properly cast to float64.
-    - Engineering new columns.
+    Renames, projects and converts the relevant columns of a raw DataFrame in a single pass.
+
+    Each output column is looked up under its raw name and returned as a NumPy array, so the
+    cleaners never rename, filter or assign into the input DataFrame. All numeric columns are
+    converted together by `coerce_numeric_block`.
+    Columns missing from the input are skipped, leaving the processed data validation to report them.
 
     Parameters:
-    df (pd.DataFrame): DataFrame containing balance sheet data.
+    df (pd.DataFrame): The raw DataFrame. It is not modified.
+    column_name_map (dict): Mapping of raw column names to processed column names.
+    numeric_columns (list): Processed names of the columns converted to numbers.
+    passthrough_columns (list): Processed names of the columns kept without conversion.
 
     Returns:
-    pd.DataFrame: Cleaned DataFrame with relevant columns and correct data types.
+    dict: Processed column name to array, with 'symbol' (batched frames) and 'date' first.
     """
+    raw_names = {new: old for old, new in column_name_map.items()}
+    columns = {}
 
-    column_name_map = {
-        'fiscalDateEnding': 'date',
-        'reportedCurrency': 'reported_currency',
-        'operatingCashflow': 'operating_cashflow',
-        'paymentsForOperatingActivities': 'payments_for_operating_activities',
-        'proceedsFromOperatingActivities': 'proceeds_from_operating_activities',
-        'changeInOperatingLiabilities': 'change_in_operating_liabilities',
-        'changeInOperatingAssets': 'change_in_operating_assets',
-        'depreciationDepletionAndAmortization': 'depreciation_depletion_and_amortization',
-        'capitalExpenditures': 'capital_expenditures',
-        'changeInReceivables': 'change_in_receivables',
-        'changeInInventory': 'change_in_inventory',
-        'profitLoss': 'profit_loss',
-        'cashflowFromInvestment': 'cashflow_from_investment',
-        'cashflowFromFinancing': 'cashflow_from_financing',
-        'proceedsFromRepaymentsOfShortTermDebt': 'debt_repayments',
-        'paymentsForRepurchaseOfCommonStock': 'payments_for_repurchase_of_common_stock',
-        'paymentsForRepurchaseOfEquity': 'payments_for_repurchase_of_equity',
-        'paymentsForRepurchaseOfPreferredStock': 'payments_for_repurchase_of_preferred_stock',
-        'dividendPayout': 'dividend_payout',
-        'dividendPayoutCommonStock': 'dividend_payout_common_stock',
-        'dividendPayoutPreferredStock': 'dividend_payout_preferred_stock',
-        'proceedsFromIssuanceOfCommonStock': 'proceeds_from_issuance_of_common_stock',
-        'proceedsFromIssuanceOfLongTermDebtAndCapitalSecuritiesNet': 'proceeds_from_issuance_of_long_term_debt_and_capital_securities_net',
-        'proceedsFromIssuanceOfPreferredStock': 'proceeds_from_issuance_of_preferred_stock',
-        'proceedsFromRepurchaseOfEquity': 'proceeds_from_repurchase_of_equity',
-        'proceedsFromSaleOfTreasuryStock': 'proceeds_from_sale_of_treasury_stock',
-        'changeInCashAndCashEquivalents': 'change_in_cash_and_cash_equivalents',
-        'changeInExchangeRate': 'change_in_exchange_rate',
-        'netIncome': 'net_income'
-     }
+    # Batched frames carry the symbol of each row along
+    if 'symbol' in df.columns:
+        columns['symbol'] = df['symbol'].array
 
-    
-    df.rename(columns=column_name_map, inplace=True)
+    if 'date' in raw_names and raw_names['date'] in df.columns:
+        columns['date'] = pd.to_datetime(df[raw_names['date']]).to_numpy()
 
-    # Define and select relevant columns
-    columns_to_keep = [
-        'date', 'operating_cashflow', 'capital_expenditures',
-        'cashflow_from_investment', 'cashflow_from_financing',
-        'dividend_payout', 'debt_repayments'
-    ]
+    numeric = [(col, raw_names.get(col, col)) for col in numeric_columns if raw_names.get(col, col) in df.columns]
+    if numeric:
+        block = coerce_numeric_block(df[[raw_name for _, raw_name in numeric]].to_numpy(dtype=object))
+        for i, (col, _) in enumerate(numeric):
+            columns[col] = _whole_numbers(block[:, i]) if col in INTEGER_COLUMNS else block[:, i]
 
-    df = df.filter(items=columns_to_keep)
+    for col in passthrough_columns or []:
+        raw_name = raw_names.get(col, col)
+        if raw_name in df.columns:
+            columns[col] = df[raw_name].to_numpy()
 
-    df['date'] = pd.to_datetime(df['date'])
+    return columns
 
-    numeric_columns = [
-        'operating_cashflow', 'capital_expenditures',
-        'cashflow_from_investment', 'cashflow_from_financing',
-        'dividend_payout', 'debt_repayments'
-    ]
 
-    df[numeric_columns] = df[numeric_columns].apply(pd.to_numeric, errors="coerce")
 
-    # Engineer columns 
-    df['free_cashflow'] = (df['operating_cashflow']-df['capital_expenditures'])
 
-    return df
 
+# Values Alpha Vantage sends for missing numbers
+MISSING_NUMBER_TOKENS = ('None', '')
 
 
-def clean_info(df):
+def coerce_numeric_block(block: np.ndarray) -> np.ndarray:
     """
-    Cleans company overview data.
-    
-    - Renames columns to follow snake_case naming convention.
+    Converts a 2-D block of raw statement values to float64 in one vectorized pass.
+
+    "None" and empty strings (MISSING_NUMBER_TOKENS) and missing cells are masked to NaN up front,
+    so the whole block is parsed by a single `astype` instead of per-column `pd.to_numeric` calls
+    that coerce through their error path.
 
     Parameters:
-    df (pd.DataFrame): DataFrame containing company overview information.
+    block (np.ndarray): Object array of raw values, one column per statement field.
 
     Returns:
-    pd.DataFrame: Cleaned DataFrame with unique IDs assigned.
+    np.ndarray: Column-major float64 array of the same shape, so each column is contiguous.
     """
-    column_name_map = {
-        'Name': 'name',
-        'SharesOutstanding': 'total_shares',
-        'Symbol': 'ticker_symbol',
-        'Exchange':'exchange',
-        'Currency': 'currency',
-        'Country': 'country',
-        'Sector': 'sector'
-    }
+    missing = pd.isna(block)
+    for token in MISSING_NUMBER_TOKENS:
+        missing |= block == token
 
-    df.rename(columns=column_name_map, inplace=True)
-    df['total_shares'] = df['total_shares'].apply(pd.to_numeric, errors="coerce")
+    block = np.where(missing, np.nan, block)
+    try:
+        return block.astype(np.float64, order='F')
+    except (TypeError, ValueError):
+        # Only reached for malformed values the raw validation let through
+        columns = [pd.to_numeric(pd.Series(column, dtype=object), errors='coerce') for column in block.T]
+        return np.array(columns, dtype=np.float64).T
 
-    return df
 
 
+def _whole_numbers(values: np.ndarray) -> np.ndarray:
+    """Returns counts (volume, shares) as int64 when none are missing, like `pd.to_numeric` infers them."""
+    if np.isnan(values).any() or not np.equal(np.mod(values, 1), 0).all():
+        return values
+    return values.astype(np.int64)
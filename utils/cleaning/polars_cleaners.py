@@ -0,0 +1,181 @@
+import polars as pl
+from utils.cleaning.data_cleaners import (DAILY_COLUMNS, DAILY_DATE_FORMAT, INFO_KEYS, INTEGER_COLUMNS,
+                                          BALANCE_COLUMN_MAP, BALANCE_NUMERIC_COLUMNS, INCOME_COLUMN_MAP,
+                                          INCOME_NUMERIC_COLUMNS, CASH_COLUMN_MAP, CASH_NUMERIC_COLUMNS,
+                                          INFO_COLUMN_MAP, INFO_STRING_COLUMNS)
+
+
+def format_daily_polars(data, data_type):
+    """Format JSON stock data gotten from the Alpha Vantage API into a pandas DataFrame using Polars."""
+
+    time_series = data.get('Time Series (Daily)', None)
+    return clean_daily(_daily_frame(list(time_series.keys()), list(time_series.values()))).collect().to_pandas()
+
+
+
+def format_daily_polars_batch(payloads: dict, data_type: str = 'daily'):
+    """Format the daily JSON data of many symbols into one long-format DataFrame with a categorical 'symbol' column."""
+
+    series = [payload.get('Time Series (Daily)', None) for payload in payloads.values()]
+    frame = _daily_frame([date for time_series in series for date in time_series.keys()],
+                         [row for time_series in series for row in time_series.values()])
+    frame = frame.with_columns(_symbol_column(list(payloads), [len(time_series) for time_series in series]))
+    return clean_daily(frame).collect().to_pandas()
+
+
+
+def format_financial_polars(data, data_type):
+    """Format JSON financial data gotten from the Alpha Vantage API into a pandas DataFrame using Polars."""
+
+    statement = data.get('annualReports', None)
+    return _statement_cleaners[data_type](_records_frame(statement)).collect().to_pandas()
+
+
+
+def format_financial_polars_batch(payloads: dict, data_type: str):
+    """Format the financial JSON data of many symbols into one long-format DataFrame with a 'symbol' column."""
+
+    statements = [data.get('annualReports', None) or [] for data in payloads.values()]
+    frame = _records_frame([report for statement in statements for report in statement])
+    frame = frame.with_columns(_symbol_column(list(payloads), [len(statement) for statement in statements]))
+    return _statement_cleaners[data_type](frame).collect().to_pandas()
+
+
+
+def format_info_polars(data, data_type):
+    """Format JSON company data gotten from the Alpha Vantage API into a pandas DataFrame using Polars."""
+
+    return clean_info(_records_frame([{key: data.get(key, None) for key in INFO_KEYS}])).collect().to_pandas()
+
+
+
+def format_info_polars_batch(payloads: dict, data_type: str = 'info'):
+    """Format the company JSON data of many symbols into one DataFrame with a 'symbol' column."""
+
+    frame = _records_frame([{key: data.get(key, None) for key in INFO_KEYS} for data in payloads.values()])
+    frame = frame.with_columns(_symbol_column(list(payloads), [1] * len(payloads)))
+    return clean_info(frame).collect().to_pandas()
+
+
+
+def clean_daily(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Cleans a raw daily LazyFrame, mirroring `data_cleaners.clean_daily`.
+
+    Parameters:
+    lf (pl.LazyFrame): Raw daily rows with a 'date' column and the Alpha Vantage value keys.
+
+    Returns:
+    pl.LazyFrame: Plan selecting 'date', 'open', 'close' and 'volume' with their processed types.
+    """
+    columns = [pl.col('date').str.strptime(pl.Datetime('ns'), DAILY_DATE_FORMAT, strict=False)]
+    columns += [_to_number(key, name) for key, (name, _) in DAILY_COLUMNS.items()]
+    return lf.select(_with_symbol(lf, columns))
+
+
+
+def clean_balance(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Cleans a raw balance sheet LazyFrame, mirroring `data_cleaners.clean_balance`."""
+    return lf.select(_with_symbol(lf, _statement_columns(lf, BALANCE_COLUMN_MAP, BALANCE_NUMERIC_COLUMNS)))
+
+
+
+def clean_income(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Cleans a raw income statement LazyFrame and engineers the margins, mirroring `data_cleaners.clean_income`."""
+    lf = lf.select(_with_symbol(lf, _statement_columns(lf, INCOME_COLUMN_MAP, INCOME_NUMERIC_COLUMNS)))
+    if not {'gross_profit', 'operating_income', 'ebit', 'total_revenue'} <= set(lf.collect_schema().names()):
+        return lf
+    return lf.with_columns([((pl.col(numerator) / pl.col('total_revenue')) * 100).round(2).alias(margin)
+                            for margin, numerator in [('gross_margin', 'gross_profit'),
+                                                      ('operating_margin', 'operating_income'),
+                                                      ('ebit_margin', 'ebit')]])
+
+
+
+def clean_cash(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Cleans a raw cash flow statement LazyFrame and engineers free cash flow, mirroring `data_cleaners.clean_cash`."""
+    lf = lf.select(_with_symbol(lf, _statement_columns(lf, CASH_COLUMN_MAP, CASH_NUMERIC_COLUMNS)))
+    if not {'operating_cashflow', 'capital_expenditures'} <= set(lf.collect_schema().names()):
+        return lf
+    return lf.with_columns((pl.col('operating_cashflow') - pl.col('capital_expenditures')).alias('free_cashflow'))
+
+
+
+def clean_info(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Cleans a raw company overview LazyFrame, mirroring `data_cleaners.clean_info`."""
+    names = lf.collect_schema().names()
+    columns = [_to_number(old, new) if new not in INFO_STRING_COLUMNS else pl.col(old).cast(pl.String).alias(new)
+               for old, new in INFO_COLUMN_MAP.items() if old in names]
+    return lf.select(_with_symbol(lf, columns))
+
+
+
+_statement_cleaners = {
+    'balance': clean_balance,
+    'income': clean_income,
+    'cash': clean_cash
+}
+
+
+
+def _statement_columns(lf: pl.LazyFrame, column_name_map: dict, numeric_columns: list) -> list:
+    """
+    Builds the rename, projection and cast expressions of a statement in one list, so the query
+    plan fuses them into a single pass. Columns missing from the input are skipped, leaving the
+    processed data validation to report them.
+    """
+    raw_names = {new: old for old, new in column_name_map.items()}
+    names = lf.collect_schema().names()
+
+    columns = []
+    if raw_names['date'] in names:
+        columns.append(pl.col(raw_names['date']).cast(pl.String)
+                       .str.strptime(pl.Datetime('ns'), DAILY_DATE_FORMAT, strict=False).alias('date'))
+    columns += [_to_number(raw_names[col], col) for col in numeric_columns if raw_names[col] in names]
+    return columns
+
+
+
+def _to_number(raw_name: str, name: str) -> pl.Expr:
+    """
+    Casts a raw string column to a number, turning "None" and other non-numbers into null.
+
+    Counts (volume, shares) become Int64, which pandas receives as int64, or float64 when values
+    are missing, like `pd.to_numeric` would produce.
+    """
+    number = pl.col(raw_name).cast(pl.String).str.strip_chars().cast(pl.Float64, strict=False)
+    if name in INTEGER_COLUMNS:
+        number = number.cast(pl.Int64, strict=False)
+    return number.alias(name)
+
+
+
+def _with_symbol(lf: pl.LazyFrame, columns: list) -> list:
+    """Prepends the 'symbol' column of batched frames to a list of output expressions."""
+    return [pl.col('symbol'), *columns] if 'symbol' in lf.collect_schema().names() else columns
+
+
+
+def _daily_frame(dates: list, rows: list) -> pl.LazyFrame:
+    """Builds a raw daily LazyFrame of string columns from the time series dates and value dicts."""
+    columns = {'date': pl.Series(dates, dtype=pl.String)}
+    for key in DAILY_COLUMNS:
+        columns[key] = pl.Series([row.get(key) for row in rows], dtype=pl.String)
+    return pl.LazyFrame(columns)
+
+
+
+def _records_frame(records: list) -> pl.LazyFrame:
+    """Builds a raw LazyFrame of string columns from a list of report dicts."""
+    if not records:
+        return pl.LazyFrame()
+    keys = dict.fromkeys(key for record in records for key in record)
+    return pl.LazyFrame({key: pl.Series([record.get(key) for record in records], dtype=pl.String, strict=False)
+                         for key in keys})
+
+
+
+def _symbol_column(symbols: list, lengths: list) -> pl.Series:
+    """Builds a categorical symbol column repeating each symbol for its number of rows."""
+    return pl.Series('symbol', [symbol for symbol, length in zip(symbols, lengths) for _ in range(length)],
+                     dtype=pl.Categorical)
@@ -0,0 +1,51 @@
+import pandas as pd
+
+from utils.cleaning.data_alignment import float_column
+
+BALANCE_TOLERANCE = 0.01  # Relative gap allowed between assets and liabilities + equity
+MARGIN_RANGE = (-100.0, 100.0)  # Percentage bounds for the engineered margins
+
+
+def _check(passed: pd.Series, available: pd.Series) -> pd.Series:
+    """Turns a boolean check into a nullable boolean, leaving rows without the required inputs as <NA>."""
+    return passed.astype('boolean').where(available, pd.NA)
+
+
+def check_accounting_identities(aligned: pd.DataFrame,
+                                tolerance: float = BALANCE_TOLERANCE,
+                                margin_range: tuple = MARGIN_RANGE) -> pd.DataFrame:
+    """
+    Checks accounting identities across aligned financial statements in a single vectorized pass.
+
+    Checks performed for every (symbol, date) row:
+    - Total assets equal total liabilities plus shareholder equity, within a relative tolerance.
+    - Gross, operating and EBIT margins lie within the expected percentage range.
+
+    Parameters:
+    aligned (pd.DataFrame): Output of `align_statements`, one row per (symbol, date).
+    tolerance (float): Relative tolerance for the balance sheet identity.
+    margin_range (tuple): Inclusive (low, high) bounds for the margins, in percent.
+
+    Returns:
+    pd.DataFrame: Summary table with the identity gaps, one nullable boolean column per check
+                  (<NA> when the inputs are missing) and a 'passed' column.
+    """
+    summary = aligned[['symbol', 'date']].copy()
+
+    assets = float_column(aligned, 'total_current_assets') + float_column(aligned, 'total_non_current_assets')
+    liabilities = float_column(aligned, 'total_current_liabilities') + float_column(aligned, 'total_non_current_liabilities')
+    equity = float_column(aligned, 'total_shareholder_equity')
+
+    summary['balance_gap'] = assets - (liabilities + equity)
+    summary['balance_ok'] = _check(summary['balance_gap'].abs() <= tolerance * assets.abs(),
+                                   summary['balance_gap'].notna())
+
+    low, high = margin_range
+    for margin in ['gross_margin', 'operating_margin', 'ebit_margin']:
+        values = float_column(aligned, margin)
+        summary[f'{margin}_ok'] = _check(values.between(low, high), values.notna())
+
+    check_columns = [col for col in summary.columns if col.endswith('_ok')]
+    summary['passed'] = summary[check_columns].fillna(True).all(axis=1)
+
+    return summary
@@ -1,4 +1,28 @@
 import pandas as pd
+import pyarrow as pa
+from utils.cleaning.data_cleaners import INTEGER_COLUMNS
+
+# Columns every processed frame must provide; all but 'date' and the info strings must be numeric
+REQUIRED_COLUMNS = {
+    'daily': ['open', 'close', 'volume'],
+    'info': ['name', 'total_shares', 'ticker_symbol', 'exchange', 'currency', 'country', 'sector'],
+    'income': ['date', 'total_revenue', 'gross_profit', 'operating_income', 'net_income', 'ebit'],
+    'balance': ['date', 'total_current_assets', 'total_non_current_assets', 
+                'total_current_liabilities', 'total_non_current_liabilities', 'total_shareholder_equity'],
+    'cash': ['date', 'operating_cashflow', 'capital_expenditures', 
+             'cashflow_from_investment', 'cashflow_from_financing', 'dividend_payout']
+}
+
+INFO_STRING_COLUMNS = ['name', 'ticker_symbol', 'exchange', 'currency', 'country', 'sector']
+
+
+def is_string_column(series: pd.Series) -> bool:
+    """Returns True for object, string (including Arrow-backed) and categorical-of-strings columns."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        return len(categories) == 0 or pd.api.types.is_string_dtype(categories)
+    return pd.api.types.is_string_dtype(series)
+
 
 def validate_processed_daily_data(df: pd.DataFrame) -> dict:
     """
@@ -10,7 +34,7 @@ def validate_processed_daily_data(df: pd.DataFrame) -> dict:
     Returns:
     dict: Validation result with 'error' and 'message' keys.
     """
-    required_columns = ['open', 'close', 'volume']
+    required_columns = REQUIRED_COLUMNS['daily']
     if not isinstance(df, pd.DataFrame):
         return {"error": True, "message": "Input data must be a pandas DataFrame."}
 
@@ -39,7 +63,7 @@ def validate_processed_info_data(df: pd.DataFrame) -> dict:
     Returns:
     dict: Validation result with 'error' and 'message' keys.
     """
-    required_columns = ['name', 'total_shares', 'ticker_symbol', 'exchange', 'currency', 'country', 'sector']
+    required_columns = REQUIRED_COLUMNS['info']
     if not isinstance(df, pd.DataFrame):
         return {"error": True, "message": "Input data must be a pandas DataFrame."}
 
@@ -50,9 +74,8 @@ def validate_processed_info_data(df: pd.DataFrame) -> dict:
     if not pd.api.types.is_numeric_dtype(df['total_shares']):
         return {"error": True, "message": "Column 'total_shares' must be numeric."}
 
-    string_columns = ['name', 'ticker_symbol', 'exchange', 'currency', 'country', 'sector']
-    for col in string_columns:
-        if not pd.api.types.is_string_dtype(df[col]):
+    for col in INFO_STRING_COLUMNS:
+        if not is_string_column(df[col]):
             return {"error": True, "message": f"Column '{col}' must be a string."}
 
     return {"error": False, "message": "Processed info data validation successful."}
@@ -69,18 +92,11 @@ def validate_processed_financial_data(df: pd.DataFrame, data_type: str) -> dict:
     Returns:
     dict: Validation result with 'error' and 'message' keys.
     """
-    required_columns_map = {
-        'income': ['date', 'total_revenue', 'gross_profit', 'operating_income', 'net_income', 'ebit'],
-        'balance': ['date', 'total_current_assets', 'total_non_current_assets', 
-                    'total_current_liabilities', 'total_non_current_liabilities', 'total_shareholder_equity'],
-        'cash': ['date', 'operating_cashflow', 'capital_expenditures', 
-                 'cashflow_from_investment', 'cashflow_from_financing', 'dividend_payout']
-    }
-
-    if data_type not in required_columns_map:
-        return {"error": True, "message": f"Unknown data type '{data_type}'. Expected one of {list(required_columns_map.keys())}."}
-
-    required_columns = required_columns_map[data_type]
+    financial_types = ['income', 'balance', 'cash']
+    if data_type not in financial_types:
+        return {"error": True, "message": f"Unknown data type '{data_type}'. Expected one of {financial_types}."}
+
+    required_columns = REQUIRED_COLUMNS[data_type]
     if not isinstance(df, pd.DataFrame):
         return {"error": True, "message": "Input data must be a pandas DataFrame."}
 
@@ -99,22 +115,90 @@ def validate_processed_financial_data(df: pd.DataFrame, data_type: str) -> dict:
     return {"error": False, "message": f"Processed {data_type} data validation successful."}
 
 
-def validate_processed_data(df: pd.DataFrame, data_type: str) -> dict:
+def validate_processed_table(table: pa.Table, data_type: str) -> dict:
     """
-    Validates the processed data based on its type.
+    Validates a processed Arrow table against the same rules as the pandas validators.
+
+    Only the table schema is inspected, so Arrow-native runs are validated without converting
+    the table to pandas.
+
+    Parameters:
+    table (pa.Table): The processed data.
+    data_type (str): The type of data ('daily', 'info', 'income', 'balance', 'cash').
+
+    Returns:
+    dict: Validation result with 'error' and 'message' keys.
+    """
+    if data_type not in REQUIRED_COLUMNS:
+        return {"error": True, "message": f"Unknown data type '{data_type}'."}
+
+    required_columns = REQUIRED_COLUMNS[data_type]
+    missing_columns = [col for col in required_columns if col not in table.column_names]
+    if missing_columns:
+        return {"error": True, "message": f"Missing required columns: {missing_columns}"}
+
+    schema = table.schema
+    if data_type != 'info' and ('date' not in table.column_names or not pa.types.is_timestamp(schema.field('date').type)):
+        return {"error": True, "message": "Column 'date' must be of datetime type."}
+
+    for col in required_columns:
+        column_type = schema.field(col).type
+        if pa.types.is_dictionary(column_type):
+            column_type = column_type.value_type
+        if col in INFO_STRING_COLUMNS:
+            if not (pa.types.is_string(column_type) or pa.types.is_large_string(column_type) or pa.types.is_null(column_type)):
+                return {"error": True, "message": f"Column '{col}' must be a string."}
+        elif col != 'date' and not (pa.types.is_integer(column_type) or pa.types.is_floating(column_type)):
+            return {"error": True, "message": f"Column '{col}' must be numeric."}
+
+    return {"error": False, "message": f"Processed {data_type} table validation successful."}
+
+
+def validate_compact_dtypes(df: pd.DataFrame) -> dict:
+    """
+    Validates that a processed DataFrame follows the compact dtype profile.
 
     Parameters:
     df (pd.DataFrame): The processed data.
+
+    Returns:
+    dict: Validation result with 'error' and 'message' keys.
+    """
+    object_columns = [col for col in df.columns if df[col].dtype == object]
+    if object_columns:
+        return {"error": True, "message": f"Columns {object_columns} must not be of object dtype in the compact profile."}
+
+    for col in INTEGER_COLUMNS:
+        if col in df.columns and not pd.api.types.is_integer_dtype(df[col]):
+            return {"error": True, "message": f"Column '{col}' must be an integer type in the compact profile."}
+
+    return {"error": False, "message": "Compact dtype validation successful."}
+
+
+def validate_processed_data(df: pd.DataFrame, data_type: str, dtype_profile: str = 'default') -> dict:
+    """
+    Validates the processed data based on its type.
+
+    Parameters:
+    df (pd.DataFrame | pa.Table): The processed data. Arrow tables are checked by `validate_processed_table`.
     data_type (str): The type of data ('daily', 'info', 'income', 'balance', 'cash').
+    dtype_profile (str): The dtype profile the data was converted to ('default', 'compact').
 
     Returns:
     dict: Validation result with 'error' and 'message' keys.
     """
+    if isinstance(df, pa.Table):
+        return validate_processed_table(df, data_type)
+
     if data_type == 'daily':
-        return validate_processed_daily_data(df)
+        result = validate_processed_daily_data(df)
     elif data_type == 'info':
-        return validate_processed_info_data(df)
+        result = validate_processed_info_data(df)
     elif data_type in ['income', 'balance', 'cash']:
-        return validate_processed_financial_data(df, data_type)
+        result = validate_processed_financial_data(df, data_type)
     else:
-        return {"error": True, "message": f"Unknown data type '{data_type}'."}
\ No newline at end of file
+        return {"error": True, "message": f"Unknown data type '{data_type}'."}
+
+    if dtype_profile == 'compact' and not result["error"]:
+        return validate_compact_dtypes(df)
+    return result
\ No newline at end of file
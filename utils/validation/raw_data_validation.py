@@ -1,4 +1,5 @@
 import re
+import pandas as pd
 from config.config import ALPHA_VANTAGE_API_KEY
 
 date_pattern = r'^\d{4}-\d{2}-\d{2}$'  # Matches "YYYY-MM-DD"
@@ -9,9 +10,61 @@ key_pattern = r'^[a-zA-Z]+[a-zA-Z0-9]*$'  # Matches valid key names (no special
 value_none_pattern = r'^None$'  # Matches "None"
 value_string_pattern = r'^[A-Z]{3}$'  # Matches string values like currency codes (e.g., "USD")
 
+financial_required_columns = {
+    'income': [
+        'fiscalDateEnding', 'reportedCurrency', 'grossProfit', 'totalRevenue',
+        'costOfRevenue', 'costofGoodsAndServicesSold', 'operatingIncome',
+        'sellingGeneralAndAdministrative', 'researchAndDevelopment', 'operatingExpenses',
+        'investmentIncomeNet', 'netInterestIncome', 'interestIncome', 'interestExpense',
+        'nonInterestIncome', 'otherNonOperatingIncome', 'depreciation',
+        'depreciationAndAmortization', 'incomeBeforeTax', 'incomeTaxExpense',
+        'interestAndDebtExpense', 'netIncomeFromContinuingOperations',
+        'comprehensiveIncomeNetOfTax', 'ebit', 'ebitda', 'netIncome'
+    ],
+    'balance': [
+        'fiscalDateEnding', 'reportedCurrency', 'totalAssets', 'totalCurrentAssets',
+        'cashAndCashEquivalentsAtCarryingValue', 'cashAndShortTermInvestments',
+        'inventory', 'currentNetReceivables', 'totalNonCurrentAssets',
+        'propertyPlantEquipment', 'accumulatedDepreciationAmortizationPPE',
+        'intangibleAssets', 'intangibleAssetsExcludingGoodwill', 'goodwill',
+        'investments', 'longTermInvestments', 'shortTermInvestments',
+        'otherCurrentAssets', 'otherNonCurrentAssets', 'totalLiabilities',
+        'totalCurrentLiabilities', 'currentAccountsPayable', 'deferredRevenue',
+        'currentDebt', 'shortTermDebt', 'totalNonCurrentLiabilities',
+        'capitalLeaseObligations', 'longTermDebt', 'currentLongTermDebt',
+        'longTermDebtNoncurrent', 'shortLongTermDebtTotal', 'otherCurrentLiabilities',
+        'otherNonCurrentLiabilities', 'totalShareholderEquity', 'treasuryStock',
+        'retainedEarnings', 'commonStock', 'commonStockSharesOutstanding'
+    ],
+    'cash': [
+        'fiscalDateEnding', 'reportedCurrency', 'operatingCashflow',
+        'paymentsForOperatingActivities', 'proceedsFromOperatingActivities',
+        'changeInOperatingLiabilities', 'changeInOperatingAssets',
+        'depreciationDepletionAndAmortization', 'capitalExpenditures',
+        'changeInReceivables', 'changeInInventory', 'profitLoss',
+        'cashflowFromInvestment', 'cashflowFromFinancing',
+        'proceedsFromRepaymentsOfShortTermDebt', 'paymentsForRepurchaseOfCommonStock',
+        'paymentsForRepurchaseOfEquity', 'paymentsForRepurchaseOfPreferredStock',
+        'dividendPayout', 'dividendPayoutCommonStock', 'dividendPayoutPreferredStock',
+        'proceedsFromIssuanceOfCommonStock',
+        'proceedsFromIssuanceOfLongTermDebtAndCapitalSecuritiesNet',
+        'proceedsFromIssuanceOfPreferredStock', 'proceedsFromRepurchaseOfEquity',
+        'proceedsFromSaleOfTreasuryStock', 'changeInCashAndCashEquivalents',
+        'changeInExchangeRate', 'netIncome'
+    ]
+}
+
+
+def raw_data_validation(data, data_type, accumulate=False):
+    """
+    Validates the structure and content of raw data.
+
+    By default validation stops at the first bad value. With accumulate=True every violation
+    is collected in one pass and a report is returned instead (see `raw_data_report`).
+    """
+    if accumulate:
+        return raw_data_report(data, data_type)
 
-def raw_data_validation(data, data_type):
-    """Validates the structure and content of raw data."""
     data_type_list = ['daily', 'income', 'balance', 'cash', 'info']
     if not isinstance(data, dict):
         return {"error": True, "message": f"Argument 'data' is not a dictionary, instead: {type(data)}"}
@@ -81,56 +134,13 @@ def daily_validation(daily_dict):
 
 def financials_validation(financials_dict, data_type):
     """Validates financial data."""
-    required_columns_map = {
-        'income': [
-        'fiscalDateEnding', 'reportedCurrency', 'grossProfit', 'totalRevenue',
-        'costOfRevenue', 'costofGoodsAndServicesSold', 'operatingIncome',
-        'sellingGeneralAndAdministrative', 'researchAndDevelopment', 'operatingExpenses',
-        'investmentIncomeNet', 'netInterestIncome', 'interestIncome', 'interestExpense',
-        'nonInterestIncome', 'otherNonOperatingIncome', 'depreciation',
-        'depreciationAndAmortization', 'incomeBeforeTax', 'incomeTaxExpense',
-        'interestAndDebtExpense', 'netIncomeFromContinuingOperations',
-        'comprehensiveIncomeNetOfTax', 'ebit', 'ebitda', 'netIncome'
-    ],
-    'balance': [
-        'fiscalDateEnding', 'reportedCurrency', 'totalAssets', 'totalCurrentAssets',
-        'cashAndCashEquivalentsAtCarryingValue', 'cashAndShortTermInvestments',
-        'inventory', 'currentNetReceivables', 'totalNonCurrentAssets',
-        'propertyPlantEquipment', 'accumulatedDepreciationAmortizationPPE',
-        'intangibleAssets', 'intangibleAssetsExcludingGoodwill', 'goodwill',
-        'investments', 'longTermInvestments', 'shortTermInvestments',
-        'otherCurrentAssets', 'otherNonCurrentAssets', 'totalLiabilities',
-        'totalCurrentLiabilities', 'currentAccountsPayable', 'deferredRevenue',
-        'currentDebt', 'shortTermDebt', 'totalNonCurrentLiabilities',
-        'capitalLeaseObligations', 'longTermDebt', 'currentLongTermDebt',
-        'longTermDebtNoncurrent', 'shortLongTermDebtTotal', 'otherCurrentLiabilities',
-        'otherNonCurrentLiabilities', 'totalShareholderEquity', 'treasuryStock',
-        'retainedEarnings', 'commonStock', 'commonStockSharesOutstanding'
-    ],
-    'cash': [
-        'fiscalDateEnding', 'reportedCurrency', 'operatingCashflow',
-        'paymentsForOperatingActivities', 'proceedsFromOperatingActivities',
-        'changeInOperatingLiabilities', 'changeInOperatingAssets',
-        'depreciationDepletionAndAmortization', 'capitalExpenditures',
-        'changeInReceivables', 'changeInInventory', 'profitLoss',
-        'cashflowFromInvestment', 'cashflowFromFinancing',
-        'proceedsFromRepaymentsOfShortTermDebt', 'paymentsForRepurchaseOfCommonStock',
-        'paymentsForRepurchaseOfEquity', 'paymentsForRepurchaseOfPreferredStock',
-        'dividendPayout', 'dividendPayoutCommonStock', 'dividendPayoutPreferredStock',
-        'proceedsFromIssuanceOfCommonStock',
-        'proceedsFromIssuanceOfLongTermDebtAndCapitalSecuritiesNet',
-        'proceedsFromIssuanceOfPreferredStock', 'proceedsFromRepurchaseOfEquity',
-        'proceedsFromSaleOfTreasuryStock', 'changeInCashAndCashEquivalents',
-        'changeInExchangeRate', 'netIncome'
-    ]
-    }
     if not isinstance(financials_dict, dict):
         return {"error": True, "message": "Financial data must be a dictionary."}
     
     if "annualReports" not in financials_dict.keys():
             return {"error": True, "message": "Missing 'annualReports' key."}
     
-    required_columns = required_columns_map[data_type]
+    required_columns = financial_required_columns[data_type]
     for report in financials_dict.get("annualReports"):
         if not isinstance(report, dict):
             return {"error": True, "message": f"Expected a dictionary in 'annualReports', got {type(report)}."}
@@ -167,6 +177,182 @@ def info_validation(info_dict):
         
     return {"error": False, "message": "Validation successful."}
 
+
+
+def raw_data_report(data, data_type, sample_size=5):
+    """
+    Validates raw daily or financial data in one vectorized pass, collecting every violation.
+
+    Parameters:
+    data (dict): Raw API payload.
+    data_type (str): The type of data ('daily', 'income', 'balance', 'cash', 'info').
+    sample_size (int): Maximum number of offending cells kept per rule.
+
+    Returns:
+    dict: Report with the keys
+        'error' and 'message' as returned by `raw_data_validation`,
+        'violations': count of offending cells per rule,
+        'samples': up to `sample_size` offending cells per rule as {'row', 'column', 'value'} dicts,
+        'bad_rows': labels of the offending rows (dates for daily data, report positions for statements),
+        'recoverable': whether dropping the bad rows leaves usable data.
+    """
+    rows = None
+    if isinstance(data, dict) and data_type == 'daily':
+        rows = data.get('Time Series (Daily)')
+    elif isinstance(data, dict) and data_type in financial_required_columns:
+        rows = data.get('annualReports')
+
+    # Structural problems (wrong type, missing top-level key, API limit message, info data)
+    # concern the whole payload, so they are reported through the first-failure validators.
+    if data_type == 'daily' and isinstance(rows, dict) and rows:
+        rules, n_rows = _daily_rules(rows)
+    elif data_type in financial_required_columns and isinstance(rows, list) and rows:
+        rules, n_rows = _financial_rules(rows, data_type)
+    else:
+        result = raw_data_validation(data, data_type)
+        return {
+            **result,
+            "violations": {"structure": 1} if result["error"] else {},
+            "samples": {"structure": [{"row": None, "column": None, "value": result["message"]}]} if result["error"] else {},
+            "bad_rows": [],
+            "recoverable": False
+        }
+
+    return _build_report(rules, n_rows, sample_size)
+
+
+def remove_invalid_rows(data, data_type, report):
+    """
+    Returns a copy of a raw payload without the rows flagged in a `raw_data_report` report.
+
+    The input payload is left untouched.
+    """
+    bad_rows = set(report["bad_rows"])
+    cleaned = dict(data)
+
+    if data_type == 'daily':
+        cleaned['Time Series (Daily)'] = {date: values for date, values in data['Time Series (Daily)'].items()
+                                          if date not in bad_rows}
+    else:
+        cleaned['annualReports'] = [statement for position, statement in enumerate(data['annualReports'])
+                                    if position not in bad_rows]
+    return cleaned
+
+
+def _daily_rules(time_series):
+    """Collects the offending cells of a daily time series, keyed by rule."""
+    required_columns = ['1. open', '2. high', '3. low', '4. close', '5. volume']
+
+    invalid_rows = pd.Series({date: values for date, values in time_series.items() if not isinstance(values, dict)},
+                             dtype=object)
+    records = {date: values for date, values in time_series.items() if isinstance(values, dict)}
+    # from_dict drops dates without any values, so reindex to keep them as rows missing every column
+    frame = pd.DataFrame.from_dict(records, orient='index', dtype=object).reindex(list(records))
+    present = _present_keys(frame, records.values())
+
+    dates = pd.Series(frame.index.astype(str), index=frame.index)
+    cells = _present_cells(frame, present)
+    columns = pd.Series(cells.index.get_level_values(1).astype(str), index=cells.index)
+    valid_keys = columns.str.match(daily_key_pattern)
+    missing = ~present.reindex(columns=required_columns, fill_value=False).stack()
+
+    rules = {
+        "invalid_row": invalid_rows,
+        "invalid_date": dates[~dates.str.match(date_pattern)],
+        "invalid_key": cells[~valid_keys],
+        "invalid_value": cells[valid_keys & ~cells.astype(str).str.match(value_pattern)],
+        "missing_column": _missing_cells(missing)
+    }
+    return rules, len(time_series)
+
+
+def _financial_rules(reports, data_type):
+    """Collects the offending cells of a list of financial reports, keyed by rule."""
+    any_value_pattern = '|'.join(f'(?:{pattern})' for pattern in
+                                 [date_pattern, value_pattern, value_none_pattern, value_string_pattern])
+
+    invalid_rows = pd.Series({position: report for position, report in enumerate(reports) if not isinstance(report, dict)},
+                             dtype=object)
+    positions = [position for position, report in enumerate(reports) if isinstance(report, dict)]
+    frame = pd.DataFrame([reports[position] for position in positions], index=positions, dtype=object)
+    present = _present_keys(frame, [reports[position] for position in positions])
+
+    cells = _present_cells(frame, present)
+    columns = cells.index.get_level_values(1)
+    valid_keys = pd.Series([isinstance(key, str) and re.match(key_pattern, key) is not None for key in frame.columns],
+                           index=frame.columns)
+
+    # Only columns pandas cannot infer as plain strings or numbers need an element-wise type check.
+    mixed_columns = [col for col in frame.columns
+                     if pd.api.types.infer_dtype(frame[col], skipna=True) not in ('string', 'integer', 'floating', 'mixed-integer-float', 'empty')]
+    valid_types = pd.Series(True, index=cells.index)
+    if mixed_columns:
+        in_mixed = columns.isin(mixed_columns)
+        valid_types[in_mixed] = [isinstance(value, (str, int, float)) for value in cells[in_mixed]]
+    # Type inference skips nulls, so present None values are checked on their own
+    nulls = cells.isna()
+    if nulls.any():
+        valid_types[nulls] = [isinstance(value, float) for value in cells[nulls]]
+
+    valid_values = cells.astype(str).str.match(any_value_pattern)
+    missing = ~present.reindex(columns=financial_required_columns[data_type], fill_value=False).stack()
+
+    rules = {
+        "invalid_row": invalid_rows,
+        "invalid_key": cells[~valid_keys.reindex(columns).to_numpy()],
+        "invalid_type": cells[~valid_types],
+        "invalid_value": cells[valid_types & ~valid_values],
+        "missing_column": _missing_cells(missing)
+    }
+    return rules, len(reports)
+
+
+def _present_keys(frame, rows):
+    """Flags which columns of `frame` each row has as a key, so present None values are not taken for missing columns."""
+    present = pd.DataFrame([dict.fromkeys(row, True) for row in rows], index=frame.index, dtype=object)
+    return present.reindex(columns=frame.columns).notna()
+
+
+def _present_cells(frame, present):
+    """Stacks the cells of `frame` whose key is present in the row, None values included."""
+    return frame.stack(future_stack=True)[present.stack().to_numpy()]
+
+
+def _missing_cells(missing):
+    """Turns a stacked boolean frame of missing cells into a Series of offending cells with no value."""
+    index = missing.index[missing.to_numpy()]
+    return pd.Series([None] * len(index), index=index, dtype=object)
+
+
+def _build_report(rules, n_rows, sample_size):
+    """Summarizes the offending cells of every rule into a validation report."""
+    violations, samples, bad_rows = {}, {}, {}
+
+    for rule, offending in rules.items():
+        if offending.empty:
+            continue
+        violations[rule] = len(offending)
+        samples[rule] = []
+        for label, value in offending.head(sample_size).items():
+            row, column = label if isinstance(label, tuple) else (label, None)
+            samples[rule].append({"row": row, "column": column, "value": value})
+        for label in offending.index:
+            bad_rows.setdefault(label[0] if isinstance(label, tuple) else label, None)
+
+    if not violations:
+        return {"error": False, "message": "Validation successful.", "violations": {}, "samples": {},
+                "bad_rows": [], "recoverable": True}
+
+    counts = ', '.join(f'{rule}={count}' for rule, count in violations.items())
+    return {
+        "error": True,
+        "message": f"Found {sum(violations.values())} violations in {len(bad_rows)} of {n_rows} rows: {counts}",
+        "violations": violations,
+        "samples": samples,
+        "bad_rows": list(bad_rows),
+        "recoverable": len(bad_rows) < n_rows
+    }
+
         
 
 